@@ -4,8 +4,10 @@ Django admin configuration for app models
 from django.contrib import admin
 from .models import (
     AccessCode, Wallet, Category, Transaction, 
-    Budget, RecurringTransaction
+    Budget, RecurringTransaction, VectorOutbox, DailyRollup, SpendingAnomaly,
+    WalletBalanceSnapshot
 )
+from .services.budget_service import budget_service
 
 
 @admin.register(AccessCode)
@@ -23,7 +25,7 @@ class WalletAdmin(admin.ModelAdmin):
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ['name', 'icon', 'created_at']
+    list_display = ['name', 'icon', 'anomaly_threshold', 'created_at']
     search_fields = ['name']
 
 
@@ -41,6 +43,11 @@ class BudgetAdmin(admin.ModelAdmin):
     list_display = ['category', 'amount', 'period', 'start_date', 'end_date', 'is_active', 'get_spent_display']
     list_filter = ['period', 'is_active', 'start_date']
     search_fields = ['category__name']
+    readonly_fields = ['spent']
+    
+    def get_queryset(self, request):
+        # Spent amounts for the whole changelist page in the same query
+        return budget_service.with_spent(super().get_queryset(request))
     
     def get_spent_display(self, obj):
         spent = obj.get_spent_amount()
@@ -55,3 +62,35 @@ class RecurringTransactionAdmin(admin.ModelAdmin):
     list_filter = ['frequency', 'is_active', 'transaction_type', 'next_run_date']
     search_fields = ['name', 'description']
 
+
+
+@admin.register(VectorOutbox)
+class VectorOutboxAdmin(admin.ModelAdmin):
+    list_display = ['transaction_id', 'operation', 'version', 'attempts', 'enqueued_at', 'updated_at']
+    list_filter = ['operation']
+    search_fields = ['transaction_id']
+    readonly_fields = ['enqueued_at', 'updated_at']
+
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    list_display = ['day', 'wallet', 'category', 'transaction_type', 'total', 'count']
+    list_filter = ['transaction_type', 'wallet']
+    date_hierarchy = 'day'
+    readonly_fields = ['day', 'wallet', 'category', 'transaction_type', 'total', 'count']
+
+
+@admin.register(WalletBalanceSnapshot)
+class WalletBalanceSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['day', 'wallet', 'balance', 'created_at']
+    list_filter = ['wallet']
+    date_hierarchy = 'day'
+    readonly_fields = ['wallet', 'day', 'balance', 'created_at']
+
+
+@admin.register(SpendingAnomaly)
+class SpendingAnomalyAdmin(admin.ModelAdmin):
+    list_display = ['month', 'category', 'current_total', 'baseline_mean', 'increase_percentage', 'robust_z', 'threshold', 'detected_at']
+    list_filter = ['month', 'category']
+    date_hierarchy = 'month'
+    readonly_fields = [field.name for field in SpendingAnomaly._meta.fields]
@@ -64,6 +64,12 @@ def list_budgets(request):
     ]
 
 
+@router.get("/status", response=List[BudgetStatusOut], summary="Get status of all budgets")
+def list_budget_statuses(request, active_only: bool = False):
+    """Spent/remaining amounts for every budget, computed in one grouped query"""
+    return budget_service.get_all_statuses(active_only=active_only)
+
+
 @router.get("/{budget_id}", response=BudgetOut, summary="Get budget by ID")
 def get_budget(request, budget_id: int):
     """Get a specific budget"""
@@ -84,7 +90,7 @@ def get_budget(request, budget_id: int):
 @router.get("/{budget_id}/status", response=BudgetStatusOut, summary="Get budget status")
 def get_budget_status(request, budget_id: int):
     """Get budget status with spent/remaining amounts"""
-    budget = Budget.objects.select_related('category').get(id=budget_id)
+    budget = budget_service.with_spent(Budget.objects.select_related('category')).get(id=budget_id)
     status = budget_service.get_budget_status(budget)
     return status
 
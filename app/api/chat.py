@@ -1,9 +1,13 @@
 """
 Chat with Data API endpoints (RAG)
 """
+import json
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from ninja import Router
 from typing import Optional, List, Dict
 from pydantic import BaseModel
+from ..services.llm_cache import llm_cache
 from ..services.rag_service import rag_service
 
 router = Router(tags=["chat"])
@@ -21,13 +25,13 @@ class ChatResponse(BaseModel):
 
 
 @router.post("/ask", response=ChatResponse, summary="Ask question about financial data")
-def ask_question(request, data: ChatRequest):
+async def ask_question(request, data: ChatRequest):
     """
     Ask a natural language question about financial data.
     Uses RAG to query database and generate response.
     """
     try:
-        result = rag_service.query_financial_data(data.question, data.session_id)
+        result = await rag_service.aquery_financial_data(data.question, data.session_id)
         return {
             "answer": result["answer"],
             "session_id": result["session_id"],
@@ -40,6 +44,46 @@ def ask_question(request, data: ChatRequest):
             "session_id": data.session_id
         }
 
+@router.post("/ask/stream", summary="Ask question, streaming the answer (SSE)")
+def ask_question_stream(request, data: ChatRequest):
+    """
+    Same as /ask, but the answer is sent as server-sent events while the
+    model generates it:
+    
+    - `session`: {"session_id"} right away
+    - `token`: {"text"} for every chunk of the answer
+    - `done`: {"session_id", "message_id"} once the full answer is saved
+    - `error`: {"error", "session_id"} if generation fails
+    
+    Under ASGI the stream is an async iterator (no thread held while the
+    model generates); under WSGI it stays a plain generator, since Django
+    would buffer an async one completely.
+    """
+    def format_event(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+    
+    def events():
+        for event, payload in rag_service.stream_financial_data(data.question, data.session_id):
+            yield format_event(event, payload)
+    
+    async def aevents():
+        async for event, payload in rag_service.astream_financial_data(data.question, data.session_id):
+            yield format_event(event, payload)
+    
+    stream = aevents() if isinstance(request, ASGIRequest) else events()
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Don't let nginx buffer the stream
+    return response
+
+@router.get("/cache-stats", summary="LLM response cache statistics")
+def cache_stats(request):
+    """
+    Hit rate of the LLM response cache and the tokens, generation time and
+    estimated cost it saved, for the worker that serves this request.
+    """
+    return llm_cache.stats()
+
 @router.get("/sessions/{session_id}/messages", response=List[Dict], summary="Get chat history")
 def get_history(request, session_id: int):
     """Get all messages for a specific session"""
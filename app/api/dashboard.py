@@ -2,13 +2,18 @@
 Dashboard API endpoints for visual reports
 """
 from ninja import Router
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from pydantic import BaseModel
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from dateutil.relativedelta import relativedelta
 from django.db.models import Sum, Count, Q
+from django.db.models.functions import TruncMonth
 from django.core.cache import cache
+from django.http import JsonResponse
 from django.utils import timezone
-from ..models import Transaction, Budget, Wallet
+from ..models import DailyRollup, SpendingAnomaly, Transaction, Budget, Wallet
+from ..services.ledger_cache import ledger_cache, ledger_cached
 
 router = Router(tags=["dashboard"])
 
@@ -20,6 +25,13 @@ class SummaryCard(BaseModel):
     transaction_count: int
     current_balance: float  # Tổng số dư hiện tại từ các ví
     available_balance: float  # Số dư khả dụng (không tính tiết kiệm)
+    # Debt breakdown trong period
+    total_debt_loan: float = 0  # Cho vay
+    total_debt_borrow: float = 0  # Đi vay
+    total_debt_collect: float = 0  # Thu nợ
+    total_debt_repay: float = 0  # Trả nợ
+    outstanding_receivable: float = 0  # Cho vay - Thu nợ
+    outstanding_payable: float = 0  # Đi vay - Trả nợ
 
 
 class CategoryBreakdown(BaseModel):
@@ -35,88 +47,155 @@ class MonthlyComparison(BaseModel):
     balance: float
 
 
-@router.get("/summary", response=SummaryCard, summary="Get financial summary")
-def get_summary(request, start_date: str = None, end_date: str = None):
+class AnomalyOut(BaseModel):
+    month: str
+    category_id: int
+    category: str
+    current_total: float
+    baseline_mean: float
+    baseline_median: float
+    z_score: Optional[float] = None
+    robust_z: Optional[float] = None
+    increase_percentage: float
+    threshold: float
+    window_months: int
+    message: str
+    detected_at: str
+
+
+def _is_date_only(value: str) -> bool:
+    return len(value.strip()) == 10  # YYYY-MM-DD
+
+
+def _filter_by_period(tx_qs, start_date: str = None, end_date: str = None):
     """
-    Get total income, expense, balance, and transaction count
+    Apply the dashboard period filters to a transaction queryset.
+    No dates => all time; start without end => up to now.
+    A date-only end_date includes that whole day.
     """
-    # Calculate totals
-    # No caching for real-time updates
-    
-    # Base Query
-    tx_qs = Transaction.objects.all()
-    
-    # Apply date filters ONLY if provided
     if start_date:
         start = datetime.fromisoformat(start_date)
         tx_qs = tx_qs.filter(date__gte=start)
-    
+
     if end_date:
         end = datetime.fromisoformat(end_date)
-        tx_qs = tx_qs.filter(date__lte=end)
-    elif not start_date:
-         # If neither provided (default view), do NOT filter by date => All Time
-         pass
+        if _is_date_only(end_date):
+            tx_qs = tx_qs.filter(date__lt=end + timedelta(days=1))
+        else:
+            tx_qs = tx_qs.filter(date__lte=end)
+    elif start_date:
+        tx_qs = tx_qs.filter(date__lte=timezone.now())
+    return tx_qs
+
+
+def _period_days(start_date: str = None, end_date: str = None) -> Optional[Tuple[Optional[date], Optional[date]]]:
+    """
+    Local day range (first, last) covering the period, for reading DailyRollup.
+
+    Returns:
+        None if a bound falls inside a day; only the raw transactions can
+        answer such a period exactly.
+    """
+    first = last = None
+    if start_date:
+        start = datetime.fromisoformat(start_date)
+        if timezone.is_aware(start):
+            start = timezone.localtime(start)
+        if start.time() != time.min:
+            return None
+        first = start.date()
+
+    if end_date:
+        if not _is_date_only(end_date):
+            return None
+        last = date.fromisoformat(end_date)
+    elif start_date:
+        last = timezone.localdate()
+    return first, last
+
+
+def _rollups_in(first: Optional[date] = None, last: Optional[date] = None):
+    """DailyRollup rows in a day range (bounds inclusive, None = open)"""
+    qs = DailyRollup.objects.filter(count__gt=0)
+    if first:
+        qs = qs.filter(day__gte=first)
+    if last:
+        qs = qs.filter(day__lte=last)
+    return qs
+
+
+def _sum_by_type(transaction_type: str, field: str = 'total'):
+    return Sum(field, filter=Q(transaction_type=transaction_type))
+
+
+def _sums_by_type(field: str = 'total') -> Dict:
+    """Conditional Sum(field) for each transaction type, keyed by type"""
+    return {value: _sum_by_type(value, field) for value, _ in Transaction.TYPE_CHOICES}
+
+
+@router.get("/summary", response=SummaryCard, summary="Get financial summary")
+@ledger_cached()
+def get_summary(request, start_date: str = None, end_date: str = None):
+    """
+    Get total income, expense, balance, debt breakdown and transaction count.
+
+    Cached per ledger version; a miss costs exactly two queries: one
+    conditional aggregate for all six types + count
+    (over DailyRollup, or over raw transactions when a bound has a time of
+    day) and one aggregate over wallets.
+    Amounts stay Decimal until the response is serialized.
+    """
+    period = _period_days(start_date, end_date)
+    if period is not None:
+        totals = _rollups_in(*period).aggregate(**_sums_by_type('total'), count=Sum('count'))
     else:
-         # If start provided but no end, default to now
-         tx_qs = tx_qs.filter(date__lte=timezone.now())
+        tx_qs = _filter_by_period(Transaction.objects.all(), start_date, end_date)
+        totals = tx_qs.aggregate(**_sums_by_type('amount'), count=Count('id'))
+    amounts = {key: value or Decimal(0) for key, value in totals.items() if key != 'count'}
 
-    # Calculate totals
-    income = tx_qs.filter(transaction_type='income').aggregate(Sum('amount'))['amount__sum'] or 0
-    expense = tx_qs.filter(transaction_type='expense').aggregate(Sum('amount'))['amount__sum'] or 0
-    count = tx_qs.count()
-    
     # Tính tổng số dư từ các ví
-    wallets = Wallet.objects.all()
-    current_balance = sum(float(w.balance) for w in wallets)
-    available_balance = sum(float(w.balance) for w in wallets if not w.exclude_from_total)
-    
-    result = {
-        "total_income": float(income),
-        "total_expense": float(expense),
-        "balance": float(income - expense),
-        "transaction_count": count,
-        "current_balance": current_balance,
-        "available_balance": available_balance,
+    balances = Wallet.objects.aggregate(
+        current=Sum('balance'),
+        available=Sum('balance', filter=Q(exclude_from_total=False)),
+    )
+
+    return {
+        "total_income": amounts['income'],
+        "total_expense": amounts['expense'],
+        "balance": amounts['income'] - amounts['expense'],
+        "transaction_count": totals['count'] or 0,
+        "current_balance": balances['current'] or Decimal(0),
+        "available_balance": balances['available'] or Decimal(0),
+        "total_debt_loan": amounts['debt_loan'],
+        "total_debt_borrow": amounts['debt_borrow'],
+        "total_debt_collect": amounts['debt_collect'],
+        "total_debt_repay": amounts['debt_repay'],
+        "outstanding_receivable": amounts['debt_loan'] - amounts['debt_collect'],
+        "outstanding_payable": amounts['debt_borrow'] - amounts['debt_repay'],
     }
-    
-    
-    # Return result directly
-    # cache.set(cache_key, result, 300)
-    
-    return result
 
 
 @router.get("/category-breakdown", response=List[CategoryBreakdown], summary="Get category breakdown for pie chart")
+@ledger_cached()
 def get_category_breakdown(request, start_date: str = None, end_date: str = None):
     """
     Get spending breakdown by category for pie chart
     """
-    # Base Query
-    tx_qs = Transaction.objects.filter(
-        transaction_type='expense',
-        category__isnull=False
-    )
-    
-    # Apply date filters ONLY if provided
-    if start_date:
-        start = datetime.fromisoformat(start_date)
-        tx_qs = tx_qs.filter(date__gte=start)
-    
-    if end_date:
-        end = datetime.fromisoformat(end_date)
-        tx_qs = tx_qs.filter(date__lte=end)
-    elif not start_date:
-         # If neither provided (default view), do NOT filter by date => All Time
-         pass
+    period = _period_days(start_date, end_date)
+    if period is not None:
+        qs = _rollups_in(*period).filter(transaction_type='expense', category__isnull=False)
+        amount_field = 'total'
     else:
-         # If start provided but no end, default to now
-         tx_qs = tx_qs.filter(date__lte=timezone.now())
+        qs = _filter_by_period(
+            Transaction.objects.filter(transaction_type='expense', category__isnull=False),
+            start_date, end_date
+        )
+        amount_field = 'amount'
 
     # Aggregate by category
-    transactions = tx_qs.values('category__name').annotate(
-        total=Sum('amount')
-    ).order_by('-total')
+    transactions = list(qs.values('category__name').annotate(
+        total=Sum(amount_field)
+    ).order_by('-total'))
     
     total_expense = sum(t['total'] for t in transactions)
     
@@ -128,107 +207,132 @@ def get_category_breakdown(request, start_date: str = None, end_date: str = None
         }
         for t in transactions
     ]
-    
-    
-    # Return result directly
-    # cache.set(cache_key, result, 300)
+
     return result
 
 
+MAX_COMPARISON_MONTHS = 120  # 10 years
+
+
 @router.get("/monthly-comparison", response=List[MonthlyComparison], summary="Get monthly comparison for bar chart")
-def get_monthly_comparison(request, months: int = 6):
+@ledger_cached()
+def get_monthly_comparison(request, months: int = 6, fill_gaps: bool = False):
     """
-    Get income/expense comparison for last N months.
-    Only returns months that have at least one transaction.
+    Get income/expense comparison for the last N calendar months
+    (current month included), bucketed in the local timezone.
+
+    One TruncMonth + conditional-aggregate query over DailyRollup
+    regardless of `months`.
+
+    Args:
+        months: Number of calendar months to cover (at most MAX_COMPARISON_MONTHS)
+        fill_gaps: Also return months without transactions (zeros);
+                   by default only months with at least one transaction
     """
-    
-    # No caching for real-time updates
-    
+    if months > MAX_COMPARISON_MONTHS:
+        return JsonResponse({"error": f"months must be at most {MAX_COMPARISON_MONTHS}"}, status=400)
+    months = max(months, 1)
+    now = timezone.localtime()
+    current_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    first_month = current_month - relativedelta(months=months - 1)
+
+    # Rollup days are already local calendar days
+    rows = _rollups_in(first_month.date(), now.date()).annotate(
+        month=TruncMonth('day')
+    ).values('month').annotate(
+        income=_sum_by_type('income'),
+        expense=_sum_by_type('expense'),
+    ).order_by('month')
+    totals = {row['month'].strftime("%Y-%m"): row for row in rows}
+
     result = []
-    now = timezone.now()
-    
-    for i in range(months - 1, -1, -1):
-        month_start = (now - timedelta(days=30 * i)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        if i == 0:
-            month_end = now
-        else:
-            month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-        
-        # Check if there are any transactions in this month
-        has_transactions = Transaction.objects.filter(
-            date__gte=month_start,
-            date__lte=month_end
-        ).exists()
-        
-        if not has_transactions:
+    for i in range(months):
+        month = (first_month + relativedelta(months=i)).strftime("%Y-%m")
+        row = totals.get(month)
+        if row is None and not fill_gaps:
             continue  # Skip months with no transactions
-        
-        income = Transaction.objects.filter(
-            transaction_type='income',
-            date__gte=month_start,
-            date__lte=month_end
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        expense = Transaction.objects.filter(
-            transaction_type='expense',
-            date__gte=month_start,
-            date__lte=month_end
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-        
+
+        income = (row and row['income']) or Decimal(0)
+        expense = (row and row['expense']) or Decimal(0)
         result.append({
-            "month": month_start.strftime("%Y-%m"),
-            "income": float(income),
-            "expense": float(expense),
-            "balance": float(income - expense),
+            "month": month,
+            "income": income,
+            "expense": expense,
+            "balance": income - expense,
         })
-    
-    
-    # Return result directly
-    # cache.set(cache_key, result, 300)
+
     return result
 
 
 @router.get("/trends", summary="Get spending trends for line chart")
+@ledger_cached()
 def get_trends(request, days: int = 30):
     """
-    Get daily spending trends for line chart
+    Get daily spending trends for line chart (last `days` days up to today,
+    local calendar days)
     """
-    
-    # No caching for real-time updates
-    
-    end_date = timezone.now()
-    start_date = end_date - timedelta(days=days)
-    
+    today = timezone.localdate()
+
     # Aggregate by date
-    transactions = Transaction.objects.filter(
-        date__gte=start_date,
-        date__lte=end_date
-    ).extra(
-        select={'day': "DATE(date)"}
-    ).values('day', 'transaction_type').annotate(
-        total=Sum('amount')
-    )
-    
-    # Group by date
-    daily_data = {}
-    for t in transactions:
-        day = t['day'].strftime('%Y-%m-%d')
-        if day not in daily_data:
-            daily_data[day] = {'income': 0, 'expense': 0}
-        daily_data[day][t['transaction_type']] = float(t['total'])
-    
-    result = [
+    rows = _rollups_in(today - timedelta(days=days), today).values('day').annotate(
+        income=_sum_by_type('income'),
+        expense=_sum_by_type('expense'),
+    ).order_by('day')
+
+    result = []
+    for row in rows:
+        income = float(row['income'] or 0)
+        expense = float(row['expense'] or 0)
+        result.append({
+            "date": row['day'].strftime('%Y-%m-%d'),
+            "income": income,
+            "expense": expense,
+            "balance": income - expense,
+        })
+
+    return result
+
+
+@router.get("/anomalies", response=List[AnomalyOut], summary="Get detected spending anomalies")
+def get_anomalies(request, month: str = None):
+    """
+    Anomalies stored by the detect_spending_anomalies task for a month
+    (YYYY-MM, default: the latest month that has any)
+    """
+    rows = SpendingAnomaly.objects.select_related('category')
+    if month:
+        try:
+            first_day = datetime.strptime(month, '%Y-%m').date()
+        except ValueError:
+            return JsonResponse({"error": "month must be in YYYY-MM format"}, status=400)
+    else:
+        first_day = rows.order_by('-month').values_list('month', flat=True).first()
+    if first_day is None:
+        return []
+    return [
         {
-            "date": day,
-            "income": data['income'],
-            "expense": data['expense'],
-            "balance": data['income'] - data['expense'],
+            "month": a.month.strftime('%Y-%m'),
+            "category_id": a.category_id,
+            "category": a.category.name,
+            "current_total": float(a.current_total),
+            "baseline_mean": float(a.baseline_mean),
+            "baseline_median": float(a.baseline_median),
+            "z_score": a.z_score,
+            "robust_z": a.robust_z,
+            "increase_percentage": a.increase_percentage,
+            "threshold": a.threshold,
+            "window_months": a.window_months,
+            "message": a.message,
+            "detected_at": a.detected_at.isoformat(),
         }
-        for day, data in sorted(daily_data.items())
+        for a in rows.filter(month=first_day)
     ]
-    
-    
-    # Return result directly
-    # cache.set(cache_key, result, 300)
-    return result
 
+
+@router.get("/cache-stats", summary="Report cache statistics")
+def get_cache_stats(request):
+    """
+    Hit/miss counters of the ledger-versioned report cache
+    (dashboard, debts, wallet totals) for the worker serving this request.
+    """
+    return ledger_cache.stats()
@@ -6,6 +6,7 @@ from typing import Dict
 from pydantic import BaseModel
 from django.db.models import Sum, Q
 from ..models import Transaction
+from ..services.ledger_cache import ledger_cached
 
 router = Router(tags=["debts"])
 
@@ -20,6 +21,7 @@ class DebtSummary(BaseModel):
 
 
 @router.get("/summary", response=DebtSummary, summary="Get debt and loan summary")
+@ledger_cached()
 def get_debt_summary(request):
     """
     Calculate total debts and loans
@@ -53,6 +55,7 @@ def get_debt_summary(request):
 
 
 @router.get("", summary="List all debt/loan transactions")
+@ledger_cached()
 def list_debts(request, debt_type: str = "all"):
     """
     List debt and loan transactions
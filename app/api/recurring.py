@@ -5,7 +5,10 @@ from ninja import Router
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import date
+from django.http import JsonResponse
 from ..models import RecurringTransaction, Wallet, Category
+from ..services.ledger_cache import ledger_cached
+from ..services.projection_service import projection_service
 
 router = Router(tags=["recurring"])
 
@@ -61,6 +64,39 @@ def list_recurring_transactions(request):
     ]
 
 
+class WalletProjection(BaseModel):
+    wallet_id: int
+    name: str
+    exclude_from_total: bool
+    current_balance: float
+    end_balance: float
+    min_balance: float
+    min_date: str
+    balances: List[float]
+
+
+class ProjectionOut(BaseModel):
+    start_date: str
+    days: int
+    template_count: int
+    dates: List[str]
+    wallets: List[WalletProjection]
+    total: List[float]
+
+
+@router.get("/projection", response=ProjectionOut, summary="Project wallet balances from recurring transactions")
+@ledger_cached()
+def get_projection(request, days: int = 365):
+    """
+    Dự báo số dư cuối ngày của từng ví trong `days` ngày tới, từ số dư hiện
+    tại cộng các giao dịch định kỳ đang hoạt động. Cached under the ledger
+    version (bumped by transaction, wallet and template writes).
+    """
+    if not 1 <= days <= projection_service.MAX_DAYS:
+        return JsonResponse({"error": f"days must be between 1 and {projection_service.MAX_DAYS}"}, status=400)
+    return projection_service.project(days)
+
+
 @router.get("/{recurring_id}", response=RecurringTransactionOut, summary="Get recurring transaction by ID")
 def get_recurring_transaction(request, recurring_id: int):
     """Get a specific recurring transaction"""
@@ -95,6 +131,7 @@ def create_recurring_transaction(request, data: RecurringTransactionIn):
         amount=data.amount,
         frequency=data.frequency,
         next_run_date=data.next_run_date,
+        start_date=data.next_run_date,
         transaction_type=data.transaction_type,
         description=data.description,
     )
@@ -125,6 +162,9 @@ def update_recurring_transaction(request, recurring_id: int, data: RecurringTran
     recurring.category = Category.objects.get(id=data.category_id) if data.category_id else None
     recurring.amount = data.amount
     recurring.frequency = data.frequency
+    if data.next_run_date != recurring.next_run_date:
+        # Rescheduled: later occurrences are counted from the new date
+        recurring.start_date = data.next_run_date
     recurring.next_run_date = data.next_run_date
     recurring.transaction_type = data.transaction_type
     recurring.description = data.description
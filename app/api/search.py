@@ -4,9 +4,11 @@ Semantic Search API endpoints
 from ninja import Router
 from typing import List, Optional
 from pydantic import BaseModel
+from asgiref.sync import sync_to_async
 from django.core.cache import cache
 from ..qdrant_client import get_qdrant_service
 from ..services.embedding_service import embedding_service
+from ..services.vector_service import vector_service
 
 router = Router(tags=["search"])
 
@@ -33,24 +35,24 @@ class SearchResponse(BaseModel):
 
 
 @router.post("/semantic", response=SearchResponse, summary="Semantic Search")
-def semantic_search(request, data: SearchRequest):
+async def semantic_search(request, data: SearchRequest):
     """
     Search transactions using semantic similarity.
     Converts query to embedding and searches Qdrant.
     """
     # Check cache first
     cache_key = f"search:{hash(data.query)}:{data.limit}"
-    cached_result = cache.get(cache_key)
+    cached_result = await cache.aget(cache_key)
     if cached_result:
         return cached_result
     
     try:
         # Generate embedding for query
-        query_embedding = embedding_service.get_embedding(data.query)
+        query_embedding = await embedding_service.aget_embedding(data.query, as_array=True)
         
-        # Search Qdrant
+        # Search Qdrant (sync client, off the event loop)
         qdrant_service = get_qdrant_service()
-        results = qdrant_service.search(
+        results = await sync_to_async(qdrant_service.search, thread_sensitive=False)(
             query_vector=query_embedding,
             limit=data.limit,
             score_threshold=data.score_threshold
@@ -76,7 +78,7 @@ def semantic_search(request, data: SearchRequest):
         )
         
         # Cache result for 5 minutes
-        cache.set(cache_key, response.dict(), 300)
+        await cache.aset(cache_key, response.dict(), 300)
         
         return response
     except Exception as e:
@@ -87,3 +89,31 @@ def semantic_search(request, data: SearchRequest):
             total=0
         )
 
+
+
+class IndexStatusResponse(BaseModel):
+    pending: int
+    pending_upserts: int
+    pending_deletes: int
+    failed: int
+    oldest_enqueued_at: Optional[str]
+    lag_seconds: float
+    last_drain_at: Optional[str]
+
+
+@router.get("/index-status", response=IndexStatusResponse, summary="Vector index sync status")
+def index_status(request):
+    """
+    Backlog of the vector outbox: how many transaction changes are not yet
+    reflected in Qdrant and how far behind the index is.
+    """
+    return vector_service.get_index_status()
+
+
+@router.get("/embedding-cache-stats", summary="Embedding cache statistics")
+def embedding_cache_stats(request):
+    """
+    Hit/miss/eviction counters of the embedding cache tiers
+    (in-process LRU and Redis) for the worker that serves this request.
+    """
+    return embedding_service.cache_stats()
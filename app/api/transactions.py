@@ -6,10 +6,18 @@ from ninja.files import UploadedFile
 from typing import List, Optional, Dict
 from pydantic import BaseModel
 from datetime import datetime
+import base64
+import json
+from asgiref.sync import sync_to_async
+from django.db import transaction as db_transaction
+from django.db.models import F, Q
+from django.http import JsonResponse, StreamingHttpResponse
 from ..models import Transaction, Wallet, Category
 from ..services.nlp_service import nlp_service
 from ..services.ocr_service import ocr_service
 from ..services.budget_service import budget_service
+from ..services.import_service import import_service
+from ..services.export_service import ExportFormatError, export_service
 from datetime import datetime as dt
 
 router = Router(tags=["transactions"])
@@ -42,24 +50,48 @@ class TransactionOut(BaseModel):
         from_attributes = True
 
 
-@router.get("", response=List[TransactionOut], summary="List all transactions")
-def list_transactions(
-    request, 
-    limit: int = 50, 
-    offset: int = 0,
-    start_date: str = None,
-    end_date: str = None,
-    wallet_id: int = None,
-    transaction_type: str = None,
-    category_id: int = None
-):
+# Keyset order for cursor pagination; matches the transaction_keyset_idx index
+KEYSET_ORDERING = ('-date', '-created_at', '-id')
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def _encode_cursor(date: datetime, created_at: datetime, pk: int) -> str:
+    """Opaque cursor pointing just after the row with these keys in keyset order"""
+    raw = json.dumps([date.isoformat(), created_at.isoformat(), pk])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor: str):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date_str, created_str, pk = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return dt.fromisoformat(date_str), dt.fromisoformat(created_str), int(pk)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}")
+
+
+def _after_cursor(qs, cursor: str):
     """
-    Get all transactions with filtering and pagination.
-    Dates should be in ISO format (YYYY-MM-DD).
+    Rows strictly after the cursor in (-date, -created_at, -id) order.
+    The leading date__lte bound lets the database start the index scan
+    at the cursor instead of skipping rows.
     """
-    qs = Transaction.objects.select_related('wallet', 'category').all()
-    
-    # Apply Filters
+    date, created_at, pk = _decode_cursor(cursor)
+    return qs.filter(
+        Q(date__lte=date) & (
+            Q(date__lt=date) |
+            Q(date=date, created_at__lt=created_at) |
+            Q(date=date, created_at=created_at, id__lt=pk)
+        )
+    )
+
+
+def _filter_transactions(qs, start_date: str = None, end_date: str = None, wallet_id: int = None,
+                         transaction_type: str = None, category_id: int = None):
+    """Apply the list filters shared by the transaction list endpoints"""
     if start_date:
         qs = qs.filter(date__gte=start_date)
     if end_date:
@@ -78,36 +110,41 @@ def list_transactions(
         
     if category_id:
         qs = qs.filter(category_id=category_id)
-        
-    transactions = qs[offset:offset+limit]
-    
-    return [
-        {
-            "id": t.id,
-            "wallet_id": t.wallet.id,
-            "wallet_name": t.wallet.name,
-            "category_id": t.category.id if t.category else None,
-            "category_name": t.category.name if t.category else None,
-            "amount": str(t.amount),
-            "description": t.description,
-            "transaction_type": t.transaction_type,
-            "contact_person": t.contact_person,
-            "date": t.date.isoformat(),
-            "created_at": t.created_at.isoformat(),
-        }
-        for t in transactions
-    ]
+    return qs
 
 
-@router.get("/{transaction_id}", response=TransactionOut, summary="Get transaction by ID")
-def get_transaction(request, transaction_id: int):
-    """Get a specific transaction"""
-    transaction = Transaction.objects.select_related('wallet', 'category').get(id=transaction_id)
+# Columns of TransactionOut; related names are joined in SQL
+TRANSACTION_VALUE_FIELDS = (
+    'id', 'wallet_id', 'category_id', 'amount', 'description',
+    'transaction_type', 'contact_person', 'date', 'created_at',
+)
+
+
+def _transaction_rows(qs):
+    """Select only what TransactionOut needs, as dicts instead of model instances"""
+    return qs.values(
+        *TRANSACTION_VALUE_FIELDS,
+        wallet_name=F('wallet__name'),
+        category_name=F('category__name'),
+    )
+
+
+def _serialize_rows(rows: List[Dict]) -> List[Dict]:
+    """Format values() rows into TransactionOut dicts in place, in one pass"""
+    for row in rows:
+        row['amount'] = str(row['amount'])
+        row['date'] = row['date'].isoformat()
+        row['created_at'] = row['created_at'].isoformat()
+    return rows
+
+
+def _serialize_transaction(transaction: Transaction) -> Dict:
+    """TransactionOut dict for a model instance (single-object endpoints)"""
     return {
         "id": transaction.id,
-        "wallet_id": transaction.wallet.id,
+        "wallet_id": transaction.wallet_id,
         "wallet_name": transaction.wallet.name,
-        "category_id": transaction.category.id if transaction.category else None,
+        "category_id": transaction.category_id,
         "category_name": transaction.category.name if transaction.category else None,
         "amount": str(transaction.amount),
         "description": transaction.description,
@@ -118,6 +155,135 @@ def get_transaction(request, transaction_id: int):
     }
 
 
+@router.get("", response=List[TransactionOut], summary="List all transactions")
+def list_transactions(
+    request, 
+    limit: int = 50, 
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    start_date: str = None,
+    end_date: str = None,
+    wallet_id: int = None,
+    transaction_type: str = None,
+    category_id: int = None
+):
+    """
+    Get all transactions with filtering and pagination.
+    Dates should be in ISO format (YYYY-MM-DD).
+
+    Pagination modes:
+    - offset (default): `limit` + `offset`; cost grows with the offset.
+    - cursor: pass `cursor` (empty for the first page). The next page's
+      cursor is returned in the `X-Next-Cursor` header (absent on the last
+      page); every page costs the same at any depth.
+
+    Rows are read with values() and rendered straight to JSON: the dicts are
+    built to match TransactionOut, so response validation is skipped.
+    """
+    if limit < 1:
+        return JsonResponse({"error": "limit must be at least 1"}, status=400)
+
+    qs = _filter_transactions(
+        Transaction.objects.all(),
+        start_date, end_date, wallet_id, transaction_type, category_id
+    )
+    next_cursor = None
+
+    if cursor is None:
+        rows = list(_transaction_rows(qs)[offset:offset+limit])
+    else:
+        qs = qs.order_by(*KEYSET_ORDERING)
+        if cursor:
+            try:
+                qs = _after_cursor(qs, cursor)
+            except InvalidCursor as e:
+                return JsonResponse({"error": str(e)}, status=400)
+        # Fetch one extra row to know whether there is a next page
+        rows = list(_transaction_rows(qs)[:limit + 1])
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = _encode_cursor(last['date'], last['created_at'], last['id'])
+    
+    response = JsonResponse(_serialize_rows(rows), safe=False)
+    if next_cursor:
+        response['X-Next-Cursor'] = next_cursor
+    return response
+
+
+class BulkImportResponse(BaseModel):
+    created: int
+    skipped: int
+    errors: List[Dict]
+    elapsed_seconds: float
+    rows_per_second: float
+
+
+@router.post("/bulk", response=BulkImportResponse, summary="Bulk import transactions (CSV/JSON)")
+def bulk_import_transactions(
+    request,
+    file: UploadedFile = File(...),
+    format: Optional[str] = None,
+    chunk_size: int = 1000,
+    sync_vectors: bool = True
+):
+    """
+    Import many transactions from a CSV, JSON or NDJSON file.
+    Rows are inserted in chunks with one balance update per chunk, and the
+    embeddings are queued in the vector outbox and synced in batches by Celery.
+    Format is detected from the file extension unless given explicitly.
+    """
+    try:
+        fmt = import_service.check_format(format or import_service.detect_format(file.name))
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    rows = import_service.iter_rows(file.file, fmt)
+    try:
+        return import_service.import_rows(rows, chunk_size=max(1, chunk_size), sync_vectors=sync_vectors)
+    except ValueError as e:
+        # Unparseable file (e.g. malformed JSON array, not UTF-8)
+        return JsonResponse({"error": f"Invalid {fmt} input: {e}"}, status=400)
+
+
+@router.get("/export", summary="Export transactions (CSV/NDJSON/Parquet)")
+def export_transactions(
+    request,
+    format: str = "csv",
+    start_date: str = None,
+    end_date: str = None,
+    wallet_id: int = None,
+    transaction_type: str = None,
+    category_id: int = None
+):
+    """
+    Stream all transactions matching the list filters as a file download.
+    Formats: csv, ndjson, parquet (parquet needs pyarrow installed).
+    Rows are read through a server-side cursor and written in chunks, so
+    memory stays flat for any number of rows.
+    """
+    try:
+        fmt = export_service.check_format(format)
+    except ExportFormatError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    qs = _filter_transactions(
+        Transaction.objects.all(),
+        start_date, end_date, wallet_id, transaction_type, category_id
+    ).order_by(*KEYSET_ORDERING)
+
+    response = StreamingHttpResponse(export_service.stream(qs, fmt), content_type=export_service.content_type(fmt))
+    response['Content-Disposition'] = f'attachment; filename="{export_service.filename(fmt)}"'
+    return response
+
+
+@router.get("/{transaction_id}", response=TransactionOut, summary="Get transaction by ID")
+def get_transaction(request, transaction_id: int):
+    """Get a specific transaction"""
+    row = _transaction_rows(Transaction.objects.filter(id=transaction_id)).get()
+    return _serialize_rows([row])[0]
+
+
 @router.post("", response=TransactionOut, summary="Create new transaction")
 def create_transaction(request, data: TransactionIn):
     """Create a new transaction with budget checking"""
@@ -138,29 +304,19 @@ def create_transaction(request, data: TransactionIn):
         if budget_check.get("warning"):
             budget_warning = budget_check["warning"]
     
-    transaction = Transaction.objects.create(
-        wallet=wallet,
-        category=category,
-        amount=data.amount,
-        description=data.description,
-        transaction_type=data.transaction_type,
-        contact_person=data.contact_person,
-        date=data.date if data.date else None,
-    )
+    # Balance update and vector outbox row commit together with the transaction
+    with db_transaction.atomic():
+        transaction = Transaction.objects.create(
+            wallet=wallet,
+            category=category,
+            amount=data.amount,
+            description=data.description,
+            transaction_type=data.transaction_type,
+            contact_person=data.contact_person,
+            date=data.date if data.date else None,
+        )
     
-    response = {
-        "id": transaction.id,
-        "wallet_id": transaction.wallet.id,
-        "wallet_name": transaction.wallet.name,
-        "category_id": transaction.category.id if transaction.category else None,
-        "category_name": transaction.category.name if transaction.category else None,
-        "amount": str(transaction.amount),
-        "description": transaction.description,
-        "transaction_type": transaction.transaction_type,
-        "contact_person": transaction.contact_person,
-        "date": transaction.date.isoformat(),
-        "created_at": transaction.created_at.isoformat(),
-    }
+    response = _serialize_transaction(transaction)
     
     if budget_warning:
         response["budget_warning"] = budget_warning
@@ -180,21 +336,10 @@ def update_transaction(request, transaction_id: int, data: TransactionIn):
     transaction.contact_person = data.contact_person
     if data.date:
         transaction.date = data.date
-    transaction.save()
+    with db_transaction.atomic():
+        transaction.save()
     
-    return {
-        "id": transaction.id,
-        "wallet_id": transaction.wallet.id,
-        "wallet_name": transaction.wallet.name,
-        "category_id": transaction.category.id if transaction.category else None,
-        "category_name": transaction.category.name if transaction.category else None,
-        "amount": str(transaction.amount),
-        "description": transaction.description,
-        "transaction_type": transaction.transaction_type,
-        "contact_person": transaction.contact_person,
-        "date": transaction.date.isoformat(),
-        "created_at": transaction.created_at.isoformat(),
-    }
+    return _serialize_transaction(transaction)
 
 
 @router.delete("/{transaction_id}", summary="Delete transaction")
@@ -215,13 +360,13 @@ class QuickAddResponse(BaseModel):
 
 
 @router.post("/parse/quick-add", response=QuickAddResponse, summary="Quick Add by Text (NLP)")
-def quick_add_transactions(request, data: QuickAddRequest):
+async def quick_add_transactions(request, data: QuickAddRequest):
     """
     Parse natural language text and extract transaction information.
     Returns draft transactions for user confirmation.
     """
     # Parse text using NLP service
-    parsed_transactions = nlp_service.parse_transactions(data.text)
+    parsed_transactions = await nlp_service.aparse_transactions(data.text)
     
     if not parsed_transactions:
         return {
@@ -229,7 +374,16 @@ def quick_add_transactions(request, data: QuickAddRequest):
             "message": "Could not parse transactions from text. Please try again with clearer description."
         }
     
-    # Map to category IDs if categories exist
+    result_transactions = await sync_to_async(_map_parsed_transactions)(parsed_transactions)
+    
+    return {
+        "transactions": result_transactions,
+        "message": f"Found {len(result_transactions)} transaction(s). Please review and confirm."
+    }
+
+
+def _map_parsed_transactions(parsed_transactions: List[Dict]) -> List[Dict]:
+    """Map parsed drafts to category/wallet IDs, creating missing ones"""
     result_transactions = []
     for tx in parsed_transactions:
         # Find or create category
@@ -260,15 +414,11 @@ def quick_add_transactions(request, data: QuickAddRequest):
             "transaction_type": tx.get('type', 'expense'),
             "date": tx.get('date', datetime.now()).isoformat() if isinstance(tx.get('date'), datetime) else None,
         })
-    
-    return {
-        "transactions": result_transactions,
-        "message": f"Found {len(result_transactions)} transaction(s). Please review and confirm."
-    }
+    return result_transactions
 
 
 @router.post("/parse/receipt", summary="Upload Receipt (OCR)")
-def upload_receipt(request, file: UploadedFile = File(...)):
+async def upload_receipt(request, file: UploadedFile = File(...)):
     """
     Upload receipt image and extract transaction information using OCR.
     Returns extracted data for user confirmation.
@@ -277,7 +427,7 @@ def upload_receipt(request, file: UploadedFile = File(...)):
     image_data = file.read()
     
     # Process with OCR service
-    extracted = ocr_service.process_receipt(image_data, file.name)
+    extracted = await ocr_service.aprocess_receipt(image_data, file.name)
     
     if extracted.get('error'):
         return {
@@ -286,7 +436,17 @@ def upload_receipt(request, file: UploadedFile = File(...)):
             "data": None
         }
     
-    # Map to transaction format
+    result = await sync_to_async(_map_receipt)(extracted)
+    
+    return {
+        "success": True,
+        "data": result,
+        "message": "Receipt processed successfully. Please review and confirm."
+    }
+
+
+def _map_receipt(extracted: Dict) -> Dict:
+    """Map OCR output to transaction format with category/wallet IDs"""
     result = {
         "merchant": extracted.get('merchant'),
         "amount": extracted.get('amount'),
@@ -316,10 +476,5 @@ def upload_receipt(request, file: UploadedFile = File(...)):
     result['category_id'] = category_id
     result['wallet_id'] = wallet.id
     result['wallet_name'] = wallet.name
-    
-    return {
-        "success": True,
-        "data": result,
-        "message": "Receipt processed successfully. Please review and confirm."
-    }
+    return result
 
@@ -4,7 +4,12 @@ Wallet CRUD API endpoints
 from ninja import Router
 from typing import List, Optional
 from pydantic import BaseModel
+from datetime import date, timedelta
+from django.http import JsonResponse
+from django.utils import timezone
 from ..models import Wallet
+from ..services.balance_service import balance_service
+from ..services.ledger_cache import ledger_cached
 
 router = Router(tags=["wallets"])
 
@@ -19,6 +24,7 @@ class TotalBalanceOut(BaseModel):
 
 
 @router.get("/total-balance", response=TotalBalanceOut, summary="Get total balance of all wallets")
+@ledger_cached()
 def get_total_balance(request):
     """
     Lấy tổng số dư của tất cả các ví.
@@ -100,6 +106,39 @@ def get_wallet(request, wallet_id: int):
     return _serialize_wallet(wallet)
 
 
+class BalancePoint(BaseModel):
+    date: str
+    balance: float
+
+
+MAX_HISTORY_DAYS = 3660  # ~10 years of daily points
+
+
+@router.get("/{wallet_id}/balance-history", response=List[BalancePoint], summary="Get wallet balance history")
+@ledger_cached()
+def get_balance_history(request, wallet_id: int, start_date: date = None, end_date: date = None,
+                        interval: str = "day"):
+    """
+    Số dư cuối ngày của ví trong khoảng [start_date, end_date]
+    (mặc định: 30 ngày gần nhất). interval=month trả về số dư cuối mỗi tháng.
+    Computed from the nearest balance snapshot plus daily rollups, so the
+    cost grows with the number of days, not transactions.
+    """
+    if not Wallet.objects.filter(id=wallet_id).exists():
+        return JsonResponse({"error": "Wallet not found"}, status=404)
+    if interval not in balance_service.INTERVALS:
+        return JsonResponse({"error": f"interval must be one of: {', '.join(balance_service.INTERVALS)}"}, status=400)
+
+    end_date = end_date or timezone.localdate()
+    start_date = start_date or end_date - timedelta(days=29)
+    if start_date > end_date:
+        return JsonResponse({"error": "start_date must not be after end_date"}, status=400)
+    if (end_date - start_date).days >= MAX_HISTORY_DAYS:
+        return JsonResponse({"error": f"Range is limited to {MAX_HISTORY_DAYS} days"}, status=400)
+
+    return balance_service.history(wallet_id, start_date, end_date, interval)
+
+
 @router.post("", response=WalletOut, summary="Create new wallet")
 def create_wallet(request, data: WalletIn):
     """Create a new wallet"""
@@ -111,9 +150,11 @@ def create_wallet(request, data: WalletIn):
 def update_wallet(request, wallet_id: int, data: WalletIn):
     """Update an existing wallet"""
     wallet = Wallet.objects.get(id=wallet_id)
-    for key, value in data.dict().items():
+    fields = data.dict()
+    for key, value in fields.items():
         setattr(wallet, key, value)
-    wallet.save()
+    # Never write back the balance we read: it is maintained by atomic deltas
+    wallet.save(update_fields=[*fields, 'updated_at'])
     return _serialize_wallet(wallet)
 
 
@@ -0,0 +1,56 @@
+"""
+Management command to bulk import transactions from a CSV/JSON/NDJSON file
+Usage: python manage.py import_transactions history.csv [--format csv] [--chunk-size 1000]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from app.services.import_service import import_service
+
+
+class Command(BaseCommand):
+    help = 'Bulk import transactions from a CSV, JSON or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='File to import')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'json', 'ndjson'],
+            default=None,
+            help='Input format (default: detected from file extension)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=import_service.DEFAULT_CHUNK_SIZE,
+            help='Rows per bulk insert (default: 1000)',
+        )
+        parser.add_argument(
+            '--no-vectors',
+            action='store_true',
+            help='Do not enqueue embedding sync for imported rows',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or import_service.detect_format(path)
+
+        try:
+            with open(path, 'rb') as f:
+                stats = import_service.import_rows(
+                    import_service.iter_rows(f, fmt),
+                    chunk_size=max(1, options['chunk_size']),
+                    sync_vectors=not options['no_vectors'],
+                )
+        except OSError as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+        except ValueError as e:
+            raise CommandError(f"Invalid {fmt} input: {e}")
+
+        for error in stats['errors']:
+            self.stdout.write(self.style.WARNING(f"Row {error['row']}: {error['error']}"))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {stats['created']} transactions, skipped {stats['skipped']} "
+                f"in {stats['elapsed_seconds']:.2f}s ({stats['rows_per_second']:,.0f} rows/sec)"
+            )
+        )
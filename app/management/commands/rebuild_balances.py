@@ -0,0 +1,54 @@
+"""
+Management command to recompute wallet balances from all transactions
+Usage: python manage.py rebuild_balances [--dry-run] [--wallet ID ...]
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from app.models import Wallet
+from app.services.ledger_service import ledger_service
+
+
+class Command(BaseCommand):
+    help = 'Recompute wallet balances from the Transaction table (one grouped query, one bulk update)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show the differences without writing them',
+        )
+        parser.add_argument(
+            '--wallet',
+            type=int,
+            action='append',
+            dest='wallets',
+            metavar='ID',
+            help='Only rebuild this wallet (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        wallet_ids = options['wallets']
+        if wallet_ids:
+            missing = set(wallet_ids) - set(Wallet.objects.filter(pk__in=wallet_ids).values_list('pk', flat=True))
+            if missing:
+                raise CommandError(f"Wallet not found: {', '.join(map(str, sorted(missing)))}")
+
+        start = time.perf_counter()
+        changes = ledger_service.rebuild_balances(wallet_ids=wallet_ids, dry_run=options['dry_run'])
+        elapsed = time.perf_counter() - start
+
+        for change in changes:
+            diff = change.new_balance - change.old_balance
+            self.stdout.write(
+                f"{change.name} (ID: {change.wallet_id}): "
+                f"{change.old_balance:,.2f} -> {change.new_balance:,.2f} ({diff:+,.2f})"
+            )
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f"Dry run: {len(changes)} wallet balance(s) would change ({elapsed:.2f}s)"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Updated {len(changes)} wallet balance(s) in {elapsed:.2f}s"
+            ))
@@ -0,0 +1,27 @@
+"""
+Management command to rebuild the DailyRollup table from all transactions
+Usage: python manage.py rebuild_daily_rollups [--batch-size 1000]
+"""
+import time
+from django.core.management.base import BaseCommand
+from app.services.rollup_service import rollup_service
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily dashboard rollups from the Transaction table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=rollup_service.REBUILD_BATCH_SIZE,
+            help='Rollup rows per bulk insert (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        written = rollup_service.rebuild(batch_size=max(1, options['batch_size']))
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written} daily rollup rows in {elapsed:.2f}s"
+        ))
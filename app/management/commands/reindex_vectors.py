@@ -0,0 +1,38 @@
+"""
+Management command to queue every transaction for re-embedding in Qdrant
+Usage: python manage.py reindex_vectors [--batch-size 1000]
+
+Needed after the Qdrant payload gains fields (e.g. the numeric `timestamp`
+used by retrieval filters); the Celery outbox drain does the actual work.
+"""
+from django.core.management.base import BaseCommand
+from app.models import Transaction
+from app.services.vector_service import vector_service
+
+
+class Command(BaseCommand):
+    help = 'Queue all transactions for vector re-sync through the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Transactions queued per insert (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        ids = Transaction.objects.order_by('id').values_list('id', flat=True)
+        queued = 0
+        batch = []
+        for transaction_id in ids.iterator(chunk_size=batch_size):
+            batch.append(transaction_id)
+            if len(batch) >= batch_size:
+                vector_service.enqueue_sync_many(batch)
+                queued += len(batch)
+                batch = []
+        if batch:
+            vector_service.enqueue_sync_many(batch)
+            queued += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"Queued {queued} transactions for vector sync"))
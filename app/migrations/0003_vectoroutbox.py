@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:42
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0002_chatsession_chatmessage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VectorOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_id', models.BigIntegerField(unique=True, verbose_name='Transaction ID')),
+                ('operation', models.CharField(choices=[('upsert', 'Upsert'), ('delete', 'Delete')], default='upsert', max_length=10)),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('enqueued_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Time of the oldest unsynced change')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Vector Outbox',
+                'verbose_name_plural': 'Vector Outbox',
+                'ordering': ['enqueued_at'],
+                'indexes': [models.Index(fields=['enqueued_at'], name='app_vectoro_enqueue_3f3ffe_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def build_rollups(apps, schema_editor):
+    """Populate rollups for existing transactions (same as rebuild_daily_rollups)"""
+    Transaction = apps.get_model('app', 'Transaction')
+    DailyRollup = apps.get_model('app', 'DailyRollup')
+    rows = Transaction.objects.annotate(
+        day=TruncDate('date', tzinfo=timezone.get_current_timezone())
+    ).values('day', 'wallet_id', 'category_id', 'transaction_type').annotate(
+        total=Sum('amount'),
+        count=Count('id')
+    ).order_by()
+    DailyRollup.objects.bulk_create((DailyRollup(**row) for row in rows.iterator()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_vectoroutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='Ngày theo giờ địa phương (TIME_ZONE)', verbose_name='Ngày')),
+                ('transaction_type', models.CharField(choices=[('expense', 'Chi tiêu'), ('income', 'Thu nhập'), ('debt_loan', 'Cho vay'), ('debt_borrow', 'Đi vay'), ('debt_collect', 'Thu nợ'), ('debt_repay', 'Trả nợ')], max_length=20, verbose_name='Loại giao dịch')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=17, verbose_name='Tổng tiền')),
+                ('count', models.IntegerField(default=0, verbose_name='Số giao dịch')),
+                ('category', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='daily_rollups', to='app.category', verbose_name='Danh mục')),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='app.wallet', verbose_name='Ví')),
+            ],
+            options={
+                'verbose_name': 'Tổng hợp theo ngày',
+                'verbose_name_plural': 'Tổng hợp theo ngày',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['transaction_type', 'day'], name='app_dailyro_transac_02a895_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'wallet', 'category', 'transaction_type'), name='unique_daily_rollup', nulls_distinct=False)],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
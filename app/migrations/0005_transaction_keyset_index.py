@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_dailyrollup'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='app_transac_date_3a8a98_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['-date', '-created_at', '-id'], name='transaction_keyset_idx'),
+        ),
+    ]
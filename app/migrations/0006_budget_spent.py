@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:06
+
+from django.db import migrations, models
+from django.db.models import DecimalField, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_spent(apps, schema_editor):
+    """Initialise the counters from existing transactions (same as reconcile_budget_spent)"""
+    Budget = apps.get_model('app', 'Budget')
+    Transaction = apps.get_model('app', 'Transaction')
+    for budget in Budget.objects.all():
+        spent = Transaction.objects.filter(
+            category_id=budget.category_id,
+            date__date__gte=budget.start_date,
+            date__date__lte=budget.end_date,
+            transaction_type__in=('expense', 'debt_repay'),
+        ).aggregate(total=Coalesce(Sum('amount'), Value(0), output_field=DecimalField()))['total']
+        Budget.objects.filter(pk=budget.pk).update(spent=spent)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_transaction_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='budget',
+            name='spent',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Bộ đếm chi tiêu, cập nhật theo delta khi giao dịch thay đổi', max_digits=17, verbose_name='Đã chi'),
+        ),
+        migrations.AddIndex(
+            model_name='budget',
+            index=models.Index(fields=['category', 'start_date', 'end_date'], name='budget_window_idx'),
+        ),
+        migrations.RunPython(fill_spent, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_budget_spent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='anomaly_threshold',
+            field=models.FloatField(blank=True, help_text='Robust z-score riêng cho danh mục này; để trống dùng ANOMALY_Z_THRESHOLD', null=True, verbose_name='Ngưỡng bất thường'),
+        ),
+        migrations.CreateModel(
+            name='SpendingAnomaly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='Ngày đầu tháng', verbose_name='Tháng')),
+                ('current_total', models.DecimalField(decimal_places=2, max_digits=17, verbose_name='Chi tiêu tháng')),
+                ('baseline_mean', models.DecimalField(decimal_places=2, max_digits=17, verbose_name='Trung bình tháng')),
+                ('baseline_median', models.DecimalField(decimal_places=2, max_digits=17, verbose_name='Trung vị tháng')),
+                ('baseline_std', models.FloatField(verbose_name='Độ lệch chuẩn')),
+                ('baseline_mad', models.FloatField(verbose_name='MAD')),
+                ('z_score', models.FloatField(null=True, verbose_name='Z-score')),
+                ('robust_z', models.FloatField(null=True, verbose_name='Robust z-score')),
+                ('increase_percentage', models.FloatField(verbose_name='% tăng so với trung bình')),
+                ('threshold', models.FloatField(verbose_name='Ngưỡng áp dụng')),
+                ('window_months', models.PositiveSmallIntegerField(verbose_name='Số tháng so sánh')),
+                ('message', models.TextField(verbose_name='Thông báo')),
+                ('detected_at', models.DateTimeField(auto_now=True, verbose_name='Phát hiện lúc')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='anomalies', to='app.category', verbose_name='Danh mục')),
+            ],
+            options={
+                'verbose_name': 'Chi tiêu bất thường',
+                'verbose_name_plural': 'Chi tiêu bất thường',
+                'ordering': ['-month', '-increase_percentage'],
+                'constraints': [models.UniqueConstraint(fields=('month', 'category'), name='unique_spending_anomaly')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_spendinganomaly'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='Số dư tính đến hết ngày này (TIME_ZONE)', verbose_name='Ngày')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=17, verbose_name='Số dư')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='app.wallet', verbose_name='Ví')),
+            ],
+            options={
+                'verbose_name': 'Số dư ví theo ngày',
+                'verbose_name_plural': 'Số dư ví theo ngày',
+                'ordering': ['-day'],
+                'constraints': [models.UniqueConstraint(fields=('wallet', 'day'), name='unique_wallet_balance_snapshot')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_walletbalancesnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='occurrence_date',
+            field=models.DateField(blank=True, help_text='Ngày đến hạn của giao dịch định kỳ đã sinh ra giao dịch này', null=True, verbose_name='Kỳ định kỳ'),
+        ),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('occurrence_date__isnull', False), ('recurring_transaction__isnull', False)), fields=('recurring_transaction', 'occurrence_date'), name='unique_recurring_occurrence'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_transaction_occurrence_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recurringtransaction',
+            name='start_date',
+            field=models.DateField(blank=True, help_text='Kỳ đầu tiên; các kỳ sau được tính từ ngày này để ngày cuối tháng không bị trôi', null=True, verbose_name='Ngày bắt đầu'),
+        ),
+    ]
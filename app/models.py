@@ -72,6 +72,10 @@ class Category(models.Model):
     name = models.CharField(max_length=100, verbose_name="Tên danh mục")
     icon = models.CharField(max_length=50, blank=True, verbose_name="Icon", help_text="Icon name hoặc emoji")
     description = models.TextField(blank=True, verbose_name="Mô tả")
+    anomaly_threshold = models.FloatField(
+        null=True, blank=True, verbose_name="Ngưỡng bất thường",
+        help_text="Robust z-score riêng cho danh mục này; để trống dùng ANOMALY_Z_THRESHOLD"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -104,6 +108,12 @@ class RecurringTransaction(models.Model):
     amount = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Số tiền")
     frequency = models.CharField(max_length=20, choices=FREQUENCY_CHOICES, default='monthly', verbose_name="Tần suất")
     next_run_date = models.DateField(verbose_name="Ngày chạy tiếp theo")
+    start_date = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name="Ngày bắt đầu",
+        help_text="Kỳ đầu tiên; các kỳ sau được tính từ ngày này để ngày cuối tháng không bị trôi"
+    )
     is_active = models.BooleanField(default=True, verbose_name="Đang hoạt động")
     transaction_type = models.CharField(
         max_length=20, 
@@ -137,6 +147,11 @@ class Budget(models.Model):
     start_date = models.DateField(verbose_name="Ngày bắt đầu")
     end_date = models.DateField(verbose_name="Ngày kết thúc")
     is_active = models.BooleanField(default=True, verbose_name="Đang hoạt động")
+    spent = models.DecimalField(
+        max_digits=17, decimal_places=2, default=0, editable=False,
+        verbose_name="Đã chi",
+        help_text="Bộ đếm chi tiêu, cập nhật theo delta khi giao dịch thay đổi"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -144,17 +159,30 @@ class Budget(models.Model):
         verbose_name = "Ngân sách"
         verbose_name_plural = "Ngân sách"
         ordering = ['-created_at']
+        indexes = [
+            # Budgets covering a (category, day) pair, looked up on every transaction write
+            models.Index(fields=['category', 'start_date', 'end_date'], name='budget_window_idx'),
+        ]
     
     def __str__(self):
         return f"{self.category.name} - {self.amount:,.0f} VNĐ/{self.get_period_display()}"
     
+    SPEND_TYPES = ('expense', 'debt_repay')
+
     def get_spent_amount(self):
-        """Tính tổng đã chi tiêu trong period"""
+        """
+        Tính tổng đã chi tiêu trong period.
+
+        Dùng giá trị `spent_amount` đã annotate sẵn (BudgetService.with_spent)
+        nếu có, nếu không thì chạy một aggregate query.
+        """
+        if 'spent_amount' in self.__dict__:
+            return self.spent_amount
         return Transaction.objects.filter(
-            category=self.category,
-            date__gte=self.start_date,
-            date__lte=self.end_date,
-            transaction_type__in=['expense', 'debt_repay']
+            category_id=self.category_id,
+            date__date__gte=self.start_date,
+            date__date__lte=self.end_date,
+            transaction_type__in=self.SPEND_TYPES
         ).aggregate(Sum('amount'))['amount__sum'] or 0
     
     def get_remaining_amount(self):
@@ -222,6 +250,12 @@ class Transaction(models.Model):
         blank=True,
         verbose_name="Giao dịch định kỳ"
     )
+    occurrence_date = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name="Kỳ định kỳ",
+        help_text="Ngày đến hạn của giao dịch định kỳ đã sinh ra giao dịch này"
+    )
     
     date = models.DateTimeField(default=timezone.now, verbose_name="Ngày giao dịch")
     created_at = models.DateTimeField(auto_now_add=True)
@@ -233,13 +267,163 @@ class Transaction(models.Model):
         verbose_name_plural = "Giao dịch"
         ordering = ['-date', '-created_at']
         indexes = [
-            models.Index(fields=['-date']),
+            # Keyset pagination order (also serves plain -date lookups)
+            models.Index(fields=['-date', '-created_at', '-id'], name='transaction_keyset_idx'),
             models.Index(fields=['category', 'date']),
             models.Index(fields=['transaction_type', 'date']),
         ]
+        constraints = [
+            # A recurring template posts each occurrence at most once
+            models.UniqueConstraint(
+                fields=['recurring_transaction', 'occurrence_date'],
+                condition=models.Q(recurring_transaction__isnull=False, occurrence_date__isnull=False),
+                name='unique_recurring_occurrence',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.get_transaction_type_display()} - {self.amount:,.0f} VNĐ - {self.description[:50]}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Keep the loaded field values so signals can diff updates without re-querying"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+
+class DailyRollup(models.Model):
+    """
+    Tổng hợp giao dịch theo ngày: one row per (day, wallet, category, type)
+    holding the sum and count of those transactions. Maintained
+    incrementally by the ledger service on every transaction write;
+    `python manage.py rebuild_daily_rollups` recomputes it from scratch.
+    """
+    day = models.DateField(verbose_name="Ngày", help_text="Ngày theo giờ địa phương (TIME_ZONE)")
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='daily_rollups', verbose_name="Ví")
+    # No DB constraint: rows of a deleted category are merged into the
+    # "no category" row by a signal, mirroring SET_NULL on Transaction
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='daily_rollups',
+        verbose_name="Danh mục"
+    )
+    transaction_type = models.CharField(max_length=20, choices=Transaction.TYPE_CHOICES, verbose_name="Loại giao dịch")
+    total = models.DecimalField(max_digits=17, decimal_places=2, default=0, verbose_name="Tổng tiền")
+    count = models.IntegerField(default=0, verbose_name="Số giao dịch")
+    
+    class Meta:
+        verbose_name = "Tổng hợp theo ngày"
+        verbose_name_plural = "Tổng hợp theo ngày"
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'wallet', 'category', 'transaction_type'],
+                name='unique_daily_rollup',
+                nulls_distinct=False,
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['transaction_type', 'day']),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} {self.transaction_type}: {self.total:,.0f} ({self.count})"
+
+
+class WalletBalanceSnapshot(models.Model):
+    """
+    Số dư ví cuối ngày: balance of a wallet at the end of `day` (local time),
+    i.e. the signed sum of its transactions up to and including that day.
+    Written by the snapshot_wallet_balances task; transaction writes dated on
+    or before a snapshot shift it by the same delta (ledger service), so
+    snapshots stay exact when old transactions are edited.
+    """
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='balance_snapshots', verbose_name="Ví")
+    day = models.DateField(verbose_name="Ngày", help_text="Số dư tính đến hết ngày này (TIME_ZONE)")
+    balance = models.DecimalField(max_digits=17, decimal_places=2, verbose_name="Số dư")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Số dư ví theo ngày"
+        verbose_name_plural = "Số dư ví theo ngày"
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(fields=['wallet', 'day'], name='unique_wallet_balance_snapshot'),
+        ]
+    
+    def __str__(self):
+        return f"{self.wallet.name} {self.day}: {self.balance:,.0f}"
+
+
+class SpendingAnomaly(models.Model):
+    """
+    Chi tiêu bất thường: a category whose spending in `month` stands out
+    against its own trailing monthly totals. Written by the
+    detect_spending_anomalies task; one row per (month, category).
+    """
+    month = models.DateField(verbose_name="Tháng", help_text="Ngày đầu tháng")
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='anomalies', verbose_name="Danh mục")
+    current_total = models.DecimalField(max_digits=17, decimal_places=2, verbose_name="Chi tiêu tháng")
+    baseline_mean = models.DecimalField(max_digits=17, decimal_places=2, verbose_name="Trung bình tháng")
+    baseline_median = models.DecimalField(max_digits=17, decimal_places=2, verbose_name="Trung vị tháng")
+    baseline_std = models.FloatField(verbose_name="Độ lệch chuẩn")
+    baseline_mad = models.FloatField(verbose_name="MAD")
+    z_score = models.FloatField(null=True, verbose_name="Z-score")
+    robust_z = models.FloatField(null=True, verbose_name="Robust z-score")
+    increase_percentage = models.FloatField(verbose_name="% tăng so với trung bình")
+    threshold = models.FloatField(verbose_name="Ngưỡng áp dụng")
+    window_months = models.PositiveSmallIntegerField(verbose_name="Số tháng so sánh")
+    message = models.TextField(verbose_name="Thông báo")
+    detected_at = models.DateTimeField(auto_now=True, verbose_name="Phát hiện lúc")
+    
+    class Meta:
+        verbose_name = "Chi tiêu bất thường"
+        verbose_name_plural = "Chi tiêu bất thường"
+        ordering = ['-month', '-increase_percentage']
+        constraints = [
+            models.UniqueConstraint(fields=['month', 'category'], name='unique_spending_anomaly'),
+        ]
+    
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.category.name}: +{self.increase_percentage:.1f}%"
+
+
+class VectorOutbox(models.Model):
+    """
+    Pending vector operation for a transaction (transactional outbox).
+    Written in the same DB transaction as the Transaction change and drained
+    asynchronously by Celery. One row per transaction: repeated edits bump
+    `version` instead of queuing more work, and a delete replaces a pending upsert.
+    """
+    OPERATION_CHOICES = [
+        ('upsert', 'Upsert'),
+        ('delete', 'Delete'),
+    ]
+    
+    # Not a ForeignKey: delete operations must outlive the transaction row
+    transaction_id = models.BigIntegerField(unique=True, verbose_name="Transaction ID")
+    operation = models.CharField(max_length=10, choices=OPERATION_CHOICES, default='upsert')
+    version = models.PositiveIntegerField(default=1)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    enqueued_at = models.DateTimeField(default=timezone.now, help_text="Time of the oldest unsynced change")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Vector Outbox"
+        verbose_name_plural = "Vector Outbox"
+        ordering = ['enqueued_at']
+        indexes = [
+            models.Index(fields=['enqueued_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.operation} #{self.transaction_id} (v{self.version})"
 
 
 class ChatSession(models.Model):
@@ -2,10 +2,12 @@
 Qdrant Vector Database Client
 """
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client.models import (
+    Distance, FieldCondition, Filter, MatchValue, PointStruct, Range, VectorParams
+)
 from django.conf import settings
 import uuid
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 
 
 class QdrantService:
@@ -101,7 +103,9 @@ class QdrantService:
         self,
         query_vector: List[float],
         limit: int = 10,
-        score_threshold: Optional[float] = None
+        score_threshold: Optional[float] = None,
+        timestamp_range: Optional[Tuple[Optional[float], Optional[float]]] = None,
+        match: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """
         Search for similar vectors
@@ -110,14 +114,27 @@ class QdrantService:
             query_vector: Query embedding vector
             limit: Number of results to return
             score_threshold: Minimum similarity score (0-1)
+            timestamp_range: (gte, lte) bounds on the `timestamp` payload field
+                (epoch seconds); None on either side means unbounded
+            match: Exact payload matches, e.g. {"transaction_type": "expense"}
         
         Returns:
             List of search results with payload
         """
         try:
+            conditions = [
+                FieldCondition(key=key, match=MatchValue(value=value))
+                for key, value in (match or {}).items()
+                if value is not None
+            ]
+            if timestamp_range and any(bound is not None for bound in timestamp_range):
+                gte, lte = timestamp_range
+                conditions.append(FieldCondition(key="timestamp", range=Range(gte=gte, lte=lte)))
+            
             results = self.client.search(
                 collection_name=self.collection_name,
                 query_vector=query_vector,
+                query_filter=Filter(must=conditions) if conditions else None,
                 limit=limit,
                 score_threshold=score_threshold
             )
@@ -146,6 +163,18 @@ class QdrantService:
             print(f"Error deleting point from Qdrant: {e}")
             return False
     
+    def delete_points(self, point_ids: List[int]) -> bool:
+        """Delete multiple points from Qdrant in one request"""
+        try:
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=list(point_ids)
+            )
+            return True
+        except Exception as e:
+            print(f"Error batch deleting points from Qdrant: {e}")
+            return False
+    
     def get_collection_info(self) -> Dict[str, Any]:
         """Get collection information"""
         try:
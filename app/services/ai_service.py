@@ -2,12 +2,17 @@
 AI Service abstraction layer for Gemini and Ollama
 """
 import os
+import json
+import time
 import base64
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, AsyncIterator, Iterator, List
 from django.conf import settings
 from google import genai
+from asgiref.sync import sync_to_async
 from google.genai import types
-import requests
+from .http_clients import http_clients
+from .llm_cache import llm_cache
+from .retrieval_service import estimate_tokens
 
 
 class AIService:
@@ -36,17 +41,80 @@ class AIService:
         else:
             self.gemini_client = None
     
-    def generate_text(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+    @property
+    def model_id(self) -> str:
+        """Model that answers text prompts (part of the response cache key)"""
+        if self.use_ollama and self.ollama_url:
+            return "ollama:llama2"
+        return f"gemini:{self.gemini_model_name}"
+    
+    def generate_text(self, prompt: str, system_prompt: Optional[str] = None,
+                      cache_text: Optional[str] = None, cache_scope: str = "",
+                      semantic: bool = False, use_cache: bool = True) -> str:
         """
         Generate text using LLM (Gemini 3 Flash or Ollama)
         
+        Answers are cached (see LLMCache), keyed by model, system prompt and
+        prompt, so identical requests don't reach the model twice.
+        
         Args:
             prompt: User prompt
             system_prompt: Optional system prompt for context
+            cache_text: Identifies the request in the cache instead of the
+                        full prompt (e.g. the question, when the prompt
+                        embeds timestamps)
+            cache_scope: Extra cache key; a new value invalidates old answers
+            semantic: Also reuse answers of near-duplicate requests
+            use_cache: Set to False to always call the model
         
         Returns:
             Generated text response
         """
+        key_text = cache_text if cache_text is not None else prompt
+        if use_cache:
+            cached = llm_cache.lookup(self.model_id, system_prompt, key_text, cache_scope, semantic)
+            if cached is not None:
+                return cached
+        
+        start = time.perf_counter()
+        answer = self._generate(prompt, system_prompt)
+        if use_cache:
+            llm_cache.store(self.model_id, system_prompt, key_text, answer,
+                            estimate_tokens(f"{system_prompt or ''}{prompt}"),
+                            time.perf_counter() - start, cache_scope, semantic)
+        return answer
+    
+    def generate_text_stream(self, prompt: str, system_prompt: Optional[str] = None,
+                             cache_text: Optional[str] = None, cache_scope: str = "",
+                             semantic: bool = False, use_cache: bool = True) -> Iterator[str]:
+        """
+        Generate text using LLM, yielding chunks as the model produces them
+        
+        Args:
+            Same as generate_text
+        
+        Returns:
+            Iterator of text chunks (joined, they equal generate_text's answer).
+            A cached answer comes as a single chunk.
+        """
+        key_text = cache_text if cache_text is not None else prompt
+        if use_cache:
+            cached = llm_cache.lookup(self.model_id, system_prompt, key_text, cache_scope, semantic)
+            if cached is not None:
+                yield cached
+                return
+        
+        start = time.perf_counter()
+        chunks = []
+        for chunk in self._stream(prompt, system_prompt):
+            chunks.append(chunk)
+            yield chunk
+        if use_cache:
+            llm_cache.store(self.model_id, system_prompt, key_text, "".join(chunks),
+                            estimate_tokens(f"{system_prompt or ''}{prompt}"),
+                            time.perf_counter() - start, cache_scope, semantic)
+    
+    def _generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
         if self.use_ollama and self.ollama_url:
             return self._generate_with_ollama(prompt, system_prompt)
         elif self.gemini_client:
@@ -54,6 +122,14 @@ class AIService:
         else:
             raise Exception("No AI service available. Configure Gemini API key or Ollama URL.")
     
+    def _stream(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[str]:
+        if self.use_ollama and self.ollama_url:
+            return self._stream_with_ollama(prompt, system_prompt)
+        elif self.gemini_client:
+            return self._stream_with_gemini(prompt, system_prompt)
+        else:
+            raise Exception("No AI service available. Configure Gemini API key or Ollama URL.")
+    
     def analyze_image(self, image_data: bytes, prompt: str, mime_type: str = "image/jpeg") -> str:
         """
         Analyze image using Gemini 3 Flash (supports both text and vision)
@@ -110,6 +186,26 @@ class AIService:
         except Exception as e:
             raise Exception(f"Gemini API error: {e}")
     
+    def _stream_with_gemini(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[str]:
+        """Stream text using Gemini 3 Flash"""
+        full_prompt = prompt
+        if system_prompt:
+            full_prompt = f"{system_prompt}\n\n{prompt}"
+        
+        try:
+            for chunk in self.gemini_client.models.generate_content_stream(
+                model=self.gemini_model_name,
+                contents=[
+                    types.Content(
+                        parts=[types.Part(text=full_prompt)]
+                    )
+                ]
+            ):
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            raise Exception(f"Gemini API error: {e}")
+    
     def _analyze_image_with_gemini(self, image_data: bytes, prompt: str, mime_type: str) -> str:
         """Analyze image using Gemini 3 Flash"""
         try:
@@ -169,7 +265,7 @@ class AIService:
             full_prompt = f"{system_prompt}\n\n{prompt}"
         
         try:
-            response = requests.post(
+            response = http_clients.session().post(
                 f"{self.ollama_url}/api/generate",
                 json={
                     "model": "llama2",  # Default model, can be configured
@@ -183,6 +279,151 @@ class AIService:
             return result.get("response", "")
         except Exception as e:
             raise Exception(f"Ollama API error: {e}")
+    
+    def _stream_with_ollama(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[str]:
+        """Stream text using Ollama (one JSON object per line)"""
+        full_prompt = prompt
+        if system_prompt:
+            full_prompt = f"{system_prompt}\n\n{prompt}"
+        
+        try:
+            with http_clients.session().post(
+                f"{self.ollama_url}/api/generate",
+                json={
+                    "model": "llama2",  # Default model, can be configured
+                    "prompt": full_prompt,
+                    "stream": True
+                },
+                stream=True,
+                timeout=30  # Between chunks, not for the whole answer
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise Exception(chunk["error"])
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        break
+        except Exception as e:
+            raise Exception(f"Ollama API error: {e}")
+
+    
+    # Async variants (ASGI views): same behaviour, without holding a thread
+    # while the model generates
+    
+    async def agenerate_text(self, prompt: str, system_prompt: Optional[str] = None,
+                             cache_text: Optional[str] = None, cache_scope: str = "",
+                             semantic: bool = False, use_cache: bool = True) -> str:
+        """Async version of generate_text (same cache)"""
+        key_text = cache_text if cache_text is not None else prompt
+        if use_cache:
+            cached = await sync_to_async(llm_cache.lookup)(self.model_id, system_prompt, key_text, cache_scope, semantic)
+            if cached is not None:
+                return cached
+        
+        start = time.perf_counter()
+        chunks = [chunk async for chunk in self._astream(prompt, system_prompt)]
+        answer = "".join(chunks)
+        if use_cache:
+            await sync_to_async(llm_cache.store)(self.model_id, system_prompt, key_text, answer,
+                                                 estimate_tokens(f"{system_prompt or ''}{prompt}"),
+                                                 time.perf_counter() - start, cache_scope, semantic)
+        return answer
+    
+    async def agenerate_text_stream(self, prompt: str, system_prompt: Optional[str] = None,
+                                    cache_text: Optional[str] = None, cache_scope: str = "",
+                                    semantic: bool = False, use_cache: bool = True) -> AsyncIterator[str]:
+        """Async version of generate_text_stream (same cache)"""
+        key_text = cache_text if cache_text is not None else prompt
+        if use_cache:
+            cached = await sync_to_async(llm_cache.lookup)(self.model_id, system_prompt, key_text, cache_scope, semantic)
+            if cached is not None:
+                yield cached
+                return
+        
+        start = time.perf_counter()
+        chunks = []
+        async for chunk in self._astream(prompt, system_prompt):
+            chunks.append(chunk)
+            yield chunk
+        if use_cache:
+            await sync_to_async(llm_cache.store)(self.model_id, system_prompt, key_text, "".join(chunks),
+                                                 estimate_tokens(f"{system_prompt or ''}{prompt}"),
+                                                 time.perf_counter() - start, cache_scope, semantic)
+    
+    async def _astream(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        if self.use_ollama and self.ollama_url:
+            async for chunk in self._astream_with_ollama(prompt, system_prompt):
+                yield chunk
+        elif self.gemini_client:
+            full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
+            try:
+                stream = await self.gemini_client.aio.models.generate_content_stream(
+                    model=self.gemini_model_name,
+                    contents=[types.Content(parts=[types.Part(text=full_prompt)])]
+                )
+                async for chunk in stream:
+                    if chunk.text:
+                        yield chunk.text
+            except Exception as e:
+                raise Exception(f"Gemini API error: {e}")
+        else:
+            raise Exception("No AI service available. Configure Gemini API key or Ollama URL.")
+    
+    async def aanalyze_image(self, image_data: bytes, prompt: str, mime_type: str = "image/jpeg") -> str:
+        """Async version of analyze_image"""
+        if not self.gemini_client:
+            raise Exception("Vision API not available. Gemini requires API key.")
+        try:
+            response = await self.gemini_client.aio.models.generate_content(
+                model=self.gemini_model_name,
+                contents=[
+                    types.Content(
+                        parts=[
+                            types.Part(text=prompt),
+                            types.Part(inline_data=types.Blob(mime_type=mime_type, data=image_data))
+                        ]
+                    )
+                ]
+            )
+            return response.text
+        except Exception as e:
+            raise Exception(f"Gemini Vision API error: {e}")
+    
+    async def _astream_with_ollama(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream text from Ollama over the pooled async client"""
+        full_prompt = prompt
+        if system_prompt:
+            full_prompt = f"{system_prompt}\n\n{prompt}"
+        
+        try:
+            async with http_clients.async_client().stream(
+                "POST",
+                f"{self.ollama_url}/api/generate",
+                json={
+                    "model": "llama2",  # Default model, can be configured
+                    "prompt": full_prompt,
+                    "stream": True
+                },
+                timeout=30  # Between chunks, not for the whole answer
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise Exception(chunk["error"])
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        break
+        except Exception as e:
+            raise Exception(f"Ollama API error: {e}")
 
 
 # Singleton instance
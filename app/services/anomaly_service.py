@@ -1,77 +1,180 @@
 """
 Anomaly detection service for spending patterns
 """
-from typing import List, Dict
-from datetime import datetime, timedelta
-from django.db.models import Sum, Avg
+from typing import Dict, List, Optional, Tuple
+from datetime import date
+from decimal import Decimal
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
 from django.utils import timezone
-from ..models import Transaction, Category
+from ..models import DailyRollup, SpendingAnomaly
 
 
 class AnomalyService:
     """
-    Service for detecting anomalies in spending patterns
+    Service for detecting anomalies in spending patterns.
+
+    One grouped query over the daily rollups yields a (category x month)
+    matrix of expense totals for the trailing window plus the current month.
+    Baselines (mean, std, median, MAD) and z-scores are then computed with
+    NumPy for every category at once, so the cost does not grow with the
+    number of categories.
     """
-    
-    ANOMALY_THRESHOLD = 0.4  # 40% increase is considered anomaly
-    
-    def detect_anomalies(self) -> List[Dict]:
+
+    ANOMALY_THRESHOLD = 0.4  # At least 40% above the monthly average
+    MAD_SCALE = 0.6745  # Makes MAD comparable to a standard deviation for normal data
+
+    def __init__(self):
+        self.window_months = getattr(settings, 'ANOMALY_WINDOW_MONTHS', 6)
+        self.z_threshold = getattr(settings, 'ANOMALY_Z_THRESHOLD', 3.5)
+        self.min_increase = getattr(settings, 'ANOMALY_MIN_INCREASE', self.ANOMALY_THRESHOLD)
+
+    def monthly_matrix(self, window_months: int, as_of: date) -> Tuple[List[Dict], List[date], np.ndarray]:
         """
-        Detect spending anomalies by comparing current month with 3-month average
-        
+        Expense totals per category and month, in one query
+
+        Args:
+            window_months: Number of full months before the current one
+            as_of: Last day included (the current month runs up to it)
+
+        Returns:
+            (categories, months, matrix) where categories[i] has id, name and
+            anomaly_threshold, and matrix[i, j] is the total of category i in
+            months[j]; the last column is the current month
+        """
+        current_month = as_of.replace(day=1)
+        months = [current_month - relativedelta(months=window_months - i) for i in range(window_months + 1)]
+        rows = DailyRollup.objects.filter(
+            transaction_type='expense',
+            category__isnull=False,
+            day__gte=months[0],
+            day__lte=as_of
+        ).annotate(
+            month=TruncMonth('day')
+        ).values(
+            'category_id', 'category__name', 'category__anomaly_threshold', 'month'
+        ).annotate(
+            total=Sum('total')
+        ).order_by()
+
+        categories: Dict[int, Dict] = {}
+        cells = []
+        for row in rows:
+            category = categories.setdefault(row['category_id'], {
+                'id': row['category_id'],
+                'name': row['category__name'],
+                'anomaly_threshold': row['category__anomaly_threshold'],
+                'index': len(categories),
+            })
+            cells.append((category['index'], row['month'], row['total']))
+
+        column = {month: j for j, month in enumerate(months)}
+        matrix = np.zeros((len(categories), len(months)))
+        for i, month, total in cells:
+            matrix[i, column[month]] = float(total)
+        return list(categories.values()), months, matrix
+
+    def detect_anomalies(self, window_months: Optional[int] = None, as_of: Optional[date] = None) -> List[Dict]:
+        """
+        Detect categories whose spending this month stands out against their
+        average monthly total over the previous `window_months` months.
+
+        A category is flagged when it is at least `min_increase` above its
+        monthly mean AND its robust z-score (median/MAD) reaches its
+        threshold (Category.anomaly_threshold, or ANOMALY_Z_THRESHOLD). When
+        MAD is 0 the classic z-score is used instead, and when the baseline
+        has no spread at all the increase alone decides.
+
+        Args:
+            window_months: Baseline months (default: ANOMALY_WINDOW_MONTHS)
+            as_of: Day to evaluate (default: today)
+
         Returns:
-            List of anomaly dictionaries
+            List of anomaly dictionaries, largest increase first
         """
-        now = timezone.now()
-        current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        # Get last 3 months (excluding current month)
+        window_months = max(1, window_months or self.window_months)
+        as_of = as_of or timezone.localdate()
+        categories, months, matrix = self.monthly_matrix(window_months, as_of)
+        if not categories:
+            return []
+
+        baseline, current = matrix[:, :-1], matrix[:, -1]
+        mean = baseline.mean(axis=1)
+        std = baseline.std(axis=1, ddof=1) if window_months > 1 else np.zeros(len(categories))
+        median = np.median(baseline, axis=1)
+        mad = np.median(np.abs(baseline - median[:, None]), axis=1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_score = np.where(std > 0, (current - mean) / std, np.nan)
+            robust_z = np.where(mad > 0, self.MAD_SCALE * (current - median) / mad, np.nan)
+            increase = np.where(mean > 0, (current - mean) / mean, np.nan)
+
+        score = np.where(np.isnan(robust_z), z_score, robust_z)
+        thresholds = np.array([
+            category['anomaly_threshold'] if category['anomaly_threshold'] is not None else self.z_threshold
+            for category in categories
+        ])
+        flagged = (mean > 0) & (current > 0) & (increase >= self.min_increase) & (np.isnan(score) | (score >= thresholds))
+
         anomalies = []
-        
-        # Get all categories with expenses
-        categories = Category.objects.filter(
-            transaction__transaction_type='expense'
-        ).distinct()
-        
-        for category in categories:
-            # Calculate 3-month average (months 1-3 before current)
-            month3_start = (current_month_start - timedelta(days=90)).replace(day=1)
-            month3_end = current_month_start - timedelta(days=1)
-            
-            avg_expense = Transaction.objects.filter(
-                category=category,
-                transaction_type='expense',
-                date__gte=month3_start,
-                date__lte=month3_end
-            ).aggregate(Avg('amount'))['amount__avg'] or 0
-            
-            if avg_expense == 0:
-                continue
-            
-            # Calculate current month expense
-            current_expense = Transaction.objects.filter(
-                category=category,
-                transaction_type='expense',
-                date__gte=current_month_start,
-                date__lte=now
-            ).aggregate(Sum('amount'))['amount__sum'] or 0
-            
-            # Check for anomaly
-            if current_expense > 0:
-                increase = (current_expense - avg_expense) / avg_expense
-                
-                if increase >= self.ANOMALY_THRESHOLD:
-                    anomalies.append({
-                        'category': category.name,
-                        'current_month': float(current_expense),
-                        'average': float(avg_expense),
-                        'increase_percentage': increase * 100,
-                        'message': f"Tiền {category.name} tháng này tăng {increase * 100:.1f}% so với trung bình 3 tháng trước."
-                    })
-        
+        for i in np.flatnonzero(flagged):
+            name = categories[i]['name']
+            anomalies.append({
+                'category': name,
+                'category_id': categories[i]['id'],
+                'month': months[-1],
+                'current_month': float(current[i]),
+                'average': float(mean[i]),
+                'median': float(median[i]),
+                'std': float(std[i]),
+                'mad': float(mad[i]),
+                'z_score': None if np.isnan(z_score[i]) else float(z_score[i]),
+                'robust_z': None if np.isnan(robust_z[i]) else float(robust_z[i]),
+                'increase_percentage': float(increase[i] * 100),
+                'threshold': float(thresholds[i]),
+                'window_months': window_months,
+                'message': f"Tiền {name} tháng này tăng {increase[i] * 100:.1f}% so với trung bình {window_months} tháng trước.",
+            })
+        anomalies.sort(key=lambda anomaly: anomaly['increase_percentage'], reverse=True)
         return anomalies
 
+    def save_anomalies(self, anomalies: List[Dict], month: date) -> int:
+        """
+        Replace the stored anomalies of a month with a new detection run
+
+        Args:
+            anomalies: Output of detect_anomalies()
+            month: First day of the month they belong to
+
+        Returns:
+            Number of rows written
+        """
+        with db_transaction.atomic():
+            SpendingAnomaly.objects.filter(month=month).delete()
+            SpendingAnomaly.objects.bulk_create([
+                SpendingAnomaly(
+                    month=month,
+                    category_id=anomaly['category_id'],
+                    current_total=Decimal(f"{anomaly['current_month']:.2f}"),
+                    baseline_mean=Decimal(f"{anomaly['average']:.2f}"),
+                    baseline_median=Decimal(f"{anomaly['median']:.2f}"),
+                    baseline_std=anomaly['std'],
+                    baseline_mad=anomaly['mad'],
+                    z_score=anomaly['z_score'],
+                    robust_z=anomaly['robust_z'],
+                    increase_percentage=anomaly['increase_percentage'],
+                    threshold=anomaly['threshold'],
+                    window_months=anomaly['window_months'],
+                    message=anomaly['message'],
+                )
+                for anomaly in anomalies
+            ])
+        return len(anomalies)
+
 
 # Singleton instance
 anomaly_service = AnomalyService()
-
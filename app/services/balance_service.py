@@ -0,0 +1,171 @@
+"""
+Balance service - point-in-time wallet balances from snapshots and daily rollups
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.utils import timezone
+from ..models import DailyRollup, Wallet, WalletBalanceSnapshot
+from .ledger_service import INFLOW_TYPES, OUTFLOW_TYPES
+
+
+class BalanceService:
+    """
+    Service for answering "what was the balance of wallet X on day D".
+
+    The balance at the end of D is the nearest WalletBalanceSnapshot on or
+    before D plus the signed daily rollup totals after it, so the work is
+    bounded by the number of days since that snapshot, never by the number
+    of transactions. Snapshots are taken daily by a Celery beat task; daily
+    rows older than SNAPSHOT_DAILY_RETENTION_DAYS are thinned out to one per
+    month (the month's last day).
+    """
+
+    CATCHUP_DAYS = 31  # Missed days the snapshot task fills in per run
+    INTERVALS = ('day', 'month')
+
+    def __init__(self):
+        self.daily_retention_days = getattr(settings, 'SNAPSHOT_DAILY_RETENTION_DAYS', 400)
+
+    def _signed_total(self) -> Sum:
+        """Signed sum of rollup totals (inflows positive, outflows negative)"""
+        return Sum(
+            Case(
+                When(transaction_type__in=INFLOW_TYPES, then=F('total')),
+                When(transaction_type__in=OUTFLOW_TYPES, then=-F('total')),
+                default=Value(Decimal(0)),
+                output_field=DecimalField(max_digits=17, decimal_places=2),
+            )
+        )
+
+    def nearest_snapshot(self, wallet_id: int, day: date) -> Optional[Tuple[date, Decimal]]:
+        """(day, balance) of the latest snapshot on or before `day`"""
+        return WalletBalanceSnapshot.objects.filter(
+            wallet_id=wallet_id,
+            day__lte=day
+        ).order_by('-day').values_list('day', 'balance').first()
+
+    def balance_at(self, wallet_id: int, day: date) -> Decimal:
+        """
+        Balance of a wallet at the end of a local day
+
+        Args:
+            wallet_id: Wallet ID
+            day: Local calendar day
+
+        Returns:
+            Balance (nearest snapshot + delta of the days after it)
+        """
+        rollups = DailyRollup.objects.filter(wallet_id=wallet_id, day__lte=day)
+        balance = Decimal(0)
+        snapshot = self.nearest_snapshot(wallet_id, day)
+        if snapshot:
+            snapshot_day, balance = snapshot
+            rollups = rollups.filter(day__gt=snapshot_day)
+        delta = rollups.aggregate(delta=self._signed_total())['delta']
+        return balance + (delta or Decimal(0))
+
+    def daily_balances(self, wallet_id: int, start: date, end: date) -> List[Tuple[date, Decimal]]:
+        """
+        End-of-day balance for every day in [start, end], in three queries
+
+        Returns:
+            List of (day, balance), oldest first
+        """
+        if start > end:
+            return []
+        balance = self.balance_at(wallet_id, start - timedelta(days=1))
+        rows = DailyRollup.objects.filter(
+            wallet_id=wallet_id,
+            day__gte=start,
+            day__lte=end
+        ).values('day').annotate(delta=self._signed_total()).order_by()
+        deltas: Dict[date, Decimal] = {row['day']: row['delta'] or Decimal(0) for row in rows}
+
+        points = []
+        day = start
+        while day <= end:
+            balance += deltas.get(day, Decimal(0))
+            points.append((day, balance))
+            day += timedelta(days=1)
+        return points
+
+    def history(self, wallet_id: int, start: date, end: date, interval: str = 'day') -> List[Dict]:
+        """
+        Balance time series for charts
+
+        Args:
+            wallet_id: Wallet ID
+            start: First day
+            end: Last day
+            interval: 'day' (every day) or 'month' (last day of each month, plus `end`)
+
+        Returns:
+            List of {"date", "balance"} dictionaries
+        """
+        points = self.daily_balances(wallet_id, start, end)
+        if interval == 'month':
+            points = [
+                (day, balance) for day, balance in points
+                if day == end or (day + timedelta(days=1)).day == 1
+            ]
+        return [{"date": day.isoformat(), "balance": float(balance)} for day, balance in points]
+
+    def take_snapshots(self, through: Optional[date] = None) -> int:
+        """
+        Snapshot every wallet up to the end of `through` (default: yesterday),
+        filling in days missed since each wallet's latest snapshot (at most
+        CATCHUP_DAYS).
+
+        The wallets are locked while the balances are computed and written,
+        so a transaction write either lands before (and is included) or
+        after (and shifts the new snapshot through the ledger service).
+
+        Returns:
+            Number of snapshot rows written
+        """
+        through = through or timezone.localdate() - timedelta(days=1)
+        snapshots = []
+        with db_transaction.atomic():
+            wallet_ids = list(Wallet.objects.order_by('pk').select_for_update().values_list('pk', flat=True))
+            for wallet_id in wallet_ids:
+                last = WalletBalanceSnapshot.objects.filter(
+                    wallet_id=wallet_id,
+                    day__lte=through
+                ).order_by('-day').values_list('day', flat=True).first()
+                first = through
+                if last:
+                    first = max(last + timedelta(days=1), through - timedelta(days=self.CATCHUP_DAYS - 1))
+                snapshots.extend(
+                    WalletBalanceSnapshot(wallet_id=wallet_id, day=day, balance=balance)
+                    for day, balance in self.daily_balances(wallet_id, first, through)
+                )
+            WalletBalanceSnapshot.objects.bulk_create(
+                snapshots,
+                update_conflicts=True,
+                unique_fields=['wallet', 'day'],
+                update_fields=['balance'],
+            )
+        return len(snapshots)
+
+    def prune_snapshots(self, today: Optional[date] = None) -> int:
+        """
+        Keep only month-end snapshots older than the daily retention window
+
+        Returns:
+            Number of snapshot rows deleted
+        """
+        cutoff = (today or timezone.localdate()) - timedelta(days=self.daily_retention_days)
+        old = WalletBalanceSnapshot.objects.filter(day__lt=cutoff).values_list('id', 'day')
+        stale = [pk for pk, day in old if (day + timedelta(days=1)).day != 1]
+        if not stale:
+            return 0
+        deleted, _ = WalletBalanceSnapshot.objects.filter(id__in=stale).delete()
+        return deleted
+
+
+# Singleton instance
+balance_service = BalanceService()
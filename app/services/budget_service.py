@@ -1,9 +1,14 @@
 """
 Budget service for budget calculations and warnings
 """
-from typing import Dict, Optional
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
 from decimal import Decimal
+from django.db import transaction as db_transaction
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
 from ..models import Budget, Transaction, Category
+from .rollup_service import local_day
 
 
 class BudgetService:
@@ -13,6 +18,137 @@ class BudgetService:
     
     WARNING_THRESHOLDS = [80, 100, 120]  # Percentage thresholds for warnings
     
+    def spent_deltas(self, added: Iterable = (), removed: Iterable = ()) -> Dict[int, Decimal]:
+        """
+        Map ledger entries to one signed delta per Budget.spent counter
+        
+        Args:
+            added: Ledger entries that now exist
+            removed: Ledger entries that no longer exist
+        
+        Returns:
+            Mapping budget_id -> delta (one indexed budget lookup, none if no
+            entry is a categorized spend)
+        """
+        by_day = defaultdict(Decimal)
+        for sign, entries in ((1, added), (-1, removed)):
+            for entry in entries:
+                if entry.category_id is None or entry.transaction_type not in Budget.SPEND_TYPES:
+                    continue
+                by_day[(entry.category_id, local_day(entry.date))] += sign * entry.amount
+        by_day = {key: delta for key, delta in by_day.items() if delta}
+        if not by_day:
+            return {}
+        
+        days = [day for _, day in by_day]
+        budgets = Budget.objects.filter(
+            category_id__in={category_id for category_id, _ in by_day},
+            start_date__lte=max(days),
+            end_date__gte=min(days),
+        ).values_list('id', 'category_id', 'start_date', 'end_date')
+        
+        deltas = defaultdict(Decimal)
+        for budget_id, category_id, start_date, end_date in budgets:
+            for (entry_category_id, day), delta in by_day.items():
+                if entry_category_id == category_id and start_date <= day <= end_date:
+                    deltas[budget_id] += delta
+        return {budget_id: delta for budget_id, delta in deltas.items() if delta}
+    
+    def apply_spent_deltas(self, deltas: Dict[int, Decimal]) -> int:
+        """
+        Add deltas to Budget.spent in one UPDATE statement
+        
+        Args:
+            deltas: Mapping budget_id -> signed amount
+        
+        Returns:
+            Number of budget rows updated
+        """
+        if not deltas:
+            return 0
+        if len(deltas) == 1:
+            (budget_id, delta), = deltas.items()
+            qs = Budget.objects.filter(pk=budget_id)
+            increment = Value(delta)
+        else:
+            qs = Budget.objects.filter(pk__in=list(deltas))
+            increment = Case(
+                *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+                default=Value(Decimal(0)),
+                output_field=DecimalField(max_digits=17, decimal_places=2),
+            )
+        with db_transaction.atomic(savepoint=False):
+            return qs.update(spent=F('spent') + increment)
+    
+    def reconcile(self, queryset=None) -> int:
+        """
+        Repair Budget.spent counters that drifted from the transactions
+        (writes that bypass the ledger, budgets edited concurrently, ...)
+        
+        Args:
+            queryset: Budgets to check (default: all budgets)
+        
+        Returns:
+            Number of counters corrected
+        """
+        if queryset is None:
+            queryset = Budget.objects.all()
+        rows = self.with_spent(queryset.order_by()).values_list('id', 'spent', 'spent_amount')
+        repaired = 0
+        for budget_id, stored, actual in rows:
+            if stored == actual:
+                continue
+            # Compare-and-set: a concurrent delta means the next run will check again
+            repaired += Budget.objects.filter(pk=budget_id, spent=stored).update(spent=actual)
+        return repaired
+    
+    def with_spent(self, queryset=None):
+        """
+        Annotate budgets with `spent_amount` in the same query.
+
+        Budgets are LEFT JOINed to their category's transactions, restricted
+        to spend types and to each budget's own [start_date, end_date] (local
+        days), and grouped per budget. Budget.get_spent_amount and the other
+        model helpers reuse the annotation instead of querying again.
+
+        Args:
+            queryset: Budget queryset to annotate (default: all budgets)
+
+        Returns:
+            Annotated queryset
+        """
+        if queryset is None:
+            queryset = Budget.objects.all()
+        return queryset.annotate(
+            spent_amount=Coalesce(
+                Sum(
+                    'category__transaction__amount',
+                    filter=Q(
+                        category__transaction__transaction_type__in=Budget.SPEND_TYPES,
+                        category__transaction__date__date__gte=F('start_date'),
+                        category__transaction__date__date__lte=F('end_date'),
+                    ),
+                ),
+                Value(Decimal('0')),
+                output_field=DecimalField(max_digits=17, decimal_places=2),
+            )
+        )
+    
+    def get_all_statuses(self, active_only: bool = False) -> List[Dict]:
+        """
+        Status of every budget in a single query
+        
+        Args:
+            active_only: Only include active budgets
+        
+        Returns:
+            List of budget status dictionaries
+        """
+        queryset = Budget.objects.select_related('category')
+        if active_only:
+            queryset = queryset.filter(is_active=True)
+        return [self.get_budget_status(budget) for budget in self.with_spent(queryset)]
+    
     def check_budget(self, category: Category, amount: Decimal, period_start, period_end) -> Dict:
         """
         Check if a transaction would exceed budget
@@ -41,11 +177,10 @@ class BudgetService:
                 "status": "ok"
             }
         
-        # Calculate current spending
-        # Ensure all are Decimal
+        # Current spending comes from the running counter (no aggregate query)
         amount_dec = Decimal(str(amount))
         budget_amount = budget.amount
-        current_spent = Decimal(str(budget.get_spent_amount()))
+        current_spent = budget.spent
         
         new_total = current_spent + amount_dec
         
@@ -65,7 +200,7 @@ class BudgetService:
             warning = f"Cẩn thận: Giao dịch này sẽ làm bạn vượt quá ngân sách ({budget_amount:,.0f} VNĐ)!"
             status = "warning"
         elif percentage >= 80:
-            remaining = budget.get_remaining_amount() - amount_dec
+            remaining = budget_amount - new_total
             warning = f"Lưu ý: Bạn đã sử dụng {percentage:.1f}% ngân sách. Còn {remaining:,.0f} VNĐ."
             status = "caution"
         
@@ -76,7 +211,7 @@ class BudgetService:
             "current_spent": float(current_spent),
             "new_total": float(new_total),
             "percentage": float(percentage),
-            "remaining": float(budget.get_remaining_amount() - amount_dec),
+            "remaining": float(budget_amount - new_total),
             "warning": warning,
             "status": status
         }
@@ -86,14 +221,15 @@ class BudgetService:
         Get current status of a budget
         
         Args:
-            budget: Budget instance
+            budget: Budget instance (annotate it with with_spent() to avoid
+                an extra query)
         
         Returns:
             Dictionary with budget status
         """
         spent = budget.get_spent_amount()
-        remaining = budget.get_remaining_amount()
-        percentage = budget.get_percentage_used()
+        remaining = budget.amount - spent
+        percentage = (spent / budget.amount) * 100 if budget.amount else 0
         
         status = "ok"
         if percentage >= 120:
@@ -107,9 +243,9 @@ class BudgetService:
             "budget_id": budget.id,
             "category": budget.category.name,
             "amount": float(budget.amount),
-            "spent": spent,
-            "remaining": remaining,
-            "percentage": percentage,
+            "spent": float(spent),
+            "remaining": float(remaining),
+            "percentage": float(percentage),
             "status": status,
             "period": budget.get_period_display(),
             "start_date": budget.start_date.isoformat(),
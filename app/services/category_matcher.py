@@ -0,0 +1,125 @@
+"""
+Category matcher - finds category names mentioned in free text (Aho–Corasick)
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from django.core.cache import cache
+from ..models import Category
+
+
+class AhoCorasick:
+    """
+    Multi-pattern substring automaton: every occurrence of every pattern in
+    one pass over the text, independent of the number of patterns.
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        """
+        Args:
+            patterns: Lowercased pattern -> value returned on a match
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]
+
+        for pattern, value in patterns.items():
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._out[state].append((len(pattern), value))
+
+        # Breadth-first failure links; outputs of the fallback state are merged in
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """All matches as (start, length, value), in order of their end position"""
+        matches = []
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, value in self._out[state]:
+                matches.append((i - length + 1, length, value))
+        return matches
+
+
+class CategoryMatcher:
+    """
+    Service for spotting a category name in a chat question without scanning
+    the Category table on every question.
+
+    The automaton is built once per process and rebuilt only when the
+    category version (bumped by Category save/delete signals, shared through
+    the cache so every worker sees it) changes.
+    """
+
+    VERSION_KEY = "categories:version"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._automaton: Optional[AhoCorasick] = None
+
+    def get_version(self) -> int:
+        version = cache.get(self.VERSION_KEY)
+        if version is None:
+            cache.add(self.VERSION_KEY, int(time.time() * 1000), None)
+            version = cache.get(self.VERSION_KEY)
+        return version
+
+    def bump_version(self) -> None:
+        """Force a rebuild on the next match (all processes)"""
+        try:
+            cache.incr(self.VERSION_KEY)
+        except ValueError:
+            cache.add(self.VERSION_KEY, int(time.time() * 1000), None)
+        except Exception as e:
+            print(f"Warning: Could not bump category version: {e}")
+
+    def automaton(self) -> AhoCorasick:
+        version = self.get_version()
+        with self._lock:
+            if self._automaton is None or version != self._version:
+                names = Category.objects.order_by('name').values_list('name', flat=True)
+                self._automaton = AhoCorasick({name.lower(): name for name in reversed(names)})
+                self._version = version
+            return self._automaton
+
+    def match(self, text: str) -> Optional[str]:
+        """
+        Category mentioned in a text
+
+        Args:
+            text: Free text (e.g. a chat question)
+
+        Returns:
+            Name of the longest category name found (earliest on a tie), or None
+        """
+        matches = self.automaton().find_all(text.lower())
+        if not matches:
+            return None
+        start, length, name = min(matches, key=lambda m: (-m[1], m[0]))
+        return name
+
+
+# Singleton instance
+category_matcher = CategoryMatcher()
@@ -0,0 +1,131 @@
+"""
+Compact binary codecs for cached embeddings.
+
+Layout of an encoded embedding:
+
+    magic b"EV" | version u8 | codec id u8 | dimension u16 | model length u8 | model name
+    | [int8 only: scale f32] | packed little-endian values
+
+Compared to a pickled list of Python floats (~9 bytes per value), float32
+takes 4 bytes, float16 2 bytes and int8 1 byte per value. Decoding returns
+a NumPy view over the cached bytes, so no per-float Python objects are built
+unless a list is explicitly requested.
+"""
+import struct
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+
+MAGIC = b"EV"
+VERSION = 1
+HEADER = struct.Struct("<2sBBHB")
+SCALE = struct.Struct("<f")
+
+
+class CodecError(ValueError):
+    """Raised when cached bytes are not a valid embedding for the expected model"""
+
+
+class EmbeddingCodec:
+    """Base codec: packs vectors as a fixed NumPy dtype"""
+    codec_id = 0
+    name = ""
+    dtype = None
+
+    def pack(self, vector: np.ndarray) -> bytes:
+        return vector.astype(self.dtype).tobytes()
+
+    def unpack(self, data: Union[bytes, memoryview], offset: int, dimension: int) -> np.ndarray:
+        return np.frombuffer(data, dtype=self.dtype, count=dimension, offset=offset)
+
+
+class Float32Codec(EmbeddingCodec):
+    """Lossless for model outputs (which are float32 to begin with)"""
+    codec_id = 1
+    name = "float32"
+    dtype = np.dtype("<f4")
+
+
+class Float16Codec(EmbeddingCodec):
+    """Half precision: ~1e-3 relative error, negligible for cosine similarity"""
+    codec_id = 2
+    name = "float16"
+    dtype = np.dtype("<f2")
+
+
+class Int8Codec(EmbeddingCodec):
+    """Symmetric int8 quantization with one float32 scale per vector"""
+    codec_id = 3
+    name = "int8"
+    dtype = np.dtype("i1")
+
+    def pack(self, vector: np.ndarray) -> bytes:
+        peak = float(np.max(np.abs(vector))) if vector.size else 0.0
+        scale = peak / 127.0 if peak else 1.0
+        quantized = np.clip(np.rint(vector / scale), -127, 127).astype(self.dtype)
+        return SCALE.pack(scale) + quantized.tobytes()
+
+    def unpack(self, data: Union[bytes, memoryview], offset: int, dimension: int) -> np.ndarray:
+        (scale,) = SCALE.unpack_from(data, offset)
+        quantized = np.frombuffer(data, dtype=self.dtype, count=dimension, offset=offset + SCALE.size)
+        return quantized.astype(np.float32) * np.float32(scale)
+
+
+CODECS: Dict[str, EmbeddingCodec] = {
+    codec.name: codec for codec in (Float32Codec(), Float16Codec(), Int8Codec())
+}
+CODECS_BY_ID: Dict[int, EmbeddingCodec] = {codec.codec_id: codec for codec in CODECS.values()}
+
+
+def get_codec(name: str) -> EmbeddingCodec:
+    """Look up a codec by name (float32, float16, int8)"""
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown embedding codec: {name}. Choose from {', '.join(CODECS)}")
+
+
+def encode_embedding(vector: Sequence[float], model_name: str, codec: Union[str, EmbeddingCodec] = "float32") -> bytes:
+    """Encode a vector with a header identifying the codec, dimension and model"""
+    if isinstance(codec, str):
+        codec = get_codec(codec)
+    array = np.asarray(vector, dtype=np.float32)
+    model = model_name.encode("utf-8")[:255]
+    header = HEADER.pack(MAGIC, VERSION, codec.codec_id, array.size, len(model))
+    return header + model + codec.pack(array)
+
+
+def decode_embedding(data: Union[bytes, memoryview], model_name: Optional[str] = None,
+                     as_array: bool = False) -> Union[np.ndarray, List[float]]:
+    """
+    Decode bytes produced by encode_embedding. The codec is read from the
+    header, so entries written with a different codec stay readable.
+
+    Args:
+        data: Encoded bytes
+        model_name: If given, reject embeddings produced by another model
+        as_array: Return the NumPy array (a zero-copy view for float codecs)
+                  instead of a list of floats
+
+    Raises:
+        CodecError: On malformed data or a model mismatch
+    """
+    if len(data) < HEADER.size:
+        raise CodecError("Embedding data too short")
+    magic, version, codec_id, dimension, model_length = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise CodecError("Not an encoded embedding")
+    codec = CODECS_BY_ID.get(codec_id)
+    if codec is None:
+        raise CodecError(f"Unknown codec id: {codec_id}")
+
+    offset = HEADER.size + model_length
+    if model_name is not None:
+        stored_model = bytes(data[HEADER.size:offset]).decode("utf-8", errors="replace")
+        if stored_model != model_name.encode("utf-8")[:255].decode("utf-8", errors="replace"):
+            raise CodecError(f"Embedding belongs to model {stored_model}, expected {model_name}")
+
+    try:
+        vector = codec.unpack(data, offset, dimension)
+    except ValueError as e:
+        raise CodecError(f"Truncated embedding data: {e}")
+    return vector if as_array else vector.tolist()
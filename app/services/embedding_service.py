@@ -1,12 +1,25 @@
 """
 Embedding service using Ollama bge-m3 model
 """
+import asyncio
+import httpx
 import requests
-from typing import List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Union
 from django.conf import settings
+from asgiref.sync import sync_to_async
 from django.core.cache import cache
 import hashlib
 import json
+import numpy as np
+from .embedding_codec import CodecError, decode_embedding, encode_embedding, get_codec
+from .http_clients import http_clients
+from .memory_cache import ByteLRUCache
+
+
+class EmbeddingError(Exception):
+    """Raised when an embedding could not be generated"""
 
 
 class EmbeddingService:
@@ -14,127 +27,292 @@ class EmbeddingService:
     Service for generating embeddings using Ollama bge-m3 model
     with Redis caching
     """
-    
-    def __init__(self):
-        self.ollama_url = settings.OLLAMA_URL
-        self.model_name = "bge-m3"  # bge-m3 embedding model
+
+    def __init__(self, ollama_url: Optional[str] = None, batch_size: Optional[int] = None,
+                 max_workers: Optional[int] = None, max_retries: Optional[int] = None):
+        self.ollama_url = ollama_url or settings.OLLAMA_URL
+        # Tier 1: per-process LRU (bytes-bounded); tier 2: Redis
+        self.local_cache = ByteLRUCache(
+            max_bytes=settings.EMBEDDING_LOCAL_CACHE_BYTES,
+            ttl=settings.EMBEDDING_LOCAL_CACHE_TTL,
+        )
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.model_name = settings.EMBEDDING_MODEL_NAME  # bge-m3 embedding model
         self.cache_ttl = 86400 * 7  # 7 days cache
-    
-    def get_embedding(self, text: str, use_cache: bool = True) -> List[float]:
+        self.batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE  # Texts per /api/embed request
+        self.max_workers = max_workers or settings.EMBEDDING_MAX_WORKERS  # Parallel requests
+        self.max_retries = settings.EMBEDDING_MAX_RETRIES if max_retries is None else max_retries
+        self.timeout = 60
+        self.cache_codec = get_codec(settings.EMBEDDING_CACHE_CODEC)  # Binary format in Redis
+
+    @property
+    def model_name(self) -> str:
+        return self._model_name
+
+    @model_name.setter
+    def model_name(self, value: str) -> None:
+        """
+        Switching models drops the local tier. Cache keys and the codec header
+        both carry the model name, so no worker can serve another model's
+        vectors from either tier.
+        """
+        if value != getattr(self, "_model_name", None):
+            self._model_name = value
+            self.local_cache.clear()
+
+    def get_embedding(self, text: str, use_cache: bool = True,
+                      as_array: bool = False) -> Union[List[float], np.ndarray]:
         """
         Get embedding for text, with caching support
-        
+
         Args:
             text: Text to embed
             use_cache: Whether to use cache
-        
+            as_array: Return a NumPy array; cache hits are then decoded
+                      without building a Python float per dimension
+
         Returns:
-            Embedding vector (list of floats)
+            Embedding vector (list of floats, or array if as_array)
+
+        Raises:
+            EmbeddingError: If the embedding could not be generated
         """
         if use_cache:
             # Check cache first
             cache_key = self._get_cache_key(text)
-            cached_embedding = cache.get(cache_key)
-            if cached_embedding:
+            cached = self._lookup_cached([cache_key]).get(cache_key)
+            cached_embedding = self._decode_cached(cached, as_array)
+            if cached_embedding is not None:
                 return cached_embedding
-        
+
         # Generate embedding
         embedding = self._generate_embedding(text)
-        
+
         # Cache result
         if use_cache:
-            cache.set(cache_key, embedding, self.cache_ttl)
-        
-        return embedding
-    
-    def get_embeddings_batch(self, texts: List[str], use_cache: bool = True) -> List[List[float]]:
+            self._store_cached({cache_key: embedding})
+
+        return np.asarray(embedding, dtype=np.float32) if as_array else embedding
+
+    async def aget_embedding(self, text: str, use_cache: bool = True,
+                             as_array: bool = False) -> Union[List[float], np.ndarray]:
+        """
+        Async version of get_embedding (pooled httpx client, no thread held
+        while Ollama computes). Same caches, retries and errors.
+        """
+        if use_cache:
+            cache_key = self._get_cache_key(text)
+            cached = (await sync_to_async(self._lookup_cached)([cache_key])).get(cache_key)
+            cached_embedding = self._decode_cached(cached, as_array)
+            if cached_embedding is not None:
+                return cached_embedding
+
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(0.2 * (2 ** (attempt - 1)))
+            try:
+                response = await http_clients.async_client().post(
+                    f"{self.ollama_url}/api/embed",
+                    json={"model": self.model_name, "input": [text]},
+                    timeout=self.timeout
+                )
+                response.raise_for_status()
+                embedding = self._check_embeddings([text], response.json())[0]
+                break
+            except (httpx.HTTPError, ValueError, EmbeddingError) as e:
+                last_error = e
+        else:
+            print(f"Error generating embedding: Ollama embed failed after {self.max_retries + 1} attempts: {last_error}")
+            raise EmbeddingError(f"Could not generate embedding for text: {text[:50]}")
+
+        if use_cache:
+            await sync_to_async(self._store_cached)({cache_key: embedding})
+
+        return np.asarray(embedding, dtype=np.float32) if as_array else embedding
+
+    def get_embeddings_batch(self, texts: List[str], use_cache: bool = True) -> List[Optional[List[float]]]:
         """
         Get embeddings for multiple texts
-        
+
+        Uncached texts are de-duplicated, split into chunks of `batch_size`
+        and sent to Ollama's multi-input /api/embed endpoint, with up to
+        `max_workers` requests in flight. A failed chunk is retried, then
+        retried item by item.
+
         Args:
             texts: List of texts to embed
             use_cache: Whether to use cache
-        
+
         Returns:
-            List of embedding vectors
+            List of embedding vectors, aligned with `texts`. Items that could
+            not be embedded are None (never a zero-vector placeholder).
         """
-        embeddings = []
-        uncached_texts = []
-        uncached_indices = []
-        
+        if not texts:
+            return []
+
+        unique_texts = list(dict.fromkeys(texts))
+        found: Dict[str, List[float]] = {}
+
         if use_cache:
-            # Check cache for each text
-            for i, text in enumerate(texts):
-                cache_key = self._get_cache_key(text)
-                cached = cache.get(cache_key)
-                if cached:
-                    embeddings.append((i, cached))
-                else:
-                    uncached_texts.append(text)
-                    uncached_indices.append(i)
-        else:
-            uncached_texts = texts
-            uncached_indices = list(range(len(texts)))
-        
-        # Generate embeddings for uncached texts
-        if uncached_texts:
-            try:
-                # Ollama embeddings API
-                response = requests.post(
-                    f"{self.ollama_url}/api/embeddings",
-                    json={
-                        "model": self.model_name,
-                        "prompt": uncached_texts[0] if len(uncached_texts) == 1 else uncached_texts
-                    },
-                    timeout=30
+            keys = {self._get_cache_key(text): text for text in unique_texts}
+            for key, value in self._lookup_cached(list(keys)).items():
+                embedding = self._decode_cached(value)
+                if embedding is not None:
+                    found[keys[key]] = embedding
+
+        missing = [text for text in unique_texts if text not in found]
+        if missing:
+            chunks = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+            if len(chunks) == 1 or self.max_workers <= 1:
+                results = [self._embed_chunk_with_fallback(chunk) for chunk in chunks]
+            else:
+                with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+                    results = list(pool.map(self._embed_chunk_with_fallback, chunks))
+
+            generated = {}
+            for chunk_result in results:
+                generated.update(chunk_result)
+            found.update(generated)
+
+            # Cache new embeddings
+            if use_cache and generated:
+                self._store_cached(
+                    {self._get_cache_key(text): embedding for text, embedding in generated.items()}
                 )
-                response.raise_for_status()
-                result = response.json()
-                
-                # Handle single or batch response
-                if isinstance(result, list):
-                    new_embeddings = [item.get("embedding", []) for item in result]
-                else:
-                    new_embeddings = [result.get("embedding", [])]
-                
-                # Cache new embeddings
-                if use_cache:
-                    for text, embedding in zip(uncached_texts, new_embeddings):
-                        cache_key = self._get_cache_key(text)
-                        cache.set(cache_key, embedding, self.cache_ttl)
-                
-                # Combine cached and new embeddings
-                for idx, emb in zip(uncached_indices, new_embeddings):
-                    embeddings.append((idx, emb))
-            except Exception as e:
-                print(f"Error generating embeddings: {e}")
-                # Fallback: return empty embeddings
-                for idx in uncached_indices:
-                    embeddings.append((idx, [0.0] * 768))  # Default size for bge-m3
-        
-        # Sort by index and return just embeddings
-        embeddings.sort(key=lambda x: x[0])
-        return [emb for _, emb in embeddings]
-    
+
+        return [found.get(text) for text in texts]
+
     def _generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for a single text"""
+        result = self._embed_chunk_with_fallback([text])
+        if text not in result:
+            raise EmbeddingError(f"Could not generate embedding for text: {text[:50]}")
+        return result[text]
+
+    def _embed_chunk_with_fallback(self, chunk: List[str]) -> Dict[str, List[float]]:
+        """
+        Embed a chunk; if the whole request keeps failing, embed its items
+        one by one so a single bad input does not sink the batch.
+
+        Returns:
+            Mapping text -> embedding for the items that succeeded
+        """
         try:
-            response = requests.post(
-                f"{self.ollama_url}/api/embeddings",
-                json={
-                    "model": self.model_name,
-                    "prompt": text
-                },
-                timeout=30
-            )
-            response.raise_for_status()
-            result = response.json()
-            return result.get("embedding", [])
-        except Exception as e:
-            print(f"Error generating embedding: {e}")
-            # Return zero vector as fallback
-            return [0.0] * 768  # bge-m3 produces 768-dimensional vectors
-    
+            return dict(zip(chunk, self._embed_with_retry(chunk)))
+        except EmbeddingError as e:
+            if len(chunk) == 1:
+                print(f"Error generating embedding: {e}")
+                return {}
+
+        result = {}
+        for text in chunk:
+            try:
+                result[text] = self._embed_with_retry([text])[0]
+            except EmbeddingError as e:
+                print(f"Error generating embedding: {e}")
+        return result
+
+    def _embed_with_retry(self, inputs: List[str]) -> List[List[float]]:
+        """Call /api/embed with exponential backoff"""
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(0.2 * (2 ** (attempt - 1)))
+            try:
+                return self._request_embeddings(inputs)
+            except (requests.RequestException, ValueError, EmbeddingError) as e:
+                last_error = e
+        raise EmbeddingError(f"Ollama embed failed after {self.max_retries + 1} attempts: {last_error}")
+
+    def _request_embeddings(self, inputs: List[str]) -> List[List[float]]:
+        """One request to Ollama's multi-input embed API"""
+        response = http_clients.session().post(
+            f"{self.ollama_url}/api/embed",
+            json={
+                "model": self.model_name,
+                "input": inputs
+            },
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return self._check_embeddings(inputs, response.json())
+
+    def _check_embeddings(self, inputs: List[str], result: Dict) -> List[List[float]]:
+        """Validate an /api/embed response body"""
+        embeddings = result.get("embeddings") or []
+
+        if len(embeddings) != len(inputs):
+            raise EmbeddingError(f"Expected {len(inputs)} embeddings, got {len(embeddings)}")
+        for embedding in embeddings:
+            if not embedding or not any(embedding):
+                raise EmbeddingError("Empty or zero embedding returned")
+        return embeddings
+
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters of both cache tiers for this worker process"""
+        redis_lookups = self.redis_hits + self.redis_misses
+        return {
+            "model": self.model_name,
+            "codec": self.cache_codec.name,
+            "local": self.local_cache.stats(),
+            "redis": {
+                "hits": self.redis_hits,
+                "misses": self.redis_misses,
+                "hit_rate": self.redis_hits / redis_lookups if redis_lookups else 0.0,
+            },
+        }
+
+    def _lookup_cached(self, keys: List[str]) -> Dict[str, object]:
+        """Two-tier lookup: process LRU first, then one Redis round trip for the rest"""
+        found = {}
+        remaining = []
+        for key in keys:
+            value = self.local_cache.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                remaining.append(key)
+
+        if remaining:
+            redis_values = cache.get_many(remaining)
+            self.redis_hits += len(redis_values)
+            self.redis_misses += len(remaining) - len(redis_values)
+            for key, value in redis_values.items():
+                if isinstance(value, bytes):
+                    self.local_cache.set(key, value)
+                found[key] = value
+        return found
+
+    def _store_cached(self, embeddings: Dict[str, List[float]]) -> None:
+        """Write new embeddings to both tiers"""
+        encoded = {key: self._encode_cached(embedding) for key, embedding in embeddings.items()}
+        for key, value in encoded.items():
+            self.local_cache.set(key, value)
+        cache.set_many(encoded, self.cache_ttl)
+
+    def _encode_cached(self, embedding: List[float]) -> bytes:
+        """Pack an embedding for the cache (see embedding_codec)"""
+        return encode_embedding(embedding, self.model_name, self.cache_codec)
+
+    def _decode_cached(self, value, as_array: bool = False):
+        """
+        Unpack a cached value; None on a miss, a corrupt entry or an entry
+        written for another model. Plain lists from the old pickled format
+        are still accepted. Arrays are always float32 (like a cache miss),
+        whatever codec the entry was stored with.
+        """
+        if not value:
+            return None
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            try:
+                decoded = decode_embedding(value, self.model_name, as_array=as_array)
+            except CodecError:
+                return None
+            return decoded.astype(np.float32, copy=False) if as_array else decoded
+        return np.asarray(value, dtype=np.float32) if as_array else value
+
     def _get_cache_key(self, text: str) -> str:
         """Generate cache key for text"""
         text_hash = hashlib.md5(text.encode('utf-8')).hexdigest()
@@ -143,4 +321,3 @@ class EmbeddingService:
 
 # Singleton instance
 embedding_service = EmbeddingService()
-
@@ -0,0 +1,194 @@
+"""
+Export service - streams transactions as CSV, NDJSON or Parquet
+"""
+import csv
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, Iterator, List, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pq = None
+
+
+class ExportFormatError(ValueError):
+    """Raised for an unknown or unavailable export format"""
+
+
+class _LineBuffer:
+    """Write target for csv.writer that just returns what it is given"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+class _ChunkSink:
+    """Minimal file object collecting Parquet writer output between yields"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class ExportService:
+    """
+    Service for exporting transactions without materializing them.
+
+    Rows come from `values_list(...).iterator(chunk_size=...)` (a server-side
+    cursor on PostgreSQL), and output is yielded in blocks of `chunk_size`
+    rows, so memory stays flat regardless of the export size. The CSV header
+    is yielded before the query runs, so the first bytes go out immediately.
+    """
+
+    CHUNK_SIZE = 2000
+
+    # (queryset field, output column)
+    COLUMNS: Tuple[Tuple[str, str], ...] = (
+        ('id', 'id'),
+        ('date', 'date'),
+        ('transaction_type', 'transaction_type'),
+        ('amount', 'amount'),
+        ('wallet_id', 'wallet_id'),
+        ('wallet__name', 'wallet_name'),
+        ('category_id', 'category_id'),
+        ('category__name', 'category_name'),
+        ('description', 'description'),
+        ('contact_person', 'contact_person'),
+        ('created_at', 'created_at'),
+    )
+
+    CONTENT_TYPES = {
+        'csv': 'text/csv; charset=utf-8',
+        'ndjson': 'application/x-ndjson',
+        'parquet': 'application/vnd.apache.parquet',
+    }
+
+    @property
+    def formats(self) -> List[str]:
+        """Formats available in this installation"""
+        return [fmt for fmt in self.CONTENT_TYPES if fmt != 'parquet' or pq is not None]
+
+    def check_format(self, fmt: str) -> str:
+        fmt = (fmt or 'csv').lower()
+        if fmt not in self.CONTENT_TYPES:
+            raise ExportFormatError(f"Unknown export format: {fmt}. Choose from {', '.join(self.CONTENT_TYPES)}")
+        if fmt not in self.formats:
+            raise ExportFormatError("Parquet export requires pyarrow (pip install pyarrow)")
+        return fmt
+
+    def content_type(self, fmt: str) -> str:
+        return self.CONTENT_TYPES[fmt]
+
+    def filename(self, fmt: str) -> str:
+        return f"transactions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+
+    def rows(self, queryset, chunk_size: int = None) -> Iterator[tuple]:
+        """Stream value tuples in COLUMNS order"""
+        fields = [field for field, _ in self.COLUMNS]
+        return queryset.values_list(*fields).iterator(chunk_size=chunk_size or self.CHUNK_SIZE)
+
+    def stream(self, queryset, fmt: str, chunk_size: int = None) -> Iterator[bytes]:
+        """Encoded export of a Transaction queryset in the given format"""
+        fmt = self.check_format(fmt)
+        chunk_size = chunk_size or self.CHUNK_SIZE
+        rows = self.rows(queryset, chunk_size)
+        if fmt == 'csv':
+            return self._stream_csv(rows, chunk_size)
+        if fmt == 'ndjson':
+            return self._stream_ndjson(rows, chunk_size)
+        return self._stream_parquet(rows, chunk_size)
+
+    def _chunks(self, rows: Iterable[tuple], chunk_size: int) -> Iterator[List[tuple]]:
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _stream_csv(self, rows: Iterable[tuple], chunk_size: int) -> Iterator[bytes]:
+        writer = csv.writer(_LineBuffer())
+        # BOM so Excel opens Vietnamese text correctly
+        yield ('\ufeff' + writer.writerow([column for _, column in self.COLUMNS])).encode('utf-8')
+        for chunk in self._chunks(rows, chunk_size):
+            yield ''.join(writer.writerow(self._format_row(row)) for row in chunk).encode('utf-8')
+
+    def _stream_ndjson(self, rows: Iterable[tuple], chunk_size: int) -> Iterator[bytes]:
+        columns = [column for _, column in self.COLUMNS]
+        for chunk in self._chunks(rows, chunk_size):
+            lines = (
+                json.dumps(dict(zip(columns, self._format_row(row, blank_none=False))), ensure_ascii=False)
+                for row in chunk
+            )
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+    def _stream_parquet(self, rows: Iterable[tuple], chunk_size: int) -> Iterator[bytes]:
+        schema = pa.schema([
+            ('id', pa.int64()),
+            ('date', pa.timestamp('us', tz='UTC')),
+            ('transaction_type', pa.string()),
+            ('amount', pa.decimal128(15, 2)),
+            ('wallet_id', pa.int64()),
+            ('wallet_name', pa.string()),
+            ('category_id', pa.int64()),
+            ('category_name', pa.string()),
+            ('description', pa.string()),
+            ('contact_person', pa.string()),
+            ('created_at', pa.timestamp('us', tz='UTC')),
+        ])
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema)
+        try:
+            for chunk in self._chunks(rows, chunk_size):
+                # One row group per chunk
+                writer.write_batch(pa.RecordBatch.from_arrays(
+                    [pa.array(column, type=field.type) for column, field in zip(zip(*chunk), schema)],
+                    schema=schema
+                ))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    def _format_row(self, row: tuple, blank_none: bool = True) -> list:
+        """Text-friendly values: ISO dates, exact decimal strings, blanks for None (CSV)"""
+        values = []
+        for value in row:
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, Decimal):
+                value = str(value)
+            elif value is None and blank_none:
+                value = ''
+            values.append(value)
+        return values
+
+
+# Singleton instance
+export_service = ExportService()
@@ -0,0 +1,53 @@
+"""
+HTTP clients - pooled keep-alive connections for the AI and embedding services
+"""
+import asyncio
+import threading
+import weakref
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+
+class HTTPClients:
+    """
+    Shared HTTP clients, so calls to Ollama reuse TCP connections instead of
+    opening one per request.
+
+    - `session()`: one requests.Session per process (sync code paths, Celery)
+    - `async_client()`: one httpx.AsyncClient per event loop (async views).
+      An AsyncClient cannot be shared across loops; under ASGI there is one
+      loop per worker, so the pool lives as long as the worker.
+    """
+
+    def __init__(self):
+        self.pool_size = getattr(settings, 'HTTP_POOL_SIZE', 20)
+        self._lock = threading.Lock()
+        self._session = None
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def session(self) -> requests.Session:
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+            return self._session
+
+    def async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size,
+            ))
+            self._async_clients[loop] = client
+        return client
+
+
+# Singleton instance
+http_clients = HTTPClients()
@@ -0,0 +1,232 @@
+"""
+Bulk import service for transactions (CSV / JSON / NDJSON)
+"""
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from ..models import Transaction, Wallet, Category
+from .ledger_service import ledger_service
+from .vector_service import vector_service
+
+
+class ImportRowError(ValueError):
+    """Raised when a single import row cannot be converted to a Transaction"""
+
+
+class TransactionImportService:
+    """
+    Service for importing large batches of transactions.
+
+    Rows are inserted with bulk_create (which bypasses the per-row signals),
+    so the side-effects are applied in bulk instead: one balance UPDATE and
+    one vector outbox insert per chunk, drained in batches by Celery.
+    """
+
+    DEFAULT_CHUNK_SIZE = 1000
+    MAX_REPORTED_ERRORS = 50
+    VALID_TYPES = {choice for choice, _ in Transaction.TYPE_CHOICES}
+    FORMATS = ("csv", "json", "ndjson")
+
+    def detect_format(self, filename: Optional[str]) -> str:
+        """Guess the input format from a file name (default: csv)"""
+        name = (filename or "").lower()
+        if name.endswith(".ndjson") or name.endswith(".jsonl"):
+            return "ndjson"
+        if name.endswith(".json"):
+            return "json"
+        return "csv"
+
+    def check_format(self, fmt: str) -> str:
+        """Normalise an import format name; raises ValueError if it is not supported"""
+        fmt = (fmt or "").lower()
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unsupported import format: {fmt}. Choose from {', '.join(self.FORMATS)}")
+        return fmt
+
+    def iter_rows(self, stream, fmt: str) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate rows from a binary or text stream.
+
+        CSV and NDJSON are read line by line; a JSON array has to be parsed
+        in one go, so prefer NDJSON for very large files. A malformed NDJSON
+        line is yielded as an ImportRowError, so it is reported as a row error
+        instead of aborting the import.
+        """
+        if isinstance(stream.read(0), bytes):
+            stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+        if fmt == "csv":
+            yield from csv.DictReader(stream)
+        elif fmt == "ndjson":
+            for line in stream:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield ImportRowError(f"Malformed JSON line: {e}")
+        elif fmt == "json":
+            data = json.load(stream)
+            if isinstance(data, dict):
+                data = data.get("transactions", [])
+            yield from data
+        else:
+            raise ValueError(f"Unsupported import format: {fmt}")
+
+    def import_rows(self, rows: Iterable[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    sync_vectors: bool = True) -> Dict[str, Any]:
+        """
+        Import rows in chunks
+
+        Args:
+            rows: Iterable of dicts (wallet_id|wallet, category_id|category, amount,
+                  description, transaction_type, contact_person, date)
+            chunk_size: Number of rows per bulk_create / balance update
+            sync_vectors: Queue the imported rows for embedding in the vector outbox
+
+        Returns:
+            Import statistics
+        """
+        started = time.perf_counter()
+        wallets = {w.id: w for w in Wallet.objects.all()}
+        wallets_by_name = {w.name.lower(): w for w in wallets.values()}
+        categories = {c.id: c for c in Category.objects.all()}
+        categories_by_name = {c.name.lower(): c for c in categories.values()}
+
+        created_ids: List[int] = []
+        errors: List[Dict[str, Any]] = []
+        skipped = 0
+        chunk: List[Tuple[Transaction, Optional[str]]] = []
+
+        for line_no, row in enumerate(rows, start=1):
+            try:
+                chunk.append(self._build_transaction(
+                    row, wallets, wallets_by_name, categories, categories_by_name
+                ))
+            except (ImportRowError, InvalidOperation, ValueError, TypeError) as e:
+                skipped += 1
+                if len(errors) < self.MAX_REPORTED_ERRORS:
+                    errors.append({"row": line_no, "error": str(e)})
+                continue
+
+            if len(chunk) >= chunk_size:
+                created_ids.extend(self._flush(chunk, categories, categories_by_name, sync_vectors))
+                chunk = []
+
+        if chunk:
+            created_ids.extend(self._flush(chunk, categories, categories_by_name, sync_vectors))
+
+        elapsed = time.perf_counter() - started
+        return {
+            "created": len(created_ids),
+            "skipped": skipped,
+            "errors": errors,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(len(created_ids) / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+    def _flush(self, chunk: List[Tuple[Transaction, Optional[str]]], categories,
+               categories_by_name, sync_vectors: bool) -> List[int]:
+        """
+        Insert one chunk, apply its balance deltas and queue its vectors atomically
+
+        Categories named by valid rows but missing in the database are created
+        here, inside the chunk's transaction, so rejected rows never leave one behind.
+        """
+        with db_transaction.atomic():
+            transactions = []
+            for transaction, new_category in chunk:
+                if new_category is not None:
+                    category = categories_by_name.get(new_category.lower())
+                    if category is None:
+                        category = Category.objects.create(name=new_category)
+                        categories[category.id] = category
+                        categories_by_name[new_category.lower()] = category
+                    transaction.category = category
+                transactions.append(transaction)
+            created = Transaction.objects.bulk_create(transactions)
+            ledger_service.post(added=[ledger_service.entry_for(t) for t in created])
+            if sync_vectors:
+                vector_service.enqueue_sync_many([t.id for t in created])
+        return [t.id for t in created]
+
+    def _build_transaction(self, row: Dict[str, Any], wallets, wallets_by_name,
+                           categories, categories_by_name) -> Tuple[Transaction, Optional[str]]:
+        """
+        Validate one row and build an unsaved Transaction
+
+        Returns:
+            The transaction and, if its category does not exist yet, the
+            category name to create when the chunk is flushed
+        """
+        if isinstance(row, ImportRowError):
+            raise row
+        if not isinstance(row, dict):
+            raise ImportRowError(f"Row must be an object, got {type(row).__name__}")
+
+        wallet = None
+        if row.get("wallet_id"):
+            wallet = wallets.get(int(row["wallet_id"]))
+        elif row.get("wallet"):
+            wallet = wallets_by_name.get(str(row["wallet"]).strip().lower())
+        if wallet is None:
+            raise ImportRowError(f"Unknown wallet: {row.get('wallet_id') or row.get('wallet')}")
+
+        category = None
+        new_category = None
+        if row.get("category_id"):
+            category = categories.get(int(row["category_id"]))
+            if category is None:
+                raise ImportRowError(f"Unknown category_id: {row['category_id']}")
+        elif row.get("category"):
+            name = str(row["category"]).strip()
+            category = categories_by_name.get(name.lower())
+            if category is None and name:
+                new_category = name
+
+        raw_amount = row.get("amount", "")
+        try:
+            amount = Decimal(str(raw_amount).replace(",", "").strip())
+        except InvalidOperation:
+            amount = None
+        if amount is None or not amount.is_finite():
+            raise ImportRowError(f"Invalid amount: {raw_amount!r}")
+        if amount <= 0:
+            raise ImportRowError(f"Amount must be positive: {amount}")
+
+        transaction_type = str(row.get("transaction_type") or row.get("type") or "expense").strip()
+        if transaction_type not in self.VALID_TYPES:
+            raise ImportRowError(f"Unknown transaction_type: {transaction_type}")
+
+        contact_person = row.get("contact_person")
+        return Transaction(
+            wallet=wallet,
+            category=category,
+            amount=amount,
+            description=str(row.get("description") or ""),
+            transaction_type=transaction_type,
+            contact_person=str(contact_person) if contact_person else None,
+            date=self._parse_date(row.get("date")),
+        ), new_category
+
+    def _parse_date(self, value) -> datetime:
+        """Parse an ISO date/datetime; naive values are in the project timezone"""
+        if not value:
+            return timezone.now()
+        if isinstance(value, datetime):
+            parsed = value
+        else:
+            parsed = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+
+# Singleton instance
+import_service = TransactionImportService()
@@ -0,0 +1,138 @@
+"""
+Ledger cache - response cache invalidated by a ledger version counter
+"""
+import functools
+import hashlib
+import threading
+import time
+from typing import Callable, Dict, Optional
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from django.http import HttpResponse
+from django.utils import timezone
+
+
+class LedgerCache:
+    """
+    Caches read-only report responses under the current "ledger version".
+
+    Every Transaction/Wallet/Category write bumps the version (after commit),
+    so the first read after a write misses and recomputes, and every other
+    read is served from Redis. Old entries are never read again and simply
+    expire.
+    """
+
+    VERSION_KEY = "ledger:version"
+    KEY_PREFIX = "ledger_cache"
+    DEFAULT_TIMEOUT = 86400  # 1 day; entries are dropped by version, not by TTL
+
+    def __init__(self):
+        self._stats: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def get_version(self) -> int:
+        """Current ledger version (initialised on first use)"""
+        version = cache.get(self.VERSION_KEY)
+        if version is None:
+            self._init_version()
+            version = cache.get(self.VERSION_KEY)
+        return version
+
+    def bump_version(self) -> None:
+        """Invalidate every cached response"""
+        try:
+            cache.incr(self.VERSION_KEY)
+        except ValueError:
+            # Key missing (fresh or flushed Redis)
+            self._init_version()
+        except Exception as e:
+            print(f"Warning: Could not bump ledger version: {e}")
+
+    def bump_on_commit(self) -> None:
+        """Bump once the current DB transaction commits (immediately in autocommit)"""
+        db_transaction.on_commit(self.bump_version)
+
+    def _init_version(self) -> None:
+        # Start from a timestamp rather than 1, so a counter lost with a Redis
+        # flush can never come back to a version that still has cached entries
+        cache.add(self.VERSION_KEY, int(time.time() * 1000), None)
+
+    def make_key(self, name: str, params: Dict) -> str:
+        """
+        Cache key for a view call. Includes the local date, so views whose
+        window ends "today" roll over at midnight even without writes.
+        """
+        raw = repr(sorted(params.items()))
+        params_hash = hashlib.md5(raw.encode('utf-8')).hexdigest()
+        return f"{self.KEY_PREFIX}:{self.get_version()}:{timezone.localdate()}:{name}:{params_hash}"
+
+    def record(self, name: str, hit: bool) -> None:
+        with self._lock:
+            counters = self._stats.setdefault(name, [0, 0])
+            counters[0 if hit else 1] += 1
+
+    def stats(self) -> Dict:
+        """Hit/miss counters per cached view for this worker process"""
+        with self._lock:
+            views = {
+                name: {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                }
+                for name, (hits, misses) in self._stats.items()
+            }
+        hits = sum(view["hits"] for view in views.values())
+        lookups = hits + sum(view["misses"] for view in views.values())
+        return {
+            "version": self.get_version(),
+            "hits": hits,
+            "misses": lookups - hits,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "views": views,
+        }
+
+
+# Singleton instance
+ledger_cache = LedgerCache()
+
+
+def ledger_cached(name: Optional[str] = None, timeout: Optional[int] = None) -> Callable:
+    """
+    Decorator for Ninja views whose result only depends on ledger data and
+    the query parameters. Place it below the @router decorator.
+
+    Error responses (status >= 400) are not cached, and if the cache is
+    unreachable the view is simply computed without it.
+
+    Args:
+        name: Cache namespace (default: module.function)
+        timeout: TTL in seconds (default: LedgerCache.DEFAULT_TIMEOUT)
+    """
+    def decorator(view):
+        view_name = name or f"{view.__module__}.{view.__name__}"
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                key = ledger_cache.make_key(view_name, kwargs)
+                result = cache.get(key)
+            except Exception as e:
+                print(f"Warning: Ledger cache lookup failed: {e}")
+                return view(request, *args, **kwargs)
+            if result is not None:
+                ledger_cache.record(view_name, hit=True)
+                return result
+
+            ledger_cache.record(view_name, hit=False)
+            result = view(request, *args, **kwargs)
+            if isinstance(result, HttpResponse) and result.status_code >= 400:
+                return result
+            try:
+                cache.set(key, result, timeout or ledger_cache.DEFAULT_TIMEOUT)
+            except Exception as e:
+                print(f"Warning: Ledger cache store failed: {e}")
+            return result
+
+        return wrapper
+    return decorator
@@ -0,0 +1,245 @@
+"""
+Ledger service - applies wallet balance changes as atomic SQL deltas
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from django.db import transaction as db_transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.utils import timezone
+from ..models import Transaction, Wallet, WalletBalanceSnapshot
+from .budget_service import budget_service
+from .ledger_cache import ledger_cache
+from .rollup_service import local_day, rollup_service
+
+
+# Types that increase balance
+INFLOW_TYPES = ('income', 'debt_borrow', 'debt_collect')
+# Types that decrease balance
+OUTFLOW_TYPES = ('expense', 'debt_loan', 'debt_repay')
+
+
+class LedgerEntry(NamedTuple):
+    """Snapshot of the Transaction fields that affect wallet balances"""
+    wallet_id: int
+    category_id: Optional[int]
+    transaction_type: str
+    amount: Decimal
+    date: Optional[datetime]
+
+
+def signed_amount(transaction_type: str, amount) -> Decimal:
+    """
+    Returns the amount with the correct sign based on transaction type.
+    Positive for adding to wallet, Negative for subtracting.
+    """
+    if transaction_type in INFLOW_TYPES:
+        return Decimal(str(amount))
+    elif transaction_type in OUTFLOW_TYPES:
+        return -Decimal(str(amount))
+    return Decimal(0)
+
+
+class BalanceChange(NamedTuple):
+    """Stored vs recomputed balance of one wallet"""
+    wallet_id: int
+    name: str
+    old_balance: Decimal
+    new_balance: Decimal
+
+
+class LedgerService:
+    """
+    Service for applying signed balance deltas to wallets.
+
+    Balances are never read into Python and written back: every change is a
+    single `UPDATE ... SET balance = balance + delta`, so concurrent writers
+    on the same wallet cannot lose each other's updates.
+    """
+
+    LEDGER_FIELDS = ('wallet_id', 'category_id', 'transaction_type', 'amount', 'date')
+
+    def entry_for(self, instance: Transaction) -> LedgerEntry:
+        """Build a ledger entry from the current (in-memory) state of a transaction"""
+        return LedgerEntry(
+            wallet_id=instance.wallet_id,
+            category_id=instance.category_id,
+            transaction_type=instance.transaction_type,
+            amount=Decimal(str(instance.amount)),
+            date=instance.date,
+        )
+
+    def loaded_entry(self, instance: Transaction) -> Optional[LedgerEntry]:
+        """
+        Ledger entry for the state the transaction had when it was loaded
+        from the database, or None if it was never persisted.
+        """
+        loaded = getattr(instance, '_loaded_values', None)
+        if not loaded or any(field not in loaded for field in self.LEDGER_FIELDS):
+            return None
+        return LedgerEntry(
+            wallet_id=loaded['wallet_id'],
+            category_id=loaded['category_id'],
+            transaction_type=loaded['transaction_type'],
+            amount=Decimal(str(loaded['amount'])),
+            date=loaded['date'],
+        )
+
+    def load_snapshot(self, instance: Transaction) -> None:
+        """
+        Fetch the stored ledger fields for an instance that was not loaded
+        through the ORM (e.g. built by hand with an existing pk).
+        """
+        row = Transaction.objects.filter(pk=instance.pk).values(*self.LEDGER_FIELDS).first()
+        if row:
+            instance._loaded_values = row
+
+    def remember(self, instance: Transaction) -> None:
+        """Mark the current state of the instance as the persisted one"""
+        instance._loaded_values = self.entry_for(instance)._asdict()
+
+    def wallet_deltas(self, added: Iterable[LedgerEntry] = (),
+                      removed: Iterable[LedgerEntry] = ()) -> Dict[int, Decimal]:
+        """Aggregate entries into one signed delta per wallet"""
+        deltas = defaultdict(Decimal)
+        for entry in added:
+            deltas[entry.wallet_id] += signed_amount(entry.transaction_type, entry.amount)
+        for entry in removed:
+            deltas[entry.wallet_id] -= signed_amount(entry.transaction_type, entry.amount)
+        return {wallet_id: delta for wallet_id, delta in deltas.items() if delta}
+
+    def post(self, added: Iterable[LedgerEntry] = (), removed: Iterable[LedgerEntry] = ()) -> None:
+        """
+        Apply the effect of added entries and revert the effect of removed ones.
+
+        An update that moves a transaction between wallets is posted as one
+        removed + one added entry and ends up as a single UPDATE statement.
+        The daily rollups, budget spend counters and balance snapshots are
+        adjusted in the same DB transaction, and the ledger cache version is
+        bumped once it commits.
+        """
+        added, removed = list(added), list(removed)
+        deltas = self.wallet_deltas(added, removed)
+        with db_transaction.atomic(savepoint=False):
+            self.apply_wallet_deltas(deltas)
+            rollup_service.apply(rollup_service.rollup_deltas(added, removed))
+            budget_service.apply_spent_deltas(budget_service.spent_deltas(added, removed))
+            self.apply_snapshot_deltas(self.snapshot_deltas(added, removed))
+        ledger_cache.bump_on_commit()
+
+    def apply_wallet_deltas(self, deltas: Dict[int, Decimal]) -> int:
+        """
+        Add signed deltas to wallet balances in one UPDATE statement
+
+        Args:
+            deltas: Mapping wallet_id -> signed amount
+
+        Returns:
+            Number of wallet rows updated
+        """
+        deltas = {wallet_id: delta for wallet_id, delta in deltas.items() if delta}
+        if not deltas:
+            return 0
+
+        if len(deltas) == 1:
+            (wallet_id, delta), = deltas.items()
+            qs = Wallet.objects.filter(pk=wallet_id)
+            increment = Value(delta)
+        else:
+            qs = Wallet.objects.filter(pk__in=list(deltas))
+            increment = Case(
+                *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+                default=Value(Decimal(0)),
+                output_field=DecimalField(max_digits=15, decimal_places=2),
+            )
+
+        with db_transaction.atomic(savepoint=False):
+            return qs.update(balance=F('balance') + increment, updated_at=timezone.now())
+
+    def snapshot_deltas(self, added: Iterable[LedgerEntry] = (),
+                        removed: Iterable[LedgerEntry] = ()) -> Dict[Tuple[int, date], Decimal]:
+        """Aggregate entries into one signed delta per (wallet, local day)"""
+        deltas = defaultdict(Decimal)
+        for entry in added:
+            deltas[(entry.wallet_id, local_day(entry.date))] += signed_amount(entry.transaction_type, entry.amount)
+        for entry in removed:
+            deltas[(entry.wallet_id, local_day(entry.date))] -= signed_amount(entry.transaction_type, entry.amount)
+        return {key: delta for key, delta in deltas.items() if delta}
+
+    def apply_snapshot_deltas(self, deltas: Dict[Tuple[int, date], Decimal]) -> None:
+        """
+        Shift the balance snapshots taken on or after each entry's day.
+        Usually matches no row: new transactions are dated after the latest
+        snapshot (yesterday).
+        """
+        for (wallet_id, day), delta in deltas.items():
+            WalletBalanceSnapshot.objects.filter(wallet_id=wallet_id, day__gte=day).update(
+                balance=F('balance') + delta
+            )
+
+    def signed_sums(self, wallet_ids: Optional[Iterable[int]] = None) -> Dict[int, Decimal]:
+        """
+        Balance implied by the transactions of each wallet, in one grouped query
+
+        Args:
+            wallet_ids: Restrict to these wallets (default: all)
+
+        Returns:
+            Mapping wallet_id -> signed sum (wallets without transactions are absent)
+        """
+        signed = Case(
+            When(transaction_type__in=INFLOW_TYPES, then=F('amount')),
+            When(transaction_type__in=OUTFLOW_TYPES, then=-F('amount')),
+            default=Value(Decimal(0)),
+            output_field=DecimalField(max_digits=15, decimal_places=2),
+        )
+        qs = Transaction.objects.all()
+        if wallet_ids is not None:
+            qs = qs.filter(wallet_id__in=list(wallet_ids))
+        rows = qs.values('wallet_id').annotate(total=Sum(signed)).order_by()
+        return {row['wallet_id']: row['total'] or Decimal(0) for row in rows}
+
+    def rebuild_balances(self, wallet_ids: Optional[Iterable[int]] = None,
+                         dry_run: bool = False) -> List[BalanceChange]:
+        """
+        Recompute wallet balances from the Transaction table.
+
+        The wallets are locked (SELECT ... FOR UPDATE) before the sums are
+        read, so a concurrent write waits for the rebuild and then applies
+        its delta on top of the corrected balance. All changed wallets are
+        written with a single UPDATE.
+
+        Args:
+            wallet_ids: Restrict to these wallets (default: all)
+            dry_run: Compute and report the differences without writing
+
+        Returns:
+            One BalanceChange per wallet whose stored balance was wrong
+        """
+        with db_transaction.atomic():
+            wallets = Wallet.objects.order_by('pk')
+            if wallet_ids is not None:
+                wallets = wallets.filter(pk__in=list(wallet_ids))
+            locked = list(wallets.select_for_update().values_list('pk', 'name', 'balance'))
+            sums = self.signed_sums([pk for pk, _, _ in locked] if wallet_ids is not None else None)
+
+            changes = [
+                BalanceChange(pk, name, balance, sums.get(pk, Decimal(0)))
+                for pk, name, balance in locked
+                if balance != sums.get(pk, Decimal(0))
+            ]
+            if changes and not dry_run:
+                Wallet.objects.filter(pk__in=[change.wallet_id for change in changes]).update(
+                    balance=Case(
+                        *[When(pk=change.wallet_id, then=Value(change.new_balance)) for change in changes],
+                        output_field=DecimalField(max_digits=15, decimal_places=2),
+                    ),
+                    updated_at=timezone.now()
+                )
+                ledger_cache.bump_on_commit()
+        return changes
+
+
+# Singleton instance
+ledger_service = LedgerService()
@@ -0,0 +1,192 @@
+"""
+LLM cache - exact and semantic response cache for AIService
+"""
+import hashlib
+import re
+import threading
+from typing import Dict, Optional
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from .embedding_service import embedding_service
+from .retrieval_service import estimate_tokens
+
+
+def _digest(text: Optional[str]) -> str:
+    return hashlib.sha256((text or "").encode('utf-8')).hexdigest()[:32]
+
+
+def _numbers(text: str) -> str:
+    """Every number in a text, in order ("cà phê 30k" and "cà phê 40k" must not share an answer)"""
+    return " ".join(re.findall(r'\d+(?:[.,]\d+)*', text))
+
+
+class LLMCache:
+    """
+    Response cache in front of the LLM calls.
+
+    Exact tier: one Redis entry per (model, system prompt hash, scope,
+    request text hash). `scope` is set by callers whose answer depends on
+    more than the text, e.g. chat uses the ledger version and local date,
+    so any data change invalidates cached answers.
+
+    Semantic tier (LLM_SEMANTIC_CACHE, and only for callers that opt in):
+    per (model, system prompt, scope) the last LLM_SEMANTIC_CACHE_SIZE
+    request embeddings are kept with their answers; a request whose cosine
+    similarity to one of them reaches LLM_SEMANTIC_THRESHOLD reuses that
+    answer, provided both texts contain exactly the same numbers.
+
+    Counters (per process) report the hit rate and the tokens, generation
+    time and estimated cost saved.
+    """
+
+    KEY_PREFIX = "llm"
+
+    def __init__(self):
+        self.enabled = getattr(settings, 'LLM_CACHE_ENABLED', True)
+        self.ttl = getattr(settings, 'LLM_CACHE_TTL', 86400)
+        self.semantic_enabled = getattr(settings, 'LLM_SEMANTIC_CACHE', False)
+        self.semantic_threshold = getattr(settings, 'LLM_SEMANTIC_THRESHOLD', 0.95)
+        self.semantic_size = getattr(settings, 'LLM_SEMANTIC_CACHE_SIZE', 256)
+        self.price_input = getattr(settings, 'LLM_PRICE_INPUT_PER_1M', 0.0)
+        self.price_output = getattr(settings, 'LLM_PRICE_OUTPUT_PER_1M', 0.0)
+        self._lock = threading.Lock()
+        self._stats = {
+            "exact_hits": 0, "semantic_hits": 0, "misses": 0,
+            "input_tokens_saved": 0, "output_tokens_saved": 0, "seconds_saved": 0.0,
+        }
+
+    def _namespace(self, model: str, system_prompt: Optional[str], scope: str) -> str:
+        return f"{self.KEY_PREFIX}:{model}:{_digest(system_prompt)}:{scope}"
+
+    def lookup(self, model: str, system_prompt: Optional[str], text: str,
+               scope: str = "", semantic: bool = False) -> Optional[str]:
+        """
+        Cached answer for a request, if any
+
+        Args:
+            model: Model identifier
+            system_prompt: System prompt of the call
+            text: Text identifying the request (usually the prompt)
+            scope: Extra invalidation key (e.g. ledger version)
+            semantic: Also accept near-duplicate texts
+
+        Returns:
+            The cached answer, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        namespace = self._namespace(model, system_prompt, scope)
+        try:
+            entry = cache.get(f"{namespace}:{_digest(text)}")
+            if entry is not None:
+                self._record(entry, "exact_hits")
+                return entry["answer"]
+            if semantic and self.semantic_enabled:
+                entry = self._semantic_lookup(namespace, text)
+                if entry is not None:
+                    self._record(entry, "semantic_hits")
+                    return entry["answer"]
+        except Exception as e:
+            print(f"Warning: LLM cache lookup failed: {e}")
+        self._record(None, "misses")
+        return None
+
+    def store(self, model: str, system_prompt: Optional[str], text: str, answer: str,
+              input_tokens: int, seconds: float, scope: str = "", semantic: bool = False) -> None:
+        """
+        Cache an answer (with what it cost, to report savings on later hits)
+
+        Args:
+            model: Model identifier
+            system_prompt: System prompt of the call
+            text: Text identifying the request
+            answer: LLM answer
+            input_tokens: Estimated prompt tokens of the call
+            seconds: Generation time of the call
+            scope: Extra invalidation key
+            semantic: Also index the text for near-duplicate lookups
+        """
+        if not self.enabled or not answer:
+            return
+        namespace = self._namespace(model, system_prompt, scope)
+        entry = {
+            "answer": answer,
+            "input_tokens": input_tokens,
+            "output_tokens": estimate_tokens(answer),
+            "seconds": seconds,
+        }
+        try:
+            cache.set(f"{namespace}:{_digest(text)}", entry, self.ttl)
+            if semantic and self.semantic_enabled:
+                self._semantic_store(namespace, text, entry)
+        except Exception as e:
+            print(f"Warning: LLM cache store failed: {e}")
+
+    def _semantic_lookup(self, namespace: str, text: str) -> Optional[Dict]:
+        index = cache.get(f"{namespace}:semantic")
+        if not index:
+            return None
+        numbers = _numbers(text)
+        candidates = [i for i, item in enumerate(index) if item["numbers"] == numbers]
+        if not candidates:
+            return None
+        vector = self._embed(text)
+        if vector is None:
+            return None
+        matrix = np.stack([np.frombuffer(index[i]["vector"], dtype=np.float32) for i in candidates])
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < self.semantic_threshold:
+            return None
+        return index[candidates[best]]["entry"]
+
+    def _semantic_store(self, namespace: str, text: str, entry: Dict) -> None:
+        vector = self._embed(text)
+        if vector is None:
+            return
+        key = f"{namespace}:semantic"
+        index = cache.get(key) or []
+        index.append({"vector": vector.tobytes(), "numbers": _numbers(text), "entry": entry})
+        cache.set(key, index[-self.semantic_size:], self.ttl)
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Unit-length embedding, or None if the embedding service is down"""
+        try:
+            vector = np.asarray(embedding_service.get_embedding(text, as_array=True), dtype=np.float32)
+        except Exception as e:
+            print(f"Warning: Semantic LLM cache unavailable: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _record(self, entry: Optional[Dict], outcome: str) -> None:
+        with self._lock:
+            self._stats[outcome] += 1
+            if entry is not None:
+                self._stats["input_tokens_saved"] += entry["input_tokens"]
+                self._stats["output_tokens_saved"] += entry["output_tokens"]
+                self._stats["seconds_saved"] += entry["seconds"]
+
+    def stats(self) -> Dict:
+        """Hit rate and LLM spend saved for this worker process"""
+        with self._lock:
+            stats = dict(self._stats)
+        hits = stats["exact_hits"] + stats["semantic_hits"]
+        lookups = hits + stats["misses"]
+        stats.update({
+            "enabled": self.enabled,
+            "semantic_enabled": self.semantic_enabled,
+            "hits": hits,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "llm_calls_saved": hits,
+            "estimated_cost_saved": (
+                stats["input_tokens_saved"] * self.price_input
+                + stats["output_tokens_saved"] * self.price_output
+            ) / 1_000_000,
+        })
+        return stats
+
+
+# Singleton instance
+llm_cache = LLMCache()
@@ -45,37 +45,55 @@ Rules:
         """
         Parse natural language text into transaction objects
         """
-        today_str = datetime.now().strftime("%A, %Y-%m-%d")
-        system_prompt = self.SYSTEM_PROMPT_TEMPLATE.format(today=today_str)
-        
-        prompt = f"Parse this transaction text: {text}"
+        prompt, system_prompt = self._parse_prompts(text)
         
         try:
             response = ai_service.generate_text(prompt, system_prompt)
-            # Extract JSON from response (might have markdown code blocks)
-            import json
-            import re
-            
-            # Try to find JSON in response
-            json_match = re.search(r'\[.*\]', response, re.DOTALL)
-            if json_match:
-                transactions = json.loads(json_match.group())
-            else:
-                # Try parsing entire response
-                transactions = json.loads(response)
-            
-            # Validate and normalize transactions
-            normalized = []
-            for tx in transactions:
-                normalized_tx = self._normalize_transaction(tx)
-                if normalized_tx:
-                    normalized.append(normalized_tx)
-            
-            return normalized
+            return self._parse_response(response)
         except Exception as e:
             print(f"Error parsing transactions: {e}")
             return []
     
+    async def aparse_transactions(self, text: str) -> List[Dict[str, Any]]:
+        """Async version of parse_transactions"""
+        prompt, system_prompt = self._parse_prompts(text)
+        
+        try:
+            response = await ai_service.agenerate_text(prompt, system_prompt)
+            return self._parse_response(response)
+        except Exception as e:
+            print(f"Error parsing transactions: {e}")
+            return []
+    
+    def _parse_prompts(self, text: str):
+        today_str = datetime.now().strftime("%A, %Y-%m-%d")
+        system_prompt = self.SYSTEM_PROMPT_TEMPLATE.format(today=today_str)
+        
+        prompt = f"Parse this transaction text: {text}"
+        return prompt, system_prompt
+    
+    def _parse_response(self, response: str) -> List[Dict[str, Any]]:
+        # Extract JSON from response (might have markdown code blocks)
+        import json
+        import re
+        
+        # Try to find JSON in response
+        json_match = re.search(r'\[.*\]', response, re.DOTALL)
+        if json_match:
+            transactions = json.loads(json_match.group())
+        else:
+            # Try parsing entire response
+            transactions = json.loads(response)
+        
+        # Validate and normalize transactions
+        normalized = []
+        for tx in transactions:
+            normalized_tx = self._normalize_transaction(tx)
+            if normalized_tx:
+                normalized.append(normalized_tx)
+        
+        return normalized
+    
     def suggest_category(self, description: str, merchant: Optional[str] = None) -> Optional[str]:
         """
         Suggest category for a transaction based on description/merchant
@@ -104,7 +122,8 @@ Rules:
 Return only the category name, nothing else."""
         
         try:
-            category = ai_service.generate_text(prompt, system_prompt).strip()
+            # Near-duplicate descriptions ("Grab đi làm" / "grab đi làm sáng") share an answer
+            category = ai_service.generate_text(prompt, system_prompt, semantic=True).strip()
             return category if category in ["Ăn uống", "Mua sắm", "Giao thông", "Giải trí", "Y tế", "Giáo dục", "Hóa đơn", "Khác"] else None
         except:
             return None
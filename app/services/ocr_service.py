@@ -35,13 +35,7 @@ Quy tắc:
         Process receipt image and extract transaction information using Gemini
         """
         try:
-            # Determine MIME type from filename
-            mime_type = "image/jpeg"
-            if filename:
-                if filename.lower().endswith('.png'):
-                    mime_type = "image/png"
-                elif filename.lower().endswith('.webp'):
-                    mime_type = "image/webp"
+            mime_type = self._mime_type(filename)
             
             # Analyze image with Gemini
             analysis_text = ai_service.analyze_image(image_data, self.RECEIPT_PROMPT, mime_type)
@@ -51,14 +45,35 @@ Quy tắc:
             
             return extracted
         except Exception as e:
-            print(f"Error processing receipt: {e}")
-            return {
-                "error": str(e),
-                "merchant": None,
-                "amount": 0,
-                "date": None,
-                "items": []
-            }
+            return self._error_result(e)
+    
+    async def aprocess_receipt(self, image_data: bytes, filename: Optional[str] = None) -> Dict[str, Any]:
+        """Async version of process_receipt"""
+        try:
+            analysis_text = await ai_service.aanalyze_image(image_data, self.RECEIPT_PROMPT, self._mime_type(filename))
+            return self._parse_json_response(analysis_text)
+        except Exception as e:
+            return self._error_result(e)
+    
+    def _mime_type(self, filename: Optional[str]) -> str:
+        """Determine MIME type from filename"""
+        mime_type = "image/jpeg"
+        if filename:
+            if filename.lower().endswith('.png'):
+                mime_type = "image/png"
+            elif filename.lower().endswith('.webp'):
+                mime_type = "image/webp"
+        return mime_type
+    
+    def _error_result(self, e: Exception) -> Dict[str, Any]:
+        print(f"Error processing receipt: {e}")
+        return {
+            "error": str(e),
+            "merchant": None,
+            "amount": 0,
+            "date": None,
+            "items": []
+        }
     
     def _parse_json_response(self, text: str) -> Dict[str, Any]:
         """
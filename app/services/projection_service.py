@@ -0,0 +1,125 @@
+"""
+Projection service - cash-flow forecast from recurring transaction templates
+"""
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from django.utils import timezone
+from ..models import RecurringTransaction, Wallet
+
+
+# Frequency -> step in days (fixed-length) or in months (calendar)
+DAY_STEPS = {'daily': 1, 'weekly': 7}
+MONTH_STEPS = {'monthly': 1, 'yearly': 12}
+
+
+class ProjectionService:
+    """
+    Service for projecting wallet balances from active recurring templates.
+
+    Occurrences are expanded with NumPy date arithmetic per frequency group
+    (no per-occurrence Python loop), scattered into a (wallet x day) matrix
+    of signed amounts and cumulated on top of each wallet's current balance.
+    Monthly/yearly dates follow the same rule as the recurring processor
+    (counted from the template's start date, so a 31st clamps to the end of
+    shorter months and is back on the 31st in longer ones).
+    """
+
+    MAX_DAYS = 1825  # 5 years
+
+    def _day_offsets(self, starts: np.ndarray, step: int, horizon: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Occurrence offsets (days from today) and counts per template, fixed-step templates"""
+        counts = np.where(starts <= horizon, (horizon - starts) // step + 1, 0)
+        total = int(counts.sum())
+        if not total:
+            return np.empty(0, dtype=np.int64), counts
+        first_index = np.repeat(np.cumsum(counts) - counts, counts)
+        offsets = np.repeat(starts, counts) + step * (np.arange(total) - first_index)
+        return offsets, counts
+
+    def _month_offsets(self, starts: np.ndarray, anchors: np.ndarray, step: int, today: np.datetime64,
+                       horizon: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Occurrence offsets (days from today) and counts per template, calendar-step templates"""
+        start_days = today + starts.astype('timedelta64[D]')
+        start_months = start_days.astype('datetime64[M]')
+
+        end_month = (today + np.timedelta64(horizon, 'D')).astype('datetime64[M]')
+        span = int(((end_month - start_months.min()).astype(np.int64)) // step) + 1
+        months = start_months[:, None] + step * np.arange(span)[None, :]
+        lengths = ((months + 1).astype('datetime64[D]') - months.astype('datetime64[D]')).astype(np.int64)
+        day = np.minimum(anchors[:, None], lengths)
+        dates = months.astype('datetime64[D]') + (day - 1).astype('timedelta64[D]')
+        offsets = (dates - today).astype(np.int64)
+
+        valid = offsets <= horizon
+        return offsets[valid], valid.sum(axis=1)
+
+    def project(self, days: int = 365, today: Optional[date] = None) -> Dict:
+        """
+        Projected end-of-day balance of every wallet for the next `days` days
+
+        Args:
+            days: Horizon in days
+            today: First day of the series (default: local today)
+
+        Returns:
+            Dictionary with the dates, one balance series per wallet and
+            their total. Overdue occurrences (not posted yet) count on day 0.
+        """
+        today = today or timezone.localdate()
+        wallets = list(Wallet.objects.order_by('pk').values('id', 'name', 'balance', 'exclude_from_total'))
+        wallet_index = {wallet['id']: i for i, wallet in enumerate(wallets)}
+        templates = list(RecurringTransaction.objects.filter(is_active=True).values(
+            'wallet_id', 'amount', 'transaction_type', 'frequency', 'next_run_date', 'start_date'
+        ))
+
+        np_today = np.datetime64(today, 'D')
+        flows = np.zeros((len(wallets), days + 1))
+        by_frequency: Dict[str, List[Dict]] = {}
+        for template in templates:
+            by_frequency.setdefault(template['frequency'], []).append(template)
+
+        for frequency, group in by_frequency.items():
+            starts = np.array([(t['next_run_date'] - today).days for t in group], dtype=np.int64)
+            if frequency in DAY_STEPS:
+                offsets, counts = self._day_offsets(starts, DAY_STEPS[frequency], days)
+            else:
+                anchors = np.array([(t['start_date'] or t['next_run_date']).day for t in group], dtype=np.int64)
+                offsets, counts = self._month_offsets(starts, anchors, MONTH_STEPS.get(frequency, 1), np_today, days)
+            signed = np.array([
+                float(t['amount']) if t['transaction_type'] == 'income' else -float(t['amount'])
+                for t in group
+            ])
+            rows = np.array([wallet_index[t['wallet_id']] for t in group], dtype=np.int64)
+            np.add.at(flows, (np.repeat(rows, counts), np.clip(offsets, 0, None)), np.repeat(signed, counts))
+
+        current = np.array([float(wallet['balance']) for wallet in wallets])
+        balances = current[:, None] + np.cumsum(flows, axis=1)
+        dates = [(today + timedelta(days=i)).isoformat() for i in range(days + 1)]
+
+        result_wallets = []
+        for i, wallet in enumerate(wallets):
+            lowest = int(np.argmin(balances[i]))
+            result_wallets.append({
+                "wallet_id": wallet['id'],
+                "name": wallet['name'],
+                "exclude_from_total": wallet['exclude_from_total'],
+                "current_balance": float(current[i]),
+                "end_balance": float(balances[i, -1]),
+                "min_balance": float(balances[i, lowest]),
+                "min_date": dates[lowest],
+                "balances": balances[i].round(2).tolist(),
+            })
+
+        return {
+            "start_date": today.isoformat(),
+            "days": days,
+            "template_count": len(templates),
+            "dates": dates,
+            "wallets": result_wallets,
+            "total": balances.sum(axis=0).round(2).tolist() if wallets else [0.0] * (days + 1),
+        }
+
+
+# Singleton instance
+projection_service = ProjectionService()
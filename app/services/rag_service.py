@@ -1,12 +1,20 @@
 """
 RAG (Retrieval Augmented Generation) service for financial data queries
 """
-from typing import Dict, Any, List
+import hashlib
+from typing import Dict, Any, AsyncIterator, Iterator, List, Tuple
 from datetime import datetime, timedelta
-from django.db.models import Sum, Count, Q, Avg
+from decimal import Decimal
+from asgiref.sync import sync_to_async
+from django.db.models import Sum, Count, Q, Avg, Case, DecimalField, F, Value, When
 from django.utils import timezone
 from .ai_service import ai_service
-from ..models import Transaction, Budget, Category
+from .budget_service import budget_service
+from .category_matcher import category_matcher
+from .ledger_cache import ledger_cache
+from .ledger_service import INFLOW_TYPES, OUTFLOW_TYPES
+from .retrieval_service import retrieval_service
+from ..models import Transaction, Budget, Wallet
 
 
 from ..data.app_docs import APP_FEATURES
@@ -40,6 +48,93 @@ Data provided will be in JSON format. Use it to answer the user's question accur
         Returns:
             Dictionary containing answer and session_id
         """
+        from ..models import ChatMessage
+        
+        session = self._start_turn(question, session_id)
+        prompt, cache_options = self._build_prompt(session, question)
+        
+        # 4. Generate response using AI
+        response_text = ai_service.generate_text(prompt, self.SYSTEM_PROMPT, **cache_options)
+        
+        # 5. Save Assistant Message
+        ChatMessage.objects.create(session=session, role='assistant', content=response_text)
+        
+        return {
+            "answer": response_text,
+            "session_id": session.id
+        }
+    
+    def stream_financial_data(self, question: str, session_id: int = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Same as query_financial_data, but yields the answer while it is generated.
+        
+        Args:
+            question: User's natural language question
+            session_id: Optional ID of the existing chat session
+        
+        Returns:
+            Iterator of (event, data): one "session" first (before any slow
+            work, so the client can show the conversation), then "token"
+            chunks, then "done" once the assembled answer is saved.
+            Errors end the stream with an "error" event.
+        """
+        from ..models import ChatMessage
+        
+        session = self._start_turn(question, session_id)
+        yield "session", {"session_id": session.id}
+        
+        chunks = []
+        try:
+            prompt, cache_options = self._build_prompt(session, question)
+            for chunk in ai_service.generate_text_stream(prompt, self.SYSTEM_PROMPT, **cache_options):
+                chunks.append(chunk)
+                yield "token", {"text": chunk}
+        except Exception as e:
+            yield "error", {"error": str(e), "session_id": session.id}
+            return
+        
+        # 5. Save Assistant Message (once, with the full answer)
+        message = ChatMessage.objects.create(session=session, role='assistant', content="".join(chunks))
+        yield "done", {"session_id": session.id, "message_id": message.id}
+    
+    async def aquery_financial_data(self, question: str, session_id: int = None) -> Dict[str, Any]:
+        """Async version of query_financial_data (ORM work runs in the sync thread)"""
+        from ..models import ChatMessage
+        
+        session = await sync_to_async(self._start_turn)(question, session_id)
+        prompt, cache_options = await sync_to_async(self._build_prompt)(session, question)
+        
+        response_text = await ai_service.agenerate_text(prompt, self.SYSTEM_PROMPT, **cache_options)
+        
+        await ChatMessage.objects.acreate(session=session, role='assistant', content=response_text)
+        
+        return {
+            "answer": response_text,
+            "session_id": session.id
+        }
+    
+    async def astream_financial_data(self, question: str, session_id: int = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Async version of stream_financial_data (same events)"""
+        from ..models import ChatMessage
+        
+        session = await sync_to_async(self._start_turn)(question, session_id)
+        yield "session", {"session_id": session.id}
+        
+        chunks = []
+        try:
+            prompt, cache_options = await sync_to_async(self._build_prompt)(session, question)
+            async for chunk in ai_service.agenerate_text_stream(prompt, self.SYSTEM_PROMPT, **cache_options):
+                chunks.append(chunk)
+                yield "token", {"text": chunk}
+        except Exception as e:
+            yield "error", {"error": str(e), "session_id": session.id}
+            return
+        
+        message = await ChatMessage.objects.acreate(session=session, role='assistant', content="".join(chunks))
+        yield "done", {"session_id": session.id, "message_id": message.id}
+    
+    def _start_turn(self, question: str, session_id: int = None):
+        """Get or create the chat session and save the user's message"""
         from ..models import ChatSession, ChatMessage
         
         # Get or Create Session
@@ -54,18 +149,41 @@ Data provided will be in JSON format. Use it to answer the user's question accur
             
         # 1. Save User Message
         ChatMessage.objects.create(session=session, role='user', content=question)
+        return session
+    
+    def _build_prompt(self, session, question: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Prompt with conversation history, app docs and the financial data context
         
-        # 2. Get Chat History (Last 5 messages for context)
-        history = ChatMessage.objects.filter(session=session).order_by('created_at')[:10] # Get last 10 messages
+        Returns:
+            (prompt, cache options for ai_service). Answers are cached per
+            question, earlier turns of the conversation, ledger version,
+            local day and what the data context was selected by (see
+            _context_key). Only the question is embedded for the semantic
+            tier, which therefore only merges rephrasings that ask for the
+            same data.
+        """
+        from ..models import ChatMessage
+        
+        # 2. Get Chat History (last 10 messages, oldest first; the newest is
+        # the current question, saved by _start_turn)
+        history = list(ChatMessage.objects.filter(session=session).order_by('-created_at', '-id')[:10])[::-1]
         history_text = ""
         for msg in history:
             history_text += f"{msg.role}: {msg.content}\n"
+        earlier_turns = "".join(f"{msg.role}: {msg.content}\n" for msg in history[:-1])
+        
+        # Read before the data, so an answer built from older data can only
+        # be stored under the version that is already outdated
+        cache_scope = f"ledger:{ledger_cache.get_version()}:{timezone.localdate()}"
+        if earlier_turns:
+            cache_scope += f":{hashlib.sha256(earlier_turns.encode('utf-8')).hexdigest()[:16]}"
         
         # 3. Get Financial Data Context
         data_context = self._extract_data_context(question)
         context_text = self._format_context(data_context)
+        cache_scope += f":{self._context_key(question, data_context)}"
         
-        # 4. Generate response using AI
         prompt = f'''History of current conversation:
 {history_text}
 
@@ -78,16 +196,25 @@ Question: {question}
 {context_text}
 
 Answer:'''
-        
-        response_text = ai_service.generate_text(prompt, self.SYSTEM_PROMPT)
-        
-        # 5. Save Assistant Message
-        ChatMessage.objects.create(session=session, role='assistant', content=response_text)
-        
-        return {
-            "answer": response_text,
-            "session_id": session.id
-        }
+        return prompt, {"cache_text": question, "cache_scope": cache_scope, "semantic": True}
+    
+    def _context_key(self, question: str, data_context: Dict[str, Any]) -> str:
+        """
+        What the data context was selected by: resolved period (local days),
+        category, transaction type and keywords of the question. Part of the
+        cache scope, so "tháng này" / "tháng trước" or "hôm nay" / "hôm qua"
+        never share an answer, however close their embeddings are.
+        """
+        period = data_context['period']
+        days = [timezone.localtime(datetime.fromisoformat(period[edge])).date().isoformat()
+                for edge in ('start', 'end')]
+        category_name = category_matcher.match(question)
+        parts = days + [
+            category_name or "",
+            retrieval_service.infer_type(question) or "",
+            " ".join(sorted(retrieval_service.keywords(question, exclude=[category_name] if category_name else ()))),
+        ]
+        return hashlib.sha256("|".join(parts).encode('utf-8')).hexdigest()[:16]
     
     def _extract_data_context(self, question: str) -> Dict[str, Any]:
         """
@@ -125,6 +252,20 @@ Answer:'''
                 start_date = current_month_start
                 end_date = now
         
+        # Pattern: tháng mm or tháng mm/yyyy (e.g. "tháng 3")
+        elif re.search(r'tháng (\d{1,2})(?:[/-](\d{4}))?', question_lower):
+            month_match = re.search(r'tháng (\d{1,2})(?:[/-](\d{4}))?', question_lower)
+            month = int(month_match.group(1))
+            # Without a year, "tháng 12" asked in January means last December
+            year = int(month_match.group(2)) if month_match.group(2) else now.year - (month > now.month)
+            if 1 <= month <= 12:
+                start_date = timezone.make_aware(datetime(year, month, 1))
+                next_month = datetime(year + (month == 12), month % 12 + 1, 1)
+                end_date = timezone.make_aware(next_month) - timedelta(microseconds=1)
+            else:
+                start_date = current_month_start
+                end_date = now
+        
         # Check for relative time references if no specific date matched
         elif "hôm nay" in question_lower:
             start_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -144,30 +285,80 @@ Answer:'''
             start_date = current_month_start
             end_date = now
         
-        # Check for category mentions
-        category_name = None
-        for cat in Category.objects.all():
-            if cat.name.lower() in question_lower:
-                category_name = cat.name
-                break
-        
-        # Get transaction data
-        transactions = Transaction.objects.filter(
-            date__gte=start_date,
-            date__lte=end_date
+        if timezone.is_naive(start_date):
+            start_date = timezone.make_aware(start_date)
+        if timezone.is_naive(end_date):
+            end_date = timezone.make_aware(end_date)
+        
+        # Check for category mentions (cached automaton, no table scan)
+        category_name = category_matcher.match(question)
+        
+        context.update(self._build_context(question_lower, start_date, end_date, category_name))
+        
+        # Most relevant transactions of the period (vector + SQL retrieval),
+        # packed within the prompt token budget
+        retrieved = retrieval_service.retrieve(
+            question, start_date, end_date, category_name=category_name
         )
+        context['transactions_list'] = retrieved['rows']
+        if retrieved['keyword_totals']:
+            # Exact totals of ALL period transactions matching the question's keywords
+            context['keyword_totals'] = retrieved['keyword_totals']
         
-        if category_name:
-            transactions = transactions.filter(category__name=category_name)
+        return context
+    
+    def _build_context(self, question_lower: str, start_date: datetime, end_date: datetime,
+                       category_name: str = None) -> Dict[str, Any]:
+        """
+        Totals, wallet balances, budget and category breakdown of a period
+        in at most three queries:
         
-        total_income = transactions.filter(transaction_type='income').aggregate(Sum('amount'))['amount__sum'] or 0
-        total_expense = transactions.filter(transaction_type='expense').aggregate(Sum('amount'))['amount__sum'] or 0
-        transaction_count = transactions.count()
+        1. Transactions from the period start grouped by category, with
+           conditional sums per type for the period and, for a past period,
+           the signed total of everything after it (balance at period end =
+           current balance - what happened since).
+        2. Total wallet balance.
+        3. Budget of the mentioned category (only if a category is mentioned).
+        
+        Args:
+            question_lower: Lowercased question
+            start_date: Period start (aware)
+            end_date: Period end (aware)
+            category_name: Category mentioned in the question
+        
+        Returns:
+            Dictionary with "period", "totals" and, when relevant, "budget" and "categories"
+        """
+        context = {}
+        in_period = Q(date__lte=end_date)
+        is_past = timezone.localdate(end_date) < timezone.localdate()
+        money = DecimalField(max_digits=17, decimal_places=2)
+        
+        transactions = Transaction.objects.filter(date__gte=start_date)
+        if not is_past:
+            transactions = transactions.filter(in_period)
+        groups = list(transactions.values('category__name').annotate(
+            income=Sum('amount', filter=in_period & Q(transaction_type='income')),
+            expense=Sum('amount', filter=in_period & Q(transaction_type='expense')),
+            count=Count('id', filter=in_period),
+            after=Sum(
+                Case(
+                    When(transaction_type__in=INFLOW_TYPES, then=F('amount')),
+                    When(transaction_type__in=OUTFLOW_TYPES, then=-F('amount')),
+                    default=Value(Decimal(0)),
+                    output_field=money,
+                ),
+                filter=Q(date__gt=end_date),
+            ),
+        ).order_by())
+        
+        selected = [g for g in groups if g['category__name'] == category_name] if category_name else groups
+        total_income = sum((g['income'] or Decimal(0) for g in selected), Decimal(0))
+        total_expense = sum((g['expense'] or Decimal(0) for g in selected), Decimal(0))
+        transaction_count = sum(g['count'] for g in selected)
         
         # Calculate Real Wallet Balance (Total Assets)
-        from ..models import Wallet
-        wallets = Wallet.objects.all()
-        real_wallet_balance = sum(w.balance for w in wallets)
+        real_wallet_balance = Wallet.objects.aggregate(total=Sum('balance'))['total'] or Decimal(0)
         
         context['period'] = {
             'start': start_date.isoformat(),
@@ -181,15 +372,19 @@ Answer:'''
             'real_wallet_balance': float(real_wallet_balance), # This is the true "Current Balance"
             'count': transaction_count,
         }
+        if is_past:
+            # Total wallet balance at the end of the (past) period, e.g. "số dư cuối tháng trước"
+            since = sum((g['after'] or Decimal(0) for g in groups), Decimal(0))
+            context['totals']['balance_at_period_end'] = float(real_wallet_balance - since)
         
         # Get budget data if category is mentioned
         if category_name:
-            budget = Budget.objects.filter(
+            budget = budget_service.with_spent(Budget.objects.filter(
                 category__name=category_name,
                 start_date__lte=end_date,
                 end_date__gte=start_date,
                 is_active=True
-            ).first()
+            )).first()
             
             if budget:
                 context['budget'] = {
@@ -201,37 +396,18 @@ Answer:'''
         
         # Get category breakdown if asking about spending
         if "tiêu" in question_lower or "chi" in question_lower:
-            category_breakdown = Transaction.objects.filter(
-                transaction_type='expense',
-                date__gte=start_date,
-                date__lte=end_date,
-                category__isnull=False
-            ).values('category__name').annotate(
-                total=Sum('amount')
-            ).order_by('-total')[:5]
-            
+            spending = sorted(
+                (g for g in groups if g['category__name'] is not None and g['expense']),
+                key=lambda g: g['expense'],
+                reverse=True
+            )[:5]
             context['categories'] = [
                 {
                     'name': item['category__name'],
-                    'amount': float(item['total'])
+                    'amount': float(item['expense'])
                 }
-                for item in category_breakdown
+                for item in spending
             ]
-
-        # Add List of Transactions (Limit 10 newest) for specific queries
-        # This helps AI answer "List my transactions" or "What did I buy?"
-        recent_tx = transactions.select_related('category', 'wallet').order_by('-date')[:15]
-        context['transactions_list'] = [
-            {
-                "date": tx.date.strftime("%Y-%m-%d %H:%M"),
-                "desc": tx.description,
-                "amount": float(tx.amount),
-                "type": tx.transaction_type,
-                "category": tx.category.name if tx.category else "Uncategorized",
-                "wallet": tx.wallet.name
-            }
-            for tx in recent_tx
-        ]
         
         return context
     
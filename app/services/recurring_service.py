@@ -0,0 +1,163 @@
+"""
+Recurring service - posts due occurrences of recurring transaction templates
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional
+from dateutil.relativedelta import relativedelta
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from ..models import RecurringTransaction, Transaction
+from .ledger_cache import ledger_cache
+from .ledger_service import ledger_service
+from .vector_service import vector_service
+
+
+STEPS = {
+    'daily': relativedelta(days=1),
+    'weekly': relativedelta(weeks=1),
+    'monthly': relativedelta(months=1),
+    'yearly': relativedelta(years=1),
+}
+
+
+class RecurringService:
+    """
+    Service for turning due recurring templates into transactions.
+
+    Templates are claimed with `SELECT ... FOR UPDATE SKIP LOCKED`, so
+    overlapping runs (two beat ticks, several workers) split the work instead
+    of posting the same occurrence twice. Every missed occurrence up to
+    today is generated in the same pass and bulk inserted; balances, rollups,
+    budget counters and snapshots get one batched ledger post per batch.
+    The unique (recurring_transaction, occurrence_date) constraint makes a
+    repeated occurrence impossible even if the claim were bypassed.
+    """
+
+    BATCH_SIZE = 100  # Templates claimed per DB transaction
+    MAX_CATCHUP = 366  # Occurrences generated per template per run
+
+    def occurrence(self, anchor: date, frequency: str, index: int) -> date:
+        """
+        Occurrence number `index` of a schedule starting on `anchor`.
+
+        Always computed from the anchor, never from the previous occurrence,
+        so a schedule on the 31st clamps in short months and comes back
+        (Jan 31, Feb 28, Mar 31) instead of drifting to the 28th.
+        """
+        return anchor + STEPS.get(frequency, STEPS['monthly']) * index
+
+    def index_of(self, anchor: date, frequency: str, current: date) -> int:
+        """Index of the first occurrence on or after `current`"""
+        if frequency == 'daily':
+            index = (current - anchor).days
+        elif frequency == 'weekly':
+            index = -(-(current - anchor).days // 7)
+        else:
+            months = (current.year - anchor.year) * 12 + current.month - anchor.month
+            index = months // 12 if frequency == 'yearly' else months
+            if self.occurrence(anchor, frequency, index) < current:
+                index += 1
+        return max(index, 0)
+
+    def occurrences(self, recurring: RecurringTransaction, today: date) -> List[date]:
+        """Due occurrence dates of a template, oldest first (at most MAX_CATCHUP)"""
+        anchor = recurring.start_date or recurring.next_run_date
+        index = self.index_of(anchor, recurring.frequency, recurring.next_run_date)
+        dates = []
+        current = self.occurrence(anchor, recurring.frequency, index)
+        while current <= today and len(dates) < self.MAX_CATCHUP:
+            dates.append(current)
+            index += 1
+            current = self.occurrence(anchor, recurring.frequency, index)
+        return dates
+
+    def next_date(self, recurring: RecurringTransaction, current: date) -> date:
+        """First occurrence of a template after `current`"""
+        anchor = recurring.start_date or recurring.next_run_date
+        return self.occurrence(anchor, recurring.frequency,
+                               self.index_of(anchor, recurring.frequency, current + timedelta(days=1)))
+
+    def build_transaction(self, recurring: RecurringTransaction, occurrence: date) -> Transaction:
+        """Unsaved transaction for one occurrence, dated at local midnight of that day"""
+        return Transaction(
+            wallet_id=recurring.wallet_id,
+            category_id=recurring.category_id,
+            amount=recurring.amount,
+            description=recurring.description or recurring.name,
+            transaction_type=recurring.transaction_type,
+            date=timezone.make_aware(datetime.combine(occurrence, time.min)),
+            recurring_transaction=recurring,
+            occurrence_date=occurrence,
+        )
+
+    def process_due(self, today: Optional[date] = None, batch_size: Optional[int] = None) -> Dict:
+        """
+        Post every due occurrence of every active template
+
+        Args:
+            today: Post occurrences up to this day (default: local today)
+            batch_size: Templates per DB transaction
+
+        Returns:
+            Dictionary with templates processed and transactions created
+        """
+        today = today or timezone.localdate()
+        batch_size = batch_size or self.BATCH_SIZE
+        templates = created = 0
+        while True:
+            try:
+                claimed, posted = self._process_batch(today, batch_size)
+            except Exception as e:
+                print(f"Error processing recurring transactions: {e}")
+                break
+            templates += claimed
+            created += posted
+            if claimed < batch_size:
+                break
+        return {"templates": templates, "created": created}
+
+    def _process_batch(self, today: date, batch_size: int):
+        with db_transaction.atomic():
+            due = list(
+                RecurringTransaction.objects.select_for_update(skip_locked=True).filter(
+                    next_run_date__lte=today,
+                    is_active=True
+                ).order_by('pk')[:batch_size]
+            )
+            if not due:
+                return 0, 0
+
+            plan = {recurring.pk: self.occurrences(recurring, today) for recurring in due}
+            # Occurrences already posted (e.g. by a run that died before
+            # advancing next_run_date) are skipped, not duplicated
+            posted = set(Transaction.objects.filter(
+                recurring_transaction_id__in=list(plan),
+                occurrence_date__gte=min(recurring.next_run_date for recurring in due),
+            ).values_list('recurring_transaction_id', 'occurrence_date'))
+
+            new = [
+                self.build_transaction(recurring, occurrence)
+                for recurring in due
+                for occurrence in plan[recurring.pk]
+                if (recurring.pk, occurrence) not in posted
+            ]
+            if new:
+                new = Transaction.objects.bulk_create(new)
+                ledger_service.post(added=[ledger_service.entry_for(t) for t in new])
+                vector_service.enqueue_sync_many([t.id for t in new])
+
+            now = timezone.now()
+            for recurring in due:
+                # Templates created before start_date existed are anchored on first run
+                recurring.start_date = recurring.start_date or recurring.next_run_date
+                dates = plan[recurring.pk] or [recurring.next_run_date - timedelta(days=1)]
+                recurring.next_run_date = self.next_date(recurring, dates[-1])
+                recurring.updated_at = now
+            RecurringTransaction.objects.bulk_update(due, ['start_date', 'next_run_date', 'updated_at'])
+            # Projections depend on next_run_date (bulk_update sends no signals)
+            ledger_cache.bump_on_commit()
+        return len(due), len(new)
+
+
+# Singleton instance
+recurring_service = RecurringService()
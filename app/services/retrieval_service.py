@@ -0,0 +1,234 @@
+"""
+Retrieval service - hybrid (vector + SQL) transaction retrieval for the RAG prompt
+"""
+import functools
+import json
+import math
+import operator
+import re
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Sequence
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from ..models import Transaction
+from ..qdrant_client import get_qdrant_service
+from .embedding_service import embedding_service
+
+
+# Question words that say nothing about which transactions are relevant
+STOPWORDS = {
+    'tôi', 'mình', 'của', 'cho', 'trong', 'bao', 'nhiêu', 'tiền', 'đã', 'đi', 'và',
+    'các', 'những', 'này', 'trước', 'tháng', 'năm', 'ngày', 'hôm', 'nay', 'qua',
+    'chi', 'tiêu', 'thu', 'nhập', 'là', 'có', 'không', 'được', 'với', 'vào', 'lúc',
+    'how', 'much', 'did', 'spend', 'spent', 'on', 'in', 'the', 'what', 'my', 'for',
+}
+
+TYPE_HINTS = (
+    ('income', ('thu nhập', 'lương', 'income', 'earn')),
+    ('expense', ('chi tiêu', 'tiêu', 'spend', 'spent', 'mua')),
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for prompt budgeting (~4 characters per token)"""
+    return math.ceil(len(text) / 4)
+
+
+class RetrievalService:
+    """
+    Service for picking the transactions worth putting in the RAG prompt.
+
+    1. The question is embedded (embedding_service, cached) and Qdrant is
+       queried for the nearest transactions, filtered by date range and type
+       on the payload.
+    2. SQL adds lexical candidates (descriptions containing the question's
+       keywords in the same range) and is the source of truth for the rows:
+       vector hits that were deleted or moved out of range are dropped.
+    3. Candidates are re-ranked: semantic similarity, keyword overlap and
+       the row's weight in the period's SQL totals for its type.
+    4. The best rows are packed into the prompt until the token budget is
+       spent. Totals over ALL keyword matches come from SQL, so "how much
+       did I spend on X" is answered exactly even when rows are cut.
+
+    The vector searcher and embedder are injectable so the pipeline can be
+    evaluated offline (benchmarks/eval_retrieval.py).
+    """
+
+    SEMANTIC_WEIGHT = 0.6
+    LEXICAL_WEIGHT = 0.3
+    AMOUNT_WEIGHT = 0.1
+    VALUE_FIELDS = ('id', 'date', 'description', 'amount', 'transaction_type',
+                    'category__name', 'wallet__name', 'contact_person')
+
+    def __init__(self, searcher: Optional[Callable] = None, embedder: Optional[Callable] = None):
+        self._searcher = searcher
+        self._embedder = embedder
+        self.top_k = getattr(settings, 'RAG_TOP_K', 20)
+        self.candidates = getattr(settings, 'RAG_CANDIDATES', 100)
+        self.token_budget = getattr(settings, 'RAG_CONTEXT_TOKEN_BUDGET', 1500)
+
+    def embed(self, text: str):
+        if self._embedder is not None:
+            return self._embedder(text)
+        return embedding_service.get_embedding(text, as_array=True)
+
+    def vector_search(self, vector, limit: int, timestamp_range, match: Dict) -> List[Dict]:
+        if self._searcher is not None:
+            return self._searcher(vector, limit, timestamp_range, match)
+        return get_qdrant_service().search(
+            query_vector=vector,
+            limit=limit,
+            timestamp_range=timestamp_range,
+            match=match,
+        )
+
+    def keywords(self, question: str, exclude: Sequence[str] = ()) -> List[str]:
+        """Content words of a question (category names and period words removed)"""
+        text = question.lower()
+        for phrase in exclude:
+            text = text.replace(phrase.lower(), ' ')
+        words = re.findall(r'\w+', text)
+        return [w for w in dict.fromkeys(words) if len(w) >= 3 and not w.isdigit() and w not in STOPWORDS]
+
+    def infer_type(self, question: str) -> Optional[str]:
+        """Transaction type the question is clearly about, if any"""
+        text = question.lower()
+        for transaction_type, hints in TYPE_HINTS:
+            if any(hint in text for hint in hints):
+                return transaction_type
+        return None
+
+    def retrieve(self, question: str, start: datetime, end: datetime,
+                 transaction_type: Optional[str] = None, category_name: Optional[str] = None,
+                 top_k: Optional[int] = None, token_budget: Optional[int] = None) -> Dict:
+        """
+        Relevant transactions of a period, packed for the prompt
+
+        Args:
+            question: User question
+            start: Period start
+            end: Period end
+            transaction_type: Restrict to one type (default: inferred from the question)
+            category_name: Category mentioned in the question (boosts its rows)
+            top_k: Maximum rows (default: RAG_TOP_K)
+            token_budget: Maximum prompt tokens for the rows (default: RAG_CONTEXT_TOKEN_BUDGET)
+
+        Returns:
+            Dictionary with "rows", "keyword_totals", "tokens", "candidates" and "source"
+        """
+        top_k = top_k or self.top_k
+        token_budget = token_budget or self.token_budget
+        start, end = (timezone.make_aware(d) if timezone.is_naive(d) else d for d in (start, end))
+        transaction_type = transaction_type or self.infer_type(question)
+        keywords = self.keywords(question, exclude=[category_name] if category_name else ())
+
+        period = Transaction.objects.filter(date__gte=start, date__lte=end)
+        if transaction_type:
+            period = period.filter(transaction_type=transaction_type)
+
+        # 1. Vector candidates
+        semantic: Dict[int, float] = {}
+        source = "hybrid"
+        try:
+            hits = self.vector_search(
+                self.embed(question),
+                self.candidates,
+                (start.timestamp(), end.timestamp()),
+                {"transaction_type": transaction_type},
+            )
+            semantic = {int(hit["id"]): float(hit["score"]) for hit in hits}
+        except Exception as e:
+            print(f"Warning: Vector retrieval unavailable, using SQL only: {e}")
+            source = "sql"
+
+        # 2. Lexical candidates + authoritative rows
+        lexical_filter = Q()
+        for word in keywords:
+            lexical_filter |= Q(description__icontains=word) | Q(contact_person__icontains=word)
+        if category_name:
+            lexical_filter |= Q(category__name=category_name)
+        candidate_filter = Q(id__in=list(semantic))
+        if keywords or category_name:
+            candidate_filter |= lexical_filter
+        rows = list(period.filter(candidate_filter).order_by('-date').values(*self.VALUE_FIELDS)[:self.candidates * 2])
+        if not rows:
+            # Nothing matched: fall back to the newest rows of the period
+            rows = list(period.order_by('-date').values(*self.VALUE_FIELDS)[:top_k])
+            source = "recent"
+
+        # 3. Re-rank against SQL totals per type
+        type_totals = {
+            row['transaction_type']: row['total'] or Decimal(0)
+            for row in period.values('transaction_type').annotate(total=Sum('amount')).order_by()
+        }
+        for row in rows:
+            text = f"{row['description']} {row['contact_person'] or ''} {row['category__name'] or ''}".lower()
+            overlap = sum(1 for word in keywords if word in text) / len(keywords) if keywords else 0.0
+            if category_name and row['category__name'] == category_name:
+                overlap = max(overlap, 1.0)
+            total = type_totals.get(row['transaction_type']) or Decimal(0)
+            weight = float(row['amount'] / total) if total else 0.0
+            row['score'] = (
+                self.SEMANTIC_WEIGHT * semantic.get(row['id'], 0.0)
+                + self.LEXICAL_WEIGHT * overlap
+                + self.AMOUNT_WEIGHT * weight
+            )
+        rows.sort(key=lambda row: (row['score'], row['date']), reverse=True)
+
+        # 4. Pack within the token budget
+        packed, tokens = [], 0
+        for row in rows[:top_k]:
+            item = self.format_row(row)
+            cost = estimate_tokens(json.dumps(item, ensure_ascii=False))
+            if tokens + cost > token_budget:
+                break
+            packed.append(item)
+            tokens += cost
+
+        return {
+            "rows": packed,
+            "keyword_totals": self.keyword_totals(period, keywords),
+            "tokens": tokens,
+            "candidates": len(rows),
+            "source": source,
+        }
+
+    def keyword_totals(self, period, keywords: List[str]) -> Dict[str, Dict]:
+        """Exact SQL totals per type of every period row matching each keyword (one grouped query)"""
+        if not keywords:
+            return {}
+        conditions = [Q(description__icontains=word) | Q(contact_person__icontains=word) for word in keywords]
+        aggregates = {}
+        for i, condition in enumerate(conditions):
+            aggregates[f"total_{i}"] = Sum('amount', filter=condition)
+            aggregates[f"count_{i}"] = Count('id', filter=condition)
+        rows = period.filter(functools.reduce(operator.or_, conditions)).values(
+            'transaction_type'
+        ).annotate(**aggregates).order_by()
+
+        totals = {}
+        for row in rows:
+            for i, word in enumerate(keywords):
+                if row[f"count_{i}"]:
+                    totals.setdefault(word, {})[row['transaction_type']] = {
+                        "total": float(row[f"total_{i}"]), "count": row[f"count_{i}"],
+                    }
+        return totals
+
+    def format_row(self, row: Dict) -> Dict:
+        """Compact prompt representation of a transaction row"""
+        return {
+            "id": row['id'],
+            "date": timezone.localtime(row['date']).strftime("%Y-%m-%d %H:%M"),
+            "desc": row['description'],
+            "amount": float(row['amount']),
+            "type": row['transaction_type'],
+            "category": row['category__name'] or "Uncategorized",
+            "wallet": row['wallet__name'],
+        }
+
+
+# Singleton instance
+retrieval_service = RetrievalService()
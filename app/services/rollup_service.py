@@ -0,0 +1,145 @@
+"""
+Rollup service - maintains the DailyRollup table of per-day transaction totals
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from ..models import DailyRollup, Transaction
+from .ledger_cache import ledger_cache
+
+# (day, wallet_id, category_id, transaction_type)
+RollupKey = Tuple[date, int, Optional[int], str]
+
+
+def local_day(value) -> date:
+    """Calendar day of a transaction date in the current timezone"""
+    if value is None:
+        value = timezone.now()
+    if isinstance(value, datetime):
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return timezone.localdate(value)
+    return value
+
+
+class RollupService:
+    """
+    Service for keeping DailyRollup in step with the Transaction table.
+
+    Writes are applied as `UPDATE ... SET total = total + delta` on the
+    matching row, falling back to an INSERT when the row does not exist yet,
+    so concurrent writers never overwrite each other's totals.
+    """
+
+    REBUILD_BATCH_SIZE = 1000
+
+    def key_for(self, entry) -> RollupKey:
+        """Rollup row a ledger entry belongs to"""
+        return (local_day(entry.date), entry.wallet_id, entry.category_id, entry.transaction_type)
+
+    def rollup_deltas(self, added: Iterable = (), removed: Iterable = ()) -> Dict[RollupKey, Tuple[Decimal, int]]:
+        """Aggregate ledger entries into one (total, count) delta per rollup row"""
+        deltas = defaultdict(lambda: [Decimal(0), 0])
+        for entry in added:
+            delta = deltas[self.key_for(entry)]
+            delta[0] += entry.amount
+            delta[1] += 1
+        for entry in removed:
+            delta = deltas[self.key_for(entry)]
+            delta[0] -= entry.amount
+            delta[1] -= 1
+        return {key: (total, count) for key, (total, count) in deltas.items() if total or count}
+
+    def apply(self, deltas: Dict[RollupKey, Tuple[Decimal, int]]) -> None:
+        """Add (total, count) deltas to their rollup rows"""
+        if not deltas:
+            return
+        with db_transaction.atomic(savepoint=False):
+            for key, (total, count) in deltas.items():
+                self._apply_one(key, total, count)
+
+    def _apply_one(self, key: RollupKey, total: Decimal, count: int) -> None:
+        day, wallet_id, category_id, transaction_type = key
+        rows = DailyRollup.objects.filter(
+            day=day,
+            wallet_id=wallet_id,
+            category_id=category_id,
+            transaction_type=transaction_type
+        )
+        if rows.update(total=F('total') + total, count=F('count') + count):
+            return
+        if count <= 0:
+            # Nothing to revert: the row went away with its wallet (cascade delete)
+            return
+        try:
+            with db_transaction.atomic():
+                DailyRollup.objects.create(
+                    day=day,
+                    wallet_id=wallet_id,
+                    category_id=category_id,
+                    transaction_type=transaction_type,
+                    total=total,
+                    count=count
+                )
+        except IntegrityError:
+            # Another writer created the row first
+            rows.update(total=F('total') + total, count=F('count') + count)
+
+    def merge_category(self, category_id: int) -> None:
+        """
+        Move the rows of a category that is being deleted to "no category",
+        the same way its transactions are (on_delete=SET_NULL).
+        """
+        rows = list(DailyRollup.objects.filter(category_id=category_id))
+        if not rows:
+            return
+        deltas = {
+            (row.day, row.wallet_id, None, row.transaction_type): (row.total, row.count)
+            for row in rows
+        }
+        with db_transaction.atomic(savepoint=False):
+            DailyRollup.objects.filter(category_id=category_id).delete()
+            self.apply(deltas)
+
+    def rebuild(self, batch_size: Optional[int] = None) -> int:
+        """
+        Recompute every rollup row from the Transaction table.
+        Runs in one DB transaction; readers keep seeing the old rows until commit.
+
+        Returns:
+            Number of rollup rows written
+        """
+        batch_size = batch_size or self.REBUILD_BATCH_SIZE
+        rows = Transaction.objects.annotate(
+            day=TruncDate('date', tzinfo=timezone.get_current_timezone())
+        ).values(
+            'day', 'wallet_id', 'category_id', 'transaction_type'
+        ).annotate(
+            total=Sum('amount'),
+            count=Count('id')
+        ).order_by()
+
+        written = 0
+        with db_transaction.atomic():
+            DailyRollup.objects.all().delete()
+            batch = []
+            for row in rows.iterator(chunk_size=batch_size):
+                batch.append(DailyRollup(**row))
+                if len(batch) >= batch_size:
+                    DailyRollup.objects.bulk_create(batch)
+                    written += len(batch)
+                    batch = []
+            if batch:
+                DailyRollup.objects.bulk_create(batch)
+                written += len(batch)
+            ledger_cache.bump_on_commit()
+        return written
+
+
+# Singleton instance
+rollup_service = RollupService()
@@ -1,10 +1,14 @@
 """
 Vector service for syncing transaction vectors with Qdrant
 """
-from typing import Optional, List
-from django.db.models.signals import post_save, post_delete
-from django.dispatch import receiver
-from ..models import Transaction
+from functools import reduce
+from operator import or_
+from typing import Dict, Optional, List
+from django.core.cache import cache
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+from ..models import Transaction, VectorOutbox
 from ..qdrant_client import get_qdrant_service
 from .embedding_service import embedding_service
 import uuid
@@ -15,8 +19,18 @@ class VectorService:
     Service for managing transaction vectors in Qdrant
     """
     
-    def __init__(self):
-        self.qdrant = get_qdrant_service()
+    BATCH_SIZE = 64  # Transactions per embedding batch / Qdrant upsert
+    OUTBOX_BATCH_SIZE = 256  # Outbox rows claimed per drain iteration
+    OUTBOX_MAX_ATTEMPTS = 5  # After this, rows stay in the outbox as failed
+    DRAIN_DELAY = 2  # Seconds to wait so bursts of edits coalesce into one drain
+    DRAIN_LOCK_KEY = "vector_outbox:drain_lock"
+    DRAIN_SCHEDULED_KEY = "vector_outbox:drain_scheduled"
+    LAST_DRAIN_KEY = "vector_outbox:last_drain"
+    
+    @property
+    def qdrant(self):
+        """Qdrant service, connected on first use rather than at import time"""
+        return get_qdrant_service()
     
     def sync_transaction(self, transaction: Transaction) -> bool:
         """
@@ -34,14 +48,7 @@ class VectorService:
             embedding = embedding_service.get_embedding(text)
             
             # Prepare payload
-            payload = {
-                "transaction_id": transaction.id,
-                "description": transaction.description,
-                "category": transaction.category.name if transaction.category else None,
-                "amount": float(transaction.amount),
-                "transaction_type": transaction.transaction_type,
-                "date": transaction.date.isoformat(),
-            }
+            payload = self._build_payload(transaction)
             
             # Use transaction ID as point ID (Qdrant supports uint64)
             point_id = transaction.id
@@ -98,11 +105,204 @@ class VectorService:
         Returns:
             Number of successfully synced transactions
         """
-        success_count = 0
-        for transaction in transactions:
-            if self.sync_transaction(transaction):
-                success_count += 1
-        return success_count
+        return len(self._sync_many(transactions))
+    
+    def _sync_many(self, transactions: List[Transaction]) -> List[int]:
+        """
+        Embed and upsert transactions chunk by chunk.
+        Transactions whose embedding failed are left out (never upserted
+        with a placeholder vector).
+        
+        Returns:
+            IDs of the transactions that were synced
+        """
+        synced_ids = []
+        for start in range(0, len(transactions), self.BATCH_SIZE):
+            chunk = [t for t in transactions[start:start + self.BATCH_SIZE] if t.id]
+            if not chunk:
+                continue
+            try:
+                embeddings = embedding_service.get_embeddings_batch(
+                    [self._build_search_text(t) for t in chunk]
+                )
+                points = [
+                    {
+                        "id": t.id,
+                        "vector": embedding,
+                        "payload": self._build_payload(t),
+                    }
+                    for t, embedding in zip(chunk, embeddings)
+                    if embedding
+                ]
+                if points and self.qdrant.upsert_points_batch(points):
+                    synced_ids.extend(point["id"] for point in points)
+            except Exception as e:
+                print(f"Error syncing transaction batch to Qdrant: {e}")
+        return synced_ids
+    
+    # ------------------------------------------------------------------
+    # Outbox: writes are recorded in the DB transaction, synced by Celery
+    # ------------------------------------------------------------------
+    
+    def enqueue_sync(self, transaction_id: int) -> None:
+        """Record that a transaction's vector must be (re)built"""
+        self._enqueue(transaction_id, 'upsert')
+    
+    def enqueue_delete(self, transaction_id: int) -> None:
+        """Record that a transaction's vector must be removed (cancels a pending upsert)"""
+        self._enqueue(transaction_id, 'delete')
+    
+    def enqueue_sync_many(self, transaction_ids: List[int]) -> None:
+        """Record upserts for freshly inserted transactions (bulk paths)"""
+        VectorOutbox.objects.bulk_create(
+            [VectorOutbox(transaction_id=tid, operation='upsert') for tid in transaction_ids],
+            ignore_conflicts=True,
+        )
+        db_transaction.on_commit(self.schedule_drain)
+    
+    def _enqueue(self, transaction_id: int, operation: str) -> None:
+        """Insert or coalesce the outbox row for a transaction"""
+        updated = VectorOutbox.objects.filter(transaction_id=transaction_id).update(
+            operation=operation,
+            version=F('version') + 1,
+            attempts=0,
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            try:
+                with db_transaction.atomic():
+                    VectorOutbox.objects.create(transaction_id=transaction_id, operation=operation)
+            except IntegrityError:
+                # Another writer created the row first - coalesce into it
+                VectorOutbox.objects.filter(transaction_id=transaction_id).update(
+                    operation=operation, version=F('version') + 1, attempts=0
+                )
+        db_transaction.on_commit(self.schedule_drain)
+    
+    def schedule_drain(self) -> None:
+        """Schedule one delayed drain task per burst of writes"""
+        try:
+            if cache.add(self.DRAIN_SCHEDULED_KEY, 1, self.DRAIN_DELAY * 5):
+                from ..tasks.vector_tasks import drain_vector_outbox
+                drain_vector_outbox.apply_async(countdown=self.DRAIN_DELAY)
+        except Exception as e:
+            # The periodic drain picks the rows up later
+            print(f"Warning: Could not schedule vector outbox drain: {e}")
+    
+    def process_outbox(self, batch_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        Drain pending outbox rows in batches.
+        Upserts are embedded and written with one call per batch, deletes are
+        removed with one call. A row is only cleared if it was not modified
+        while it was being processed (version check).
+        
+        Returns:
+            Counters of processed operations
+        """
+        batch_size = batch_size or self.OUTBOX_BATCH_SIZE
+        stats = {"upserted": 0, "deleted": 0, "failed": 0}
+        
+        # Single-flight: concurrent drains would only duplicate work
+        if not cache.add(self.DRAIN_LOCK_KEY, 1, 300):
+            return stats
+        try:
+            cache.delete(self.DRAIN_SCHEDULED_KEY)
+            while True:
+                rows = list(
+                    VectorOutbox.objects.filter(attempts__lt=self.OUTBOX_MAX_ATTEMPTS)
+                    .order_by('enqueued_at')
+                    .values('id', 'transaction_id', 'operation', 'version')[:batch_size]
+                )
+                if not rows:
+                    break
+                failed_before = stats["failed"]
+                self._process_outbox_rows(rows, stats)
+                # Stop on a short batch, or on failures so they are retried by a later drain
+                if len(rows) < batch_size or stats["failed"] > failed_before:
+                    break
+        finally:
+            cache.delete(self.DRAIN_LOCK_KEY)
+            cache.set(self.LAST_DRAIN_KEY, timezone.now().isoformat(), None)
+        return stats
+    
+    def _process_outbox_rows(self, rows: List[dict], stats: Dict[str, int]) -> None:
+        """Apply one claimed batch of outbox rows to Qdrant"""
+        delete_rows = [r for r in rows if r['operation'] == 'delete']
+        upsert_rows = [r for r in rows if r['operation'] == 'upsert']
+        done, failed = [], []
+        
+        # Transactions that lost their description (or disappeared) lose their vector too
+        transactions = {
+            t.id: t
+            for t in Transaction.objects.filter(
+                id__in=[r['transaction_id'] for r in upsert_rows]
+            ).select_related('category')
+        }
+        for row in upsert_rows[:]:
+            tx = transactions.get(row['transaction_id'])
+            if tx is None or not tx.description:
+                upsert_rows.remove(row)
+                delete_rows.append(row)
+        
+        if delete_rows:
+            try:
+                deleted = self.qdrant.delete_points([r['transaction_id'] for r in delete_rows])
+            except Exception as e:
+                print(f"Error deleting transaction batch from Qdrant: {e}")
+                deleted = False
+            if deleted:
+                done.extend(delete_rows)
+                stats["deleted"] += len(delete_rows)
+            else:
+                failed.extend(delete_rows)
+        
+        if upsert_rows:
+            synced = set(self._sync_many([transactions[r['transaction_id']] for r in upsert_rows]))
+            for row in upsert_rows:
+                (done if row['transaction_id'] in synced else failed).append(row)
+            stats["upserted"] += len(synced)
+        
+        if done:
+            VectorOutbox.objects.filter(
+                reduce(or_, [Q(pk=r['id'], version=r['version']) for r in done])
+            ).delete()
+        if failed:
+            stats["failed"] += len(failed)
+            VectorOutbox.objects.filter(pk__in=[r['id'] for r in failed]).update(
+                attempts=F('attempts') + 1,
+                last_error="Qdrant or embedding request failed",
+            )
+    
+    def get_index_status(self) -> Dict:
+        """Outbox backlog and lag, computed in one query"""
+        pending = Q(attempts__lt=self.OUTBOX_MAX_ATTEMPTS)
+        stats = VectorOutbox.objects.aggregate(
+            pending=Count('id', filter=pending),
+            pending_upserts=Count('id', filter=pending & Q(operation='upsert')),
+            pending_deletes=Count('id', filter=pending & Q(operation='delete')),
+            failed=Count('id', filter=~pending),
+            oldest=Min('enqueued_at', filter=pending),
+        )
+        oldest = stats.pop('oldest')
+        stats["oldest_enqueued_at"] = oldest.isoformat() if oldest else None
+        stats["lag_seconds"] = (timezone.now() - oldest).total_seconds() if oldest else 0.0
+        stats["last_drain_at"] = cache.get(self.LAST_DRAIN_KEY)
+        return stats
+    
+    def _build_payload(self, transaction: Transaction) -> dict:
+        """Build Qdrant payload from transaction"""
+        return {
+            "transaction_id": transaction.id,
+            "description": transaction.description,
+            "category": transaction.category.name if transaction.category else None,
+            "amount": float(transaction.amount),
+            "transaction_type": transaction.transaction_type,
+            "date": transaction.date.isoformat(),
+            # Numeric copies for payload filters (Qdrant ranges need numbers)
+            "timestamp": transaction.date.timestamp(),
+            "category_id": transaction.category_id,
+            "wallet_id": transaction.wallet_id,
+        }
     
     def _build_search_text(self, transaction: Transaction) -> str:
         """Build searchable text from transaction"""
@@ -127,24 +327,3 @@ class VectorService:
 # Singleton instance
 vector_service = VectorService()
 
-
-# Signal handlers for automatic sync
-@receiver(post_save, sender=Transaction)
-def sync_transaction_to_qdrant(sender, instance, created, **kwargs):
-    """Automatically sync transaction to Qdrant on save"""
-    # Only sync if description exists (has content to embed)
-    if instance.description:
-        vector_service.sync_transaction(instance)
-
-
-@receiver(post_delete, sender=Transaction)
-def delete_transaction_from_qdrant(sender, instance, **kwargs):
-    """Automatically delete transaction from Qdrant on delete"""
-    if instance.qdrant_point_id:
-        vector_service.delete_transaction(
-            instance.id,
-            str(instance.qdrant_point_id)
-        )
-    else:
-        vector_service.delete_transaction(instance.id)
-
@@ -1,62 +1,43 @@
-from django.db.models.signals import post_save, post_delete, pre_save
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.db import transaction as db_transaction
 from django.dispatch import receiver
-from .models import Transaction
-from decimal import Decimal
+from .models import Budget, Category, RecurringTransaction, Transaction, Wallet
+from .services.budget_service import budget_service
+from .services.category_matcher import category_matcher
+from .services.ledger_cache import ledger_cache
+from .services.ledger_service import ledger_service, signed_amount
+from .services.rollup_service import rollup_service
+from .services.vector_service import vector_service
 
 def get_signed_amount(instance):
     """
     Returns the amount with the correct sign based on transaction type.
     Positive for adding to wallet, Negative for subtracting.
     """
-    # Types that increase balance
-    if instance.transaction_type in ['income', 'debt_borrow', 'debt_collect']:
-        return Decimal(str(instance.amount))
-    # Types that decrease balance
-    elif instance.transaction_type in ['expense', 'debt_loan', 'debt_repay']:
-        return -Decimal(str(instance.amount))
-    return Decimal(0)
+    return signed_amount(instance.transaction_type, instance.amount)
 
 @receiver(post_save, sender=Transaction)
 def update_wallet_balance_on_save(sender, instance, created, **kwargs):
     """
-    Update wallet balance when a transaction is created.
-    Note: Updates are handled by pre_save to account for diffs.
-    So this handles ONLY newly created transactions.
+    Apply the transaction to its wallet balance.
+    For updates, the old effect (captured when the instance was loaded) is
+    reverted and the new one applied in the same UPDATE statement, which
+    also covers moving a transaction to another wallet.
     """
-    if created:
-        wallet = instance.wallet
-        amount_to_add = get_signed_amount(instance)
-        wallet.balance += amount_to_add
-        wallet.save()
+    new_entry = ledger_service.entry_for(instance)
+    old_entry = None if created else ledger_service.loaded_entry(instance)
+    ledger_service.post(added=[new_entry], removed=[old_entry] if old_entry else [])
+    ledger_service.remember(instance)
 
 @receiver(pre_save, sender=Transaction)
 def update_wallet_balance_on_change(sender, instance, **kwargs):
     """
-    Handle updates to an existing transaction.
-    Reverts the old effect and applies the new effect.
-    """
-    if instance.pk:  # Existing instance
-        try:
-            old_instance = Transaction.objects.get(pk=instance.pk)
-            wallet = old_instance.wallet
-            
-            # Revert old transaction (subtract the signed amount)
-            # If it was +100 income, we subtract 100. If it was -50 expense, we subtract -50 (add 50).
-            wallet.balance -= get_signed_amount(old_instance)
-            wallet.save()
-            
-            # Now apply the new transaction to the NEW wallet (could be different)
-            # But wait, post_save handles 'created', but here we are in update.
-            # post_save won't see 'created=True' for updates.
-            # We must apply the new amount here OR let post_save handle it if we flag it.
-            # Actually, simpler: Revert old here. Apply new here.
-            
-            new_wallet = instance.wallet
-            new_wallet.balance += get_signed_amount(instance)
-            new_wallet.save()
-            
-        except Transaction.DoesNotExist:
-            pass  # Should not happen
+    Make sure an existing transaction carries its stored values before saving.
+    Instances loaded through the ORM already have them (see Transaction.from_db),
+    so this only queries for instances constructed by hand with a pk.
+    """
+    if instance.pk and ledger_service.loaded_entry(instance) is None:
+        ledger_service.load_snapshot(instance)
 
 @receiver(post_delete, sender=Transaction)
 def update_wallet_balance_on_delete(sender, instance, **kwargs):
@@ -64,26 +45,53 @@ def update_wallet_balance_on_delete(sender, instance, **kwargs):
     Revert transaction effect when deleted.
     And delete vector from Qdrant.
     """
-    wallet = instance.wallet
-    # If it was income (+), we subtract. If expense (-), we add (subtract negative).
-    wallet.balance -= get_signed_amount(instance)
-    wallet.save()
+    entry = ledger_service.loaded_entry(instance) or ledger_service.entry_for(instance)
+    ledger_service.post(removed=[entry])
     
-    # Trigger Synchronous Vector Deletion
-    try:
-        from app.services.vector_service import vector_service
-        vector_service.delete_transaction(instance.id)
-    except Exception as e:
-        print(f"Signal Error: Could not delete vector: {e}")
+    # Queue vector deletion (cancels any pending upsert for this transaction)
+    vector_service.enqueue_delete(instance.id)
 
 @receiver(post_save, sender=Transaction)
 def sync_vector_on_save(sender, instance, **kwargs):
     """
-    Sync vector to Qdrant on save (create/update).
+    Queue vector sync to Qdrant on save (create/update).
+    The outbox row is written in the same DB transaction; Celery does the
+    embedding and upsert after commit, off the request path.
+    """
+    vector_service.enqueue_sync(instance.id)
+
+@receiver(pre_delete, sender=Category)
+def merge_daily_rollups_on_category_delete(sender, instance, **kwargs):
+    """
+    Transactions of a deleted category become uncategorized (SET_NULL);
+    move its daily rollups to the "no category" rows to match.
+    """
+    rollup_service.merge_category(instance.pk)
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def rebuild_category_matcher(sender, **kwargs):
+    """Category names changed: the chat category automaton is rebuilt on next use"""
+    db_transaction.on_commit(category_matcher.bump_version)
+
+@receiver(post_save, sender=Budget)
+def refresh_budget_spent_on_save(sender, instance, **kwargs):
+    """
+    A new budget, or one whose category or date window changed, starts from
+    the real total; transaction writes keep it current from then on.
+    """
+    budget_service.reconcile(Budget.objects.filter(pk=instance.pk))
+
+@receiver(post_save, sender=Wallet)
+@receiver(post_delete, sender=Wallet)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=RecurringTransaction)
+@receiver(post_delete, sender=RecurringTransaction)
+def invalidate_ledger_cache(sender, **kwargs):
+    """
+    Wallet, category and recurring template writes change cached reports
+    (names, balances, exclude_from_total, projections) without going
+    through the ledger service.
     """
-    if instance.description:
-        try:
-            from app.services.vector_service import vector_service
-            vector_service.sync_transaction(instance)
-        except Exception as e:
-            print(f"Signal Error: Could not sync vector: {e}")
+    ledger_cache.bump_on_commit()
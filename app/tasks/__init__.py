@@ -1,2 +1,3 @@
 # Celery tasks package
-
+# Import task modules so autodiscover_tasks() registers them with the worker
+from . import anomaly_tasks, balance_tasks, budget_tasks, ocr_tasks, recurring_tasks, vector_tasks  # noqa: F401
@@ -2,20 +2,19 @@
 Celery tasks for anomaly detection
 """
 from celery import shared_task
+from django.utils import timezone
 from ..services.anomaly_service import anomaly_service
-from django.core.cache import cache
 
 
 @shared_task
-def detect_spending_anomalies():
+def detect_spending_anomalies(window_months: int = None):
     """
-    Detect spending anomalies and cache results.
-    This task should be scheduled to run daily.
+    Detect spending anomalies for the current month and store them in
+    SpendingAnomaly (replacing the month's previous run).
+    Scheduled daily (see CELERY_BEAT_SCHEDULE).
     """
-    anomalies = anomaly_service.detect_anomalies()
-    
-    # Cache anomalies for 24 hours
-    cache.set('spending_anomalies', anomalies, 86400)
+    today = timezone.localdate()
+    anomalies = anomaly_service.detect_anomalies(window_months=window_months, as_of=today)
+    anomaly_service.save_anomalies(anomalies, today.replace(day=1))
     
     return f"Detected {len(anomalies)} anomalies"
-
@@ -0,0 +1,17 @@
+"""
+Celery tasks for wallet balance snapshots
+"""
+from celery import shared_task
+from ..services.balance_service import balance_service
+
+
+@shared_task
+def snapshot_wallet_balances():
+    """
+    Snapshot every wallet's end-of-day balance (up to yesterday, filling in
+    missed days) and thin out old daily snapshots to month-ends.
+    Scheduled daily (see CELERY_BEAT_SCHEDULE).
+    """
+    written = balance_service.take_snapshots()
+    pruned = balance_service.prune_snapshots()
+    return f"Wrote {written} balance snapshots, pruned {pruned}"
@@ -0,0 +1,17 @@
+"""
+Celery tasks for budget spend counters
+"""
+from celery import shared_task
+from ..services.budget_service import budget_service
+
+
+@shared_task
+def reconcile_budget_spent():
+    """
+    Recompute Budget.spent from the transactions and fix counters that drifted.
+    Scheduled hourly (see CELERY_BEAT_SCHEDULE).
+    """
+    repaired = budget_service.reconcile()
+    if repaired:
+        print(f"Warning: Repaired {repaired} drifted budget spend counter(s)")
+    return f"Repaired {repaired} budget counters"
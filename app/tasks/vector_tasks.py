@@ -40,7 +40,7 @@ def sync_transactions_batch(transaction_ids: list):
         Number of successfully synced transactions
     """
     try:
-        transactions = Transaction.objects.filter(id__in=transaction_ids)
+        transactions = Transaction.objects.filter(id__in=transaction_ids).select_related('category')
         count = vector_service.sync_batch(list(transactions))
         return {"synced": count, "total": len(transaction_ids)}
     except Exception as e:
@@ -58,3 +58,16 @@ def delete_transaction_vector(transaction_id: int):
     except Exception as e:
         print(f"Error deleting transaction vector: {e}")
         return {"success": False, "error": str(e)}
+
+
+@shared_task
+def drain_vector_outbox():
+    """
+    Drain pending vector operations from the outbox.
+    Scheduled after transaction writes and periodically by beat as a safety net.
+    """
+    stats = vector_service.process_outbox()
+    if stats["failed"] == 0 and vector_service.get_index_status()["pending"]:
+        # More work arrived while draining
+        vector_service.schedule_drain()
+    return stats
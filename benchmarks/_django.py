@@ -0,0 +1,47 @@
+"""
+Shared setup for the benchmark scripts.
+
+Benchmarks run against a throwaway test database (created and destroyed by
+Django's test database machinery), so they never touch real data.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup():
+    """Setup Django the same way manage.py does"""
+    if ROOT_DIR not in sys.path:
+        sys.path.insert(0, ROOT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def throwaway_database(keepdb: bool = False):
+    """
+    Create the test database, run migrations and point every connection
+    (including ones opened later by worker threads) at it.
+    """
+    from django.db import connection
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+
+@contextmanager
+def timed(label: str, results: dict = None):
+    """Print (and optionally record) the wall time of a block"""
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    if results is not None:
+        results[label] = elapsed
+    print(f"{label:<40} {elapsed * 1000:10.1f} ms")
@@ -0,0 +1,96 @@
+"""
+Throughput benchmark for EmbeddingService.get_embeddings_batch.
+
+Starts a local stub of Ollama's /api/embed endpoint (fixed per-request
+latency plus a small per-input cost, like a real model server) and measures
+texts/sec at different batch sizes. Batch size 1 is equivalent to the old
+one-request-per-text behaviour.
+
+Usage:
+    python benchmarks/bench_embedding_batch.py --texts 2048 --latency-ms 20
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from _django import setup
+
+setup()
+
+from app.services.embedding_service import EmbeddingService  # noqa: E402
+
+DIMENSION = 768
+
+
+def make_handler(latency: float, per_input: float, fail_every: int):
+    """Stub handler: sleeps to simulate model time and returns deterministic vectors"""
+    counter = {"requests": 0}
+    lock = threading.Lock()
+
+    class StubOllamaHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            inputs = body.get("input") or []
+            if isinstance(inputs, str):
+                inputs = [inputs]
+
+            with lock:
+                counter["requests"] += 1
+                should_fail = fail_every and counter["requests"] % fail_every == 0
+
+            time.sleep(latency + per_input * len(inputs))
+            if should_fail:
+                self.send_response(500)
+                self.end_headers()
+                return
+
+            embeddings = [[(hash(text) % 997 + 1) / 997.0] * DIMENSION for text in inputs]
+            payload = json.dumps({"model": body.get("model"), "embeddings": embeddings}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return StubOllamaHandler, counter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched embeddings against a stub Ollama server")
+    parser.add_argument('--texts', type=int, default=1024, help='Number of distinct texts to embed')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Stub latency per request')
+    parser.add_argument('--per-input-ms', type=float, default=0.5, help='Stub latency per input text')
+    parser.add_argument('--workers', type=int, default=4, help='EmbeddingService max_workers')
+    parser.add_argument('--fail-every', type=int, default=0, help='Make every Nth request fail (tests retries)')
+    args = parser.parse_args()
+
+    handler, counter = make_handler(args.latency_ms / 1000, args.per_input_ms / 1000, args.fail_every)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    texts = [f"giao dịch số {i} - cà phê {i % 37}" for i in range(args.texts)]
+    print(f"{args.texts} texts, stub latency {args.latency_ms}ms/request + {args.per_input_ms}ms/input\n")
+    print(f"{'batch size':>10} {'requests':>9} {'seconds':>9} {'texts/sec':>11} {'missing':>8}")
+
+    try:
+        for batch_size in (1, 16, 64, 256):
+            service = EmbeddingService(ollama_url=url, batch_size=batch_size, max_workers=args.workers)
+            counter["requests"] = 0
+            start = time.perf_counter()
+            embeddings = service.get_embeddings_batch(texts, use_cache=False)
+            elapsed = time.perf_counter() - start
+            missing = sum(1 for e in embeddings if e is None)
+            print(f"{batch_size:>10} {counter['requests']:>9} {elapsed:>9.2f} "
+                  f"{len(texts) / elapsed:>11,.0f} {missing:>8}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
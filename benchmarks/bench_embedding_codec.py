@@ -0,0 +1,118 @@
+"""
+Memory and latency benchmark for the embedding cache codecs.
+
+Compares the old format (pickled list of Python floats, as django-redis
+stores it) with the float32 / float16 / int8 codecs on N cached texts:
+bytes per entry, total size, decode latency on cache hits and the cosine
+similarity error introduced by lossy codecs.
+
+By default sizes are measured offline (the exact bytes django-redis would
+write). With --redis, entries are written to the configured cache and the
+Redis used_memory delta is reported as well.
+
+Usage:
+    python benchmarks/bench_embedding_codec.py --entries 100000
+    python benchmarks/bench_embedding_codec.py --entries 100000 --redis
+"""
+import argparse
+import pickle
+import time
+
+import numpy as np
+
+from _django import setup
+
+setup()
+
+from app.services.embedding_codec import CODECS, decode_embedding, encode_embedding  # noqa: E402
+
+MODEL = "bge-m3"
+
+
+def pickled_list_format():
+    """Old format: the list itself is pickled by django-redis"""
+    return ("pickled list", lambda v: v.tolist(), lambda blob: pickle.loads(blob), None)
+
+
+def codec_format(name):
+    return (
+        name,
+        lambda v: encode_embedding(v, MODEL, name),
+        lambda blob: decode_embedding(pickle.loads(blob), MODEL),
+        lambda blob: decode_embedding(pickle.loads(blob), MODEL, as_array=True),
+    )
+
+
+def redis_used_memory():
+    from django_redis import get_redis_connection
+    return get_redis_connection("default").info("memory")["used_memory"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding cache codecs")
+    parser.add_argument('--entries', type=int, default=100000, help='Number of cached texts')
+    parser.add_argument('--dimension', type=int, default=768)
+    parser.add_argument('--sample', type=int, default=10000, help='Entries used for decode latency')
+    parser.add_argument('--redis', action='store_true', help='Also measure real Redis memory')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    formats = [pickled_list_format()] + [codec_format(name) for name in CODECS]
+    baseline_bytes = None
+
+    print(f"{args.entries:,} entries x {args.dimension} dims\n")
+    print(f"{'format':<14} {'bytes/entry':>11} {'total MB':>9} {'ratio':>6} "
+          f"{'decode list':>12} {'decode array':>13} {'cos err':>9}"
+          + (f" {'redis MB':>9}" if args.redis else ""))
+
+    for label, encode, decode_list, decode_array in formats:
+        total = 0
+        samples = []
+        originals = []
+        redis_before = redis_used_memory() if args.redis else 0
+        if args.redis:
+            from django.core.cache import cache
+
+        for i in range(args.entries):
+            vector = rng.standard_normal(args.dimension).astype(np.float32)
+            vector /= np.linalg.norm(vector)
+            value = encode(vector)
+            blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            total += len(blob)
+            if args.redis:
+                cache.set(f"bench_codec:{label}:{i}", value, 3600)
+            if i < args.sample:
+                samples.append(blob)
+                originals.append(vector)
+
+        redis_mb = (redis_used_memory() - redis_before) / 1e6 if args.redis else None
+
+        start = time.perf_counter()
+        decoded = [decode_list(blob) for blob in samples]
+        list_us = (time.perf_counter() - start) / len(samples) * 1e6
+
+        array_us = None
+        if decode_array:
+            start = time.perf_counter()
+            for blob in samples:
+                decode_array(blob)
+            array_us = (time.perf_counter() - start) / len(samples) * 1e6
+
+        errors = [
+            1 - float(np.dot(orig, np.asarray(dec, dtype=np.float32)) /
+                      (np.linalg.norm(orig) * np.linalg.norm(dec)))
+            for orig, dec in zip(originals[:1000], decoded[:1000])
+        ]
+
+        per_entry = total / args.entries
+        baseline_bytes = baseline_bytes or per_entry
+        print(f"{label:<14} {per_entry:>11,.0f} {total / 1e6:>9.1f} {baseline_bytes / per_entry:>5.1f}x "
+              f"{list_us:>10.1f}us {(f'{array_us:.1f}us' if array_us else '-'):>13} {max(errors):>9.1e}"
+              + (f" {redis_mb:>9.1f}" if args.redis else ""))
+
+        if args.redis:
+            cache.delete_many([f"bench_codec:{label}:{i}" for i in range(args.entries)])
+
+
+if __name__ == '__main__':
+    main()
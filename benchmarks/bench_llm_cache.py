@@ -0,0 +1,137 @@
+"""
+Hit rate and LLM spend saved by the AIService response cache.
+
+Replays a day of typical traffic against a local stub of Ollama
+(/api/generate with a fixed generation time, /api/embed returning hashed
+character-trigram vectors so near-duplicate texts are close):
+
+- quick-add parses ("cà phê 30k" every morning, sometimes another amount)
+- category suggestions for repeated / slightly different descriptions
+- sentiment of repeated notes
+- chat questions, with a transaction added halfway (ledger version bump)
+
+once with the exact tier only and once with the semantic tier enabled,
+and prints hit rate, LLM calls, tokens and generation time saved.
+
+Usage:
+    python benchmarks/bench_llm_cache.py --latency 0.05
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from _django import setup, throwaway_database
+
+setup()
+
+from django.core.cache import cache  # noqa: E402
+from eval_retrieval import hashed_embedding  # noqa: E402
+from app.models import Transaction, Wallet  # noqa: E402
+from app.services.ai_service import ai_service  # noqa: E402
+from app.services.embedding_service import embedding_service  # noqa: E402
+from app.services.llm_cache import LLMCache  # noqa: E402
+from app.services.nlp_service import nlp_service  # noqa: E402
+from app.services.rag_service import rag_service  # noqa: E402
+from app.services.retrieval_service import retrieval_service  # noqa: E402
+from app.services.sentiment_service import sentiment_service  # noqa: E402
+import app.services.ai_service as ai_module  # noqa: E402
+
+PARSES = ["cà phê 30k", "cà phê 30k", "Cà phê 30k", "cà phê 35k", "grab đi làm 45k", "phở 50k", "grab đi làm 45k"]
+DESCRIPTIONS = ["Grab đi làm", "grab đi làm", "Grab đi làm sáng", "Highlands Coffee", "highlands coffee Q1",
+                "Tiền điện", "tiền điện tháng này"]
+NOTES = ["Ăn trưa với đồng nghiệp vui vẻ", "Mua áo không cần thiết", "Ăn trưa với đồng nghiệp vui vẻ"]
+QUESTIONS = ["Tháng này tôi chi bao nhiêu?", "Tháng này tôi đã chi bao nhiêu?", "Số dư hiện tại là bao nhiêu?",
+             "tháng này tôi chi bao nhiêu"]
+
+
+def make_handler(latency: float):
+    """Stub Ollama: canned answers after `latency` seconds, trigram embeddings"""
+
+    class StubOllamaHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            if self.path == "/api/embed":
+                inputs = body.get("input") or []
+                payload = {"embeddings": [hashed_embedding(text).tolist() for text in inputs]}
+            else:
+                time.sleep(latency)
+                prompt = body.get("prompt", "")
+                if "category" in prompt.lower() and "Suggest" in prompt:
+                    answer = "Giao thông"
+                elif "sentiment" in prompt.lower():
+                    answer = "happy"
+                elif "Parse this transaction text" in prompt:
+                    answer = '[{"amount": 30000, "category": "Ăn uống", "wallet": "cash", "description": "Cà phê", "type": "expense"}]'
+                else:
+                    answer = "Tháng này bạn đã chi 1,250,000 VNĐ. " * 8
+                payload = {"response": answer, "done": True}
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return StubOllamaHandler
+
+
+def replay(rounds: int, wallet):
+    rng = random.Random(3)
+    for i in range(rounds):
+        nlp_service.parse_transactions(rng.choice(PARSES))
+        nlp_service.suggest_category(rng.choice(DESCRIPTIONS))
+        sentiment_service.analyze_sentiment(rng.choice(NOTES))
+        rag_service.query_financial_data(rng.choice(QUESTIONS))
+        if i == rounds // 2:
+            # New data: cached chat answers must not be served any more
+            Transaction.objects.create(wallet=wallet, amount=Decimal("30000"), transaction_type='expense')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM response cache hit rate and savings")
+    parser.add_argument('--rounds', type=int, default=50, help='Requests of each kind')
+    parser.add_argument('--latency', type=float, default=0.05, help='Stub generation time (s)')
+    parser.add_argument('--threshold', type=float, default=0.9, help='Semantic similarity threshold')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stub_url = f"http://127.0.0.1:{server.server_address[1]}"
+    ai_service.ollama_url = stub_url
+    ai_service.use_ollama = True
+    embedding_service.ollama_url = stub_url
+    retrieval_service._searcher = lambda vector, limit, timestamp_range, match: []
+
+    print(f"{args.rounds} rounds x 4 request kinds, stub latency {args.latency}s\n")
+    print(f"{'tier':<16} {'hit rate':>9} {'exact':>6} {'semantic':>9} {'LLM calls':>10} "
+          f"{'tokens saved':>13} {'seconds saved':>14}")
+    try:
+        with throwaway_database():
+            wallet = Wallet.objects.create(name="Tiền mặt", balance=Decimal("0"))
+            for label, semantic in (("exact", False), ("exact+semantic", True)):
+                cache.clear()
+                embedding_service.local_cache.clear()
+                llm_cache = LLMCache()
+                llm_cache.semantic_enabled = semantic
+                llm_cache.semantic_threshold = args.threshold
+                ai_module.llm_cache = llm_cache
+                replay(args.rounds, wallet)
+                stats = llm_cache.stats()
+                print(f"{label:<16} {stats['hit_rate']:>9.1%} {stats['exact_hits']:>6} {stats['semantic_hits']:>9} "
+                      f"{stats['misses']:>10} {stats['input_tokens_saved'] + stats['output_tokens_saved']:>13} "
+                      f"{stats['seconds_saved']:>14.2f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
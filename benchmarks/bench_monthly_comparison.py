@@ -0,0 +1,114 @@
+"""
+Query-count and latency benchmark for /dashboard/monthly-comparison.
+
+Seeds a throwaway database with N transactions spread over the last few
+years, then compares the old per-month loop (exists() + two aggregates per
+month, months computed with timedelta(days=30)) against the single
+TruncMonth query, for several month ranges.
+
+Run it against PostgreSQL (the production database): SQLite evaluates a
+timezone-aware TruncMonth through a Python function per row, so latency
+numbers on SQLite understate the gain; query counts are the same.
+
+Usage:
+    python benchmarks/bench_monthly_comparison.py --rows 500000
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from _django import setup, throwaway_database
+
+setup()
+
+from django.db import connection  # noqa: E402
+from django.db.models import Sum  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from app.api.dashboard import get_monthly_comparison  # noqa: E402
+from app.models import Transaction, Wallet  # noqa: E402
+from app.services.rollup_service import rollup_service  # noqa: E402
+
+TYPES = ['income', 'expense', 'expense', 'expense', 'debt_loan', 'debt_repay']
+
+
+def legacy_monthly_comparison(months: int):
+    """The previous implementation, kept here for comparison"""
+    result = []
+    now = timezone.now()
+    for i in range(months - 1, -1, -1):
+        month_start = (now - timedelta(days=30 * i)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        if i == 0:
+            month_end = now
+        else:
+            month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        if not Transaction.objects.filter(date__gte=month_start, date__lte=month_end).exists():
+            continue
+        income = Transaction.objects.filter(
+            transaction_type='income', date__gte=month_start, date__lte=month_end
+        ).aggregate(Sum('amount'))['amount__sum'] or 0
+        expense = Transaction.objects.filter(
+            transaction_type='expense', date__gte=month_start, date__lte=month_end
+        ).aggregate(Sum('amount'))['amount__sum'] or 0
+        result.append({"month": month_start.strftime("%Y-%m"), "income": income, "expense": expense})
+    return result
+
+
+def seed(rows: int, span_days: int, batch_size: int = 5000):
+    """Bulk insert without signals (balances are irrelevant here), then build the rollups"""
+    wallet = Wallet.objects.create(name='bench-monthly')
+    rng = random.Random(42)
+    now = timezone.now()
+    batch = []
+    for _ in range(rows):
+        batch.append(Transaction(
+            wallet=wallet,
+            amount=Decimal(rng.randint(1, 500) * 1000),
+            transaction_type=rng.choice(TYPES),
+            date=now - timedelta(seconds=rng.randint(0, span_days * 86400)),
+        ))
+        if len(batch) >= batch_size:
+            Transaction.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Transaction.objects.bulk_create(batch)
+    rollup_service.rebuild()
+
+
+def measure(fn, repeat: int):
+    """Best-of-N latency in ms and the number of queries of one call"""
+    with CaptureQueriesContext(connection) as queries:
+        fn()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return len(queries), best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark monthly comparison query strategies")
+    parser.add_argument('--rows', type=int, default=500000, help='Transactions to seed')
+    parser.add_argument('--span-days', type=int, default=3 * 365, help='Spread transactions over this many days')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per case (best is reported)')
+    parser.add_argument('--keepdb', action='store_true', help='Reuse the test database')
+    args = parser.parse_args()
+
+    with throwaway_database(keepdb=args.keepdb):
+        start = time.perf_counter()
+        seed(args.rows, args.span_days)
+        print(f"Seeded {args.rows:,} transactions in {time.perf_counter() - start:.1f}s\n")
+
+        print(f"{'months':>6} {'old queries':>12} {'old ms':>9} {'new queries':>12} {'new ms':>9} {'speedup':>8}")
+        for months in (6, 12, 36):
+            old_queries, old_ms = measure(lambda: legacy_monthly_comparison(months), args.repeat)
+            new_queries, new_ms = measure(lambda: get_monthly_comparison(None, months=months), args.repeat)
+            print(f"{months:>6} {old_queries:>12} {old_ms:>9.1f} {new_queries:>12} {new_ms:>9.1f} "
+                  f"{old_ms / new_ms:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
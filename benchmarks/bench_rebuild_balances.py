@@ -0,0 +1,83 @@
+"""
+Latency benchmark for rebuilding wallet balances from the ledger.
+
+Seeds a throwaway database with N transactions (1M by default) over a few
+wallets, corrupts the stored balances, then times `rebuild_balances` (one
+grouped signed-sum query and one UPDATE). The old recalculate_balances.py
+loop (one wallet.save() per transaction) is timed on a small sample only
+and extrapolated, since running it on the full ledger takes hours.
+
+Usage:
+    python benchmarks/bench_rebuild_balances.py --rows 1000000
+"""
+import argparse
+import random
+import time
+from decimal import Decimal
+
+from _django import setup, throwaway_database
+
+setup()
+
+from app.models import Transaction, Wallet  # noqa: E402
+from app.services.ledger_service import ledger_service, signed_amount  # noqa: E402
+
+TYPES = ['income', 'expense', 'expense', 'expense', 'debt_loan', 'debt_borrow', 'debt_collect', 'debt_repay']
+
+
+def seed(rows: int, wallets: int, batch_size: int = 10000):
+    """Bulk insert without signals, so stored balances start out wrong"""
+    wallet_objs = [Wallet.objects.create(name=f'bench-balance-{i}') for i in range(wallets)]
+    rng = random.Random(42)
+    batch = []
+    for _ in range(rows):
+        batch.append(Transaction(
+            wallet=rng.choice(wallet_objs),
+            amount=Decimal(rng.randint(1, 500) * 1000),
+            transaction_type=rng.choice(TYPES),
+        ))
+        if len(batch) >= batch_size:
+            Transaction.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Transaction.objects.bulk_create(batch)
+
+
+def legacy_recalculate(limit: int) -> int:
+    """The previous per-transaction loop (without its per-row print), on `limit` rows"""
+    processed = 0
+    for tx in Transaction.objects.all().order_by('date', 'created_at')[:limit]:
+        wallet = tx.wallet
+        wallet.balance += signed_amount(tx.transaction_type, tx.amount)
+        wallet.save()
+        processed += 1
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark wallet balance rebuild")
+    parser.add_argument('--rows', type=int, default=1000000, help='Transactions to seed')
+    parser.add_argument('--wallets', type=int, default=5, help='Wallets to spread them over')
+    parser.add_argument('--legacy-sample', type=int, default=5000, help='Rows to run the old loop on')
+    parser.add_argument('--keepdb', action='store_true', help='Reuse the test database')
+    args = parser.parse_args()
+
+    with throwaway_database(keepdb=args.keepdb):
+        start = time.perf_counter()
+        seed(args.rows, args.wallets)
+        print(f"Seeded {args.rows:,} transactions in {time.perf_counter() - start:.1f}s\n")
+
+        start = time.perf_counter()
+        sample = legacy_recalculate(args.legacy_sample)
+        legacy = (time.perf_counter() - start) / max(sample, 1) * args.rows
+        print(f"{'old loop (extrapolated)':<26} {legacy:10.1f} s")
+
+        start = time.perf_counter()
+        changes = ledger_service.rebuild_balances()
+        print(f"{'rebuild_balances':<26} {time.perf_counter() - start:10.2f} s  ({len(changes)} wallets fixed)")
+
+        assert not ledger_service.rebuild_balances(dry_run=True), "balances still differ"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Latency benchmark for offset vs cursor pagination of GET /transactions.
+
+Seeds a throwaway database with N transactions (1M by default), then times
+page 1 and a deep page (page 2000 by default) of list_transactions in both
+modes. Offset pages get slower with depth because the database scans and
+discards `offset` rows; cursor pages start the index scan at the cursor.
+
+Usage:
+    python benchmarks/bench_transaction_pagination.py --rows 1000000 --page 2000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from _django import setup, throwaway_database
+
+setup()
+
+from django.utils import timezone  # noqa: E402
+from app.api.transactions import KEYSET_ORDERING, _encode_cursor, list_transactions  # noqa: E402
+from app.models import Category, Transaction, Wallet  # noqa: E402
+
+TYPES = ['income', 'expense', 'expense', 'expense']
+
+
+def seed(rows: int, batch_size: int = 10000):
+    """Bulk insert without signals; balances are irrelevant here"""
+    wallet = Wallet.objects.create(name='bench-pagination')
+    category = Category.objects.create(name='bench-pagination')
+    rng = random.Random(42)
+    now = timezone.now()
+    batch = []
+    for i in range(rows):
+        batch.append(Transaction(
+            wallet=wallet,
+            category=category,
+            amount=Decimal(rng.randint(1, 500) * 1000),
+            transaction_type=rng.choice(TYPES),
+            description=f"giao dịch {i}",
+            # Coarse dates so many rows share a date and the tiebreakers matter
+            date=now - timedelta(hours=rng.randint(0, 5 * 365 * 24)),
+        ))
+        if len(batch) >= batch_size:
+            Transaction.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Transaction.objects.bulk_create(batch)
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offset vs cursor pagination")
+    parser.add_argument('--rows', type=int, default=1000000, help='Transactions to seed')
+    parser.add_argument('--page', type=int, default=2000, help='Deep page number to fetch')
+    parser.add_argument('--limit', type=int, default=50, help='Page size')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case (best is reported)')
+    parser.add_argument('--keepdb', action='store_true', help='Reuse the test database')
+    args = parser.parse_args()
+
+    with throwaway_database(keepdb=args.keepdb):
+        start = time.perf_counter()
+        seed(args.rows)
+        print(f"Seeded {args.rows:,} transactions in {time.perf_counter() - start:.1f}s\n")
+
+        deep_offset = (args.page - 1) * args.limit
+        # Cursor a client would hold after scrolling to the deep page (not timed)
+        previous = Transaction.objects.order_by(*KEYSET_ORDERING)[deep_offset - 1]
+        deep_cursor = _encode_cursor(previous.date, previous.created_at, previous.id)
+
+        def offset_page(offset):
+            return lambda: list_transactions(None, limit=args.limit, offset=offset)
+
+        def cursor_page(cursor):
+            return lambda: list_transactions(None, limit=args.limit, cursor=cursor)
+
+        cases = [
+            ("offset, page 1", offset_page(0)),
+            (f"offset, page {args.page}", offset_page(deep_offset)),
+            ("cursor, page 1", cursor_page('')),
+            (f"cursor, page {args.page}", cursor_page(deep_cursor)),
+        ]
+
+        def page_ids(fn):
+            return [t['id'] for t in json.loads(fn().content)]
+
+        assert page_ids(offset_page(deep_offset)) == page_ids(cursor_page(deep_cursor)), \
+            "offset and cursor pages differ"
+
+        for label, fn in cases:
+            print(f"{label:<24} {best_of(fn, args.repeat):10.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Serialization micro-benchmark for GET /transactions.
+
+Seeds a throwaway database and renders a 10k-row transaction list to JSON
+bytes two ways:
+
+- before: model instances with select_related, dicts built by hand, then
+  validated against List[TransactionOut] and rendered the way Django Ninja
+  does for a `response=` schema
+- after: the current list_transactions (values() with joined names, one
+  formatting pass, JsonResponse without response validation)
+
+Usage:
+    python benchmarks/bench_transaction_serialization.py --rows 10000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from typing import List
+
+from _django import setup, throwaway_database
+
+setup()
+
+from django.utils import timezone  # noqa: E402
+from ninja.responses import NinjaJSONEncoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from app.api.transactions import TransactionOut, list_transactions  # noqa: E402
+from app.models import Category, Transaction, Wallet  # noqa: E402
+
+
+def seed(rows: int):
+    wallets = [Wallet.objects.create(name=f'bench-wallet-{i}') for i in range(3)]
+    categories = [Category.objects.create(name=f'bench-category-{i}') for i in range(10)]
+    rng = random.Random(42)
+    now = timezone.now()
+    Transaction.objects.bulk_create([
+        Transaction(
+            wallet=rng.choice(wallets),
+            category=rng.choice(categories + [None]),
+            amount=Decimal(rng.randint(1, 500) * 1000),
+            transaction_type=rng.choice(['income', 'expense']),
+            description=f"giao dịch số {i}",
+            date=now - timedelta(minutes=i),
+        )
+        for i in range(rows)
+    ], batch_size=5000)
+
+
+def before(limit: int) -> bytes:
+    """The previous list_transactions body plus Ninja's response validation"""
+    transactions = Transaction.objects.select_related('wallet', 'category').all()[:limit]
+    data = [
+        {
+            "id": t.id,
+            "wallet_id": t.wallet.id,
+            "wallet_name": t.wallet.name,
+            "category_id": t.category.id if t.category else None,
+            "category_name": t.category.name if t.category else None,
+            "amount": str(t.amount),
+            "description": t.description,
+            "transaction_type": t.transaction_type,
+            "contact_person": t.contact_person,
+            "date": t.date.isoformat(),
+            "created_at": t.created_at.isoformat(),
+        }
+        for t in transactions
+    ]
+    validated = TypeAdapter(List[TransactionOut]).validate_python(data)
+    return json.dumps([item.model_dump() for item in validated], cls=NinjaJSONEncoder).encode('utf-8')
+
+
+def after(limit: int) -> bytes:
+    return list_transactions(None, limit=limit).content
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transaction list serialization")
+    parser.add_argument('--rows', type=int, default=10000, help='Rows in the response')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case (best is reported)')
+    parser.add_argument('--keepdb', action='store_true', help='Reuse the test database')
+    args = parser.parse_args()
+
+    with throwaway_database(keepdb=args.keepdb):
+        seed(args.rows)
+        assert json.loads(before(args.rows)) == json.loads(after(args.rows)), "outputs differ"
+
+        print(f"{args.rows:,} rows per response\n")
+        results = {}
+        for label, fn in (("before", before), ("after", after)):
+            seconds = best_of(lambda: fn(args.rows), args.repeat)
+            results[label] = seconds
+            print(f"{label:<8} {seconds * 1000:9.1f} ms {args.rows / seconds:>12,.0f} rows/sec")
+        print(f"\nspeedup: {results['before'] / results['after']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Concurrency stress benchmark for wallet balance updates.
+
+Runs N parallel writers that create, edit and delete transactions against a
+single wallet, then checks that the final balance matches the expected
+total exactly. With the old read-modify-write signals, updates are lost as
+soon as two writers touch the wallet at the same time.
+
+Usage:
+    python benchmarks/bench_wallet_concurrency.py --writers 16 --ops 200
+"""
+import argparse
+import random
+import threading
+import time
+from decimal import Decimal
+
+from _django import setup, throwaway_database
+
+setup()
+
+from django.db import connection  # noqa: E402
+from app.models import Transaction, Wallet  # noqa: E402
+from app.services.ledger_service import signed_amount  # noqa: E402
+
+TYPES = ['income', 'expense', 'debt_borrow', 'debt_loan', 'debt_collect', 'debt_repay']
+
+
+def writer(wallet_id: int, other_wallet_id: int, ops: int, seed: int, expected: list, errors: list):
+    """One worker thread: every op is a create, and some are followed by an edit or a delete"""
+    rng = random.Random(seed)
+    total = Decimal(0)
+    try:
+        for _ in range(ops):
+            tx = Transaction.objects.create(
+                wallet_id=wallet_id,
+                amount=Decimal(rng.randint(1, 1000)),
+                transaction_type=rng.choice(TYPES),
+            )
+            roll = rng.random()
+            if roll < 0.2:
+                # Edit amount and type in place
+                tx.amount = Decimal(rng.randint(1, 1000))
+                tx.transaction_type = rng.choice(TYPES)
+                tx.save()
+            elif roll < 0.3:
+                # Move to the other wallet and back (revert + apply in one statement each)
+                tx.wallet_id = other_wallet_id
+                tx.save()
+                tx.wallet_id = wallet_id
+                tx.save()
+            elif roll < 0.4:
+                tx.delete()
+                continue
+            total += signed_amount(tx.transaction_type, tx.amount)
+        expected.append(total)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--writers', type=int, default=8, help='Number of parallel writer threads')
+    parser.add_argument('--ops', type=int, default=100, help='Transactions per writer')
+    parser.add_argument('--keepdb', action='store_true', help='Reuse the test database')
+    args = parser.parse_args()
+
+    with throwaway_database(keepdb=args.keepdb):
+        wallet = Wallet.objects.create(name='bench-concurrency')
+        other = Wallet.objects.create(name='bench-concurrency-other')
+
+        expected, errors = [], []
+        threads = [
+            threading.Thread(target=writer, args=(wallet.id, other.id, args.ops, seed, expected, errors))
+            for seed in range(args.writers)
+        ]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        wallet.refresh_from_db()
+        other.refresh_from_db()
+        expected_balance = sum(expected, Decimal(0))
+        total_ops = args.writers * args.ops
+
+        print(f"Writers: {args.writers}, ops/writer: {args.ops}, errors: {len(errors)}")
+        print(f"Elapsed: {elapsed:.2f}s ({total_ops / elapsed:,.0f} ops/s)")
+        print(f"Expected balance: {expected_balance:,.2f}")
+        print(f"Actual balance:   {wallet.balance:,.2f}")
+        print(f"Other wallet:     {other.balance:,.2f} (expected 0.00)")
+
+        for e in errors[:5]:
+            print(f"  error: {e!r}")
+
+        ok = not errors and wallet.balance == expected_balance and other.balance == 0
+        print("[OK] Balances are exact" if ok else "[FAIL] Lost or duplicated updates")
+        return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,184 @@
+"""
+Offline evaluation of the RAG retrieval stage.
+
+Seeds a throwaway database with a synthetic ledger (a year of transactions
+at a handful of merchants), then asks "how much did I spend at <merchant>
+in <month>" for every merchant/month pair and measures:
+
+- recall@k: share of that merchant's transactions in that month that made
+  it into the prompt rows (out of at most k, the most that could fit)
+- prompt size: estimated tokens of the rows put in the prompt
+- exact totals: whether the SQL keyword total equals the true amount
+
+against the previous behaviour (the 15 newest transactions of the period).
+
+By default the vector side runs offline: a hashed character-trigram
+embedder and a brute-force NumPy index with the same payload filters as
+Qdrant. Pass --online to use embedding_service and the real Qdrant
+collection instead (run `manage.py reindex_vectors` and drain first).
+
+Usage:
+    python benchmarks/eval_retrieval.py --per-month 300 --k 20
+"""
+import argparse
+import json
+import random
+import zlib
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+
+from _django import setup, throwaway_database
+
+setup()
+
+from django.utils import timezone  # noqa: E402
+from app.models import Category, Transaction, Wallet  # noqa: E402
+from app.services.retrieval_service import RetrievalService, estimate_tokens  # noqa: E402
+
+# (description, category, type, typical amount)
+MERCHANTS = [
+    ("Grab đi làm", "Di chuyển", "expense", 45000),
+    ("Be bike", "Di chuyển", "expense", 30000),
+    ("Highlands Coffee", "Ăn uống", "expense", 55000),
+    ("Phở bò", "Ăn uống", "expense", 50000),
+    ("Shopee đơn hàng", "Mua sắm", "expense", 250000),
+    ("Tiền điện EVN", "Hóa đơn", "expense", 800000),
+    ("Netflix", "Giải trí", "expense", 260000),
+    ("Lương công ty", "Thu nhập", "income", 25000000),
+]
+QUESTION_KEYWORD = {
+    "Grab đi làm": "Grab", "Be bike": "Be bike", "Highlands Coffee": "Highlands",
+    "Phở bò": "Phở", "Shopee đơn hàng": "Shopee", "Tiền điện EVN": "EVN", "Netflix": "Netflix",
+}
+DIM = 256
+
+
+def hashed_embedding(text: str) -> np.ndarray:
+    """Deterministic bag of character trigrams, L2-normalised"""
+    vector = np.zeros(DIM, dtype=np.float32)
+    padded = f"  {text.lower()}  "
+    for i in range(len(padded) - 2):
+        vector[zlib.crc32(padded[i:i + 3].encode('utf-8')) % DIM] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class NumpyIndex:
+    """Brute-force cosine search with Qdrant-like payload filters"""
+
+    def __init__(self, rows):
+        self.ids = np.array([row['id'] for row in rows])
+        self.timestamps = np.array([row['date'].timestamp() for row in rows])
+        self.types = np.array([row['transaction_type'] for row in rows])
+        self.vectors = np.stack([
+            hashed_embedding(f"{row['description']} {row['category__name'] or ''}") for row in rows
+        ])
+
+    def search(self, vector, limit, timestamp_range, match):
+        mask = np.ones(len(self.ids), dtype=bool)
+        gte, lte = timestamp_range
+        if gte is not None:
+            mask &= self.timestamps >= gte
+        if lte is not None:
+            mask &= self.timestamps <= lte
+        if match.get('transaction_type'):
+            mask &= self.types == match['transaction_type']
+        scores = np.where(mask, self.vectors @ vector, -np.inf)
+        order = np.argsort(-scores)[:limit]
+        return [{"id": int(self.ids[i]), "score": float(scores[i])} for i in order if np.isfinite(scores[i])]
+
+
+def seed(per_month: int, months: int, today):
+    wallet = Wallet.objects.create(name='eval-wallet')
+    categories = {name: Category.objects.create(name=name) for name in {m[1] for m in MERCHANTS}}
+    rng = random.Random(7)
+    batch = []
+    first_month = (today.replace(day=1) - timedelta(days=30 * (months - 1))).replace(day=1)
+    for m in range(months):
+        month_start = (first_month + timedelta(days=32 * m)).replace(day=1)
+        for _ in range(per_month):
+            description, category, transaction_type, amount = rng.choices(
+                MERCHANTS, weights=[20, 10, 15, 15, 8, 1, 1, 1])[0]
+            batch.append(Transaction(
+                wallet=wallet,
+                category=categories[category],
+                description=description,
+                transaction_type=transaction_type,
+                amount=Decimal(int(amount * rng.uniform(0.6, 1.6)) // 1000 * 1000),
+                date=timezone.make_aware(datetime.combine(
+                    month_start + timedelta(days=rng.randint(0, 27)), datetime.min.time()
+                )) + timedelta(minutes=rng.randint(0, 24 * 60 - 1)),
+            ))
+    Transaction.objects.bulk_create(batch)
+    return first_month
+
+
+def month_bounds(month_start):
+    start = timezone.make_aware(datetime.combine(month_start, datetime.min.time()))
+    end = timezone.make_aware(datetime.combine(
+        (month_start + timedelta(days=32)).replace(day=1), datetime.min.time()
+    )) - timedelta(microseconds=1)
+    return start, end
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate RAG retrieval recall and prompt size")
+    parser.add_argument('--per-month', type=int, default=300, help='Transactions per month')
+    parser.add_argument('--months', type=int, default=12, help='Months of history')
+    parser.add_argument('--k', type=int, default=20, help='Rows put in the prompt')
+    parser.add_argument('--online', action='store_true', help='Use Ollama embeddings and the real Qdrant')
+    parser.add_argument('--keepdb', action='store_true', help='Reuse the test database')
+    args = parser.parse_args()
+
+    with throwaway_database(keepdb=args.keepdb):
+        today = timezone.localdate()
+        first_month = seed(args.per_month, args.months, today)
+        rows = list(Transaction.objects.values(*RetrievalService.VALUE_FIELDS))
+        if args.online:
+            retrieval = RetrievalService()
+        else:
+            index = NumpyIndex(rows)
+            retrieval = RetrievalService(searcher=index.search, embedder=hashed_embedding)
+        retrieval.candidates = max(retrieval.candidates, args.k * 5)
+
+        results = {"baseline": [], "retrieval": []}
+        tokens = {"baseline": [], "retrieval": []}
+        exact = 0
+        questions = 0
+        for m in range(args.months):
+            month_start = (first_month + timedelta(days=32 * m)).replace(day=1)
+            start, end = month_bounds(month_start)
+            period = Transaction.objects.filter(date__gte=start, date__lte=end)
+            for description, keyword in QUESTION_KEYWORD.items():
+                relevant = set(period.filter(description=description).values_list('id', flat=True))
+                if not relevant:
+                    continue
+                questions += 1
+                question = f"Tôi đã chi bao nhiêu cho {keyword} trong tháng {month_start.month}?"
+
+                # Previous behaviour: 15 newest rows of the period
+                baseline = list(period.order_by('-date').values(*RetrievalService.VALUE_FIELDS)[:15])
+                baseline_rows = [retrieval.format_row(row) for row in baseline]
+                retrieved = retrieval.retrieve(question, start, end, top_k=args.k, token_budget=10 ** 6)
+
+                for label, packed in (("baseline", baseline_rows), ("retrieval", retrieved['rows'])):
+                    found = relevant & {row['id'] for row in packed}
+                    results[label].append(len(found) / min(len(relevant), args.k))
+                    tokens[label].append(estimate_tokens(json.dumps(packed, ensure_ascii=False)))
+
+                truth = float(sum(period.filter(description=description).values_list('amount', flat=True)))
+                totals = retrieved['keyword_totals']
+                if any(t.get('expense', {}).get('total') == truth for t in totals.values()):
+                    exact += 1
+
+        print(f"{questions} questions, k={args.k}, {'online' if args.online else 'offline'} vectors\n")
+        print(f"{'':<10} {'recall@k':>9} {'prompt tokens':>14}")
+        for label in ("baseline", "retrieval"):
+            print(f"{label:<10} {np.mean(results[label]):>9.3f} {np.mean(tokens[label]):>14.0f}")
+        print(f"\nexact keyword totals: {exact}/{questions}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Load test for concurrent chat requests: sync (WSGI) vs async (ASGI) views.
+
+Starts a local stub of Ollama (/api/generate with a fixed generation time,
+/api/embed) and fires POST /api/v1/chat/ask requests with many users at
+once, through the full Django stack:
+
+- wsgi: the request goes through Django's sync handler, at most `--workers`
+  at a time (like gunicorn sync workers). Each request pins its worker
+  while the model generates; the other users queue.
+- asgi: the request goes through Django's async handler, all users on one
+  event loop. The async view awaits the model over the pooled httpx client,
+  so waiting requests do not hold a worker.
+
+Reports throughput and latency percentiles per mode. Pass --url to load a
+running deployment instead (e.g. the "web" service on :8000 vs "web_asgi"
+on :8001 from `docker compose --profile asgi up`); --access-code is then
+used to unlock the API.
+
+Usage:
+    python benchmarks/load_chat.py --requests 60 --concurrency 30 --workers 3 --latency 1.0
+"""
+import argparse
+import asyncio
+import json
+import queue
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from _django import setup, throwaway_database
+
+setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.sessions.backends.db import SessionStore  # noqa: E402
+from django.test import AsyncClient, Client  # noqa: E402
+from app.services.ai_service import ai_service  # noqa: E402
+from app.services.embedding_service import embedding_service  # noqa: E402
+from app.services.retrieval_service import retrieval_service  # noqa: E402
+
+ANSWER_WORDS = ["Tháng", " này", " bạn", " đã", " chi", " 1,250,000", " VNĐ", "."]
+
+
+def make_handler(latency: float):
+    """Stub Ollama: answers after `latency` seconds (spread over the chunks when streaming)"""
+
+    class StubOllamaHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients can reuse connections
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            if self.path == "/api/embed":
+                inputs = body.get("input") or []
+                self._send_json({"embeddings": [[0.1] * 64 for _ in inputs]})
+            elif body.get("stream"):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for word in ANSWER_WORDS:
+                    time.sleep(latency / len(ANSWER_WORDS))
+                    self._write_chunk(json.dumps({"response": word, "done": False}) + "\n")
+                self._write_chunk(json.dumps({"response": "", "done": True}) + "\n")
+                self._write_chunk("")
+            else:
+                time.sleep(latency)
+                self._send_json({"response": "".join(ANSWER_WORDS), "done": True})
+
+        def _send_json(self, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _write_chunk(self, text):
+            data = text.encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def log_message(self, *args):
+            pass
+
+    return StubOllamaHandler
+
+
+def summarize(label, latencies, elapsed, errors):
+    latencies = sorted(latencies)
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)] if latencies else 0.0
+    print(f"{label:<6} {len(latencies) / elapsed:>8.2f} {statistics.median(latencies) if latencies else 0:>8.2f} "
+          f"{p95:>8.2f} {elapsed:>8.2f} {errors:>7}")
+
+
+def unlocked_session() -> str:
+    session = SessionStore()
+    session['access_code_verified'] = True
+    session.create()
+    return session.session_key
+
+
+def run_wsgi(n, concurrency, workers, payload, session_key):
+    """`concurrency` users, each sending its next request when the previous one
+    is answered; `workers` sync workers take queued requests in arrival order"""
+    backlog = queue.Queue()
+    latencies, failures = [], []
+    remaining = iter(range(n))
+    lock = threading.Lock()
+
+    def worker():
+        client = Client()
+        client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+        while True:
+            job = backlog.get()
+            if job is None:
+                return
+            response = client.post("/api/v1/chat/ask", payload, content_type="application/json")
+            job["ok"] = response.status_code == 200 and "Lỗi" not in response.json()["answer"]
+            job["done"].set()
+
+    def user():
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            job = {"done": threading.Event()}
+            start = time.perf_counter()  # latency includes waiting for a free worker
+            backlog.put(job)
+            job["done"].wait()
+            with lock:
+                latencies.append(time.perf_counter() - start)
+                if not job["ok"]:
+                    failures.append(job)
+
+    start = time.perf_counter()
+    worker_threads = [threading.Thread(target=worker) for _ in range(workers)]
+    user_threads = [threading.Thread(target=user) for _ in range(concurrency)]
+    for thread in worker_threads + user_threads:
+        thread.start()
+    for thread in user_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    for _ in worker_threads:
+        backlog.put(None)
+    for thread in worker_threads:
+        thread.join()
+    return latencies, elapsed, len(failures)
+
+
+async def run_asgi(n, concurrency, payload, session_key):
+    semaphore = asyncio.Semaphore(concurrency)
+    client = AsyncClient()
+    client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/api/v1/chat/ask", payload, content_type="application/json")
+            return time.perf_counter() - start, response.status_code == 200 and "Lỗi" not in response.json()["answer"]
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(n)))
+    return [r[0] for r in results], time.perf_counter() - start, sum(1 for r in results if not r[1])
+
+
+async def run_url(url, n, concurrency, payload, access_code):
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=300) as client:
+        if access_code:
+            await client.post("/api/v1/auth/verify", json={"code": access_code})
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/api/v1/chat/ask", json=payload)
+                return time.perf_counter() - start, response.status_code == 200
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one() for _ in range(n)))
+    return [r[0] for r in results], time.perf_counter() - start, sum(1 for r in results if not r[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent chat throughput, WSGI vs ASGI")
+    parser.add_argument('--requests', type=int, default=60, help='Total chat requests per mode')
+    parser.add_argument('--concurrency', type=int, default=30, help='Simultaneous users')
+    parser.add_argument('--workers', type=int, default=3, help='Sync workers (gunicorn --workers)')
+    parser.add_argument('--latency', type=float, default=1.0, help='Stub model generation time (s)')
+    parser.add_argument('--url', action='append', help='Load a running server instead (repeatable)')
+    parser.add_argument('--access-code', help='Access code for --url servers')
+    args = parser.parse_args()
+    payload = {"question": "Tháng này tôi chi bao nhiêu?"}
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent users, "
+          f"model latency {args.latency}s\n")
+    print(f"{'mode':<6} {'req/s':>8} {'p50 s':>8} {'p95 s':>8} {'total s':>8} {'errors':>7}")
+
+    if args.url:
+        for url in args.url:
+            summarize(url[-6:], *asyncio.run(run_url(url, args.requests, args.concurrency, payload, args.access_code)))
+        return
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stub_url = f"http://127.0.0.1:{server.server_address[1]}"
+    ai_service.ollama_url = stub_url
+    ai_service.use_ollama = True
+    embedding_service.ollama_url = stub_url
+    # No Qdrant here: vector hits are empty, SQL candidates still apply
+    retrieval_service._searcher = lambda vector, limit, timestamp_range, match: []
+
+    try:
+        with throwaway_database():
+            session_key = unlocked_session()
+            summarize("wsgi", *run_wsgi(args.requests, args.concurrency, args.workers, payload, session_key))
+            summarize("asgi", *asyncio.run(run_asgi(args.requests, args.concurrency, payload, session_key)))
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -177,6 +177,42 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+# Default periodic tasks (installed into the database scheduler on beat start)
+CELERY_BEAT_SCHEDULE = {
+    "drain-vector-outbox": {
+        "task": "app.tasks.vector_tasks.drain_vector_outbox",
+        "schedule": 60.0,  # Safety net; writes also schedule a drain themselves
+    },
+    "reconcile-budget-spent": {
+        "task": "app.tasks.budget_tasks.reconcile_budget_spent",
+        "schedule": 3600.0,  # Counters are kept by delta; this only repairs drift
+    },
+    "detect-spending-anomalies": {
+        "task": "app.tasks.anomaly_tasks.detect_spending_anomalies",
+        "schedule": 86400.0,
+    },
+    "process-recurring-transactions": {
+        "task": "app.tasks.recurring_tasks.process_recurring_transactions",
+        "schedule": 3600.0,  # Idempotent; posts every missed occurrence
+    },
+    "snapshot-wallet-balances": {
+        "task": "app.tasks.balance_tasks.snapshot_wallet_balances",
+        "schedule": 86400.0,  # Catches up on missed days by itself
+    },
+}
+
+# Spending anomaly detection (per-category override: Category.anomaly_threshold)
+ANOMALY_WINDOW_MONTHS = int(os.getenv("ANOMALY_WINDOW_MONTHS", "6"))  # Baseline months before the current one
+ANOMALY_Z_THRESHOLD = float(os.getenv("ANOMALY_Z_THRESHOLD", "3.5"))  # Robust (median/MAD) z-score
+ANOMALY_MIN_INCREASE = float(os.getenv("ANOMALY_MIN_INCREASE", "0.4"))  # And at least 40% above the monthly mean
+
+# Wallet balance snapshots: daily rows older than this are thinned out to month-ends
+SNAPSHOT_DAILY_RETENTION_DAYS = int(os.getenv("SNAPSHOT_DAILY_RETENTION_DAYS", "400"))
+
+# RAG retrieval: transactions packed into the chat prompt
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "20"))  # Maximum rows
+RAG_CANDIDATES = int(os.getenv("RAG_CANDIDATES", "100"))  # Vector hits considered before re-ranking
+RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "1500"))  # Approximate tokens for rows
 
 # Qdrant Configuration
 QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
@@ -186,3 +222,26 @@ QDRANT_COLLECTION_NAME = "transactions"  # Collection name for vector search
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-3-flash-preview")
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+# LLM response cache (exact; plus an optional near-duplicate tier using embeddings)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "True").lower() == "true"
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))  # Seconds
+LLM_SEMANTIC_CACHE = os.getenv("LLM_SEMANTIC_CACHE", "False").lower() == "true"
+LLM_SEMANTIC_THRESHOLD = float(os.getenv("LLM_SEMANTIC_THRESHOLD", "0.95"))  # Cosine similarity
+LLM_SEMANTIC_CACHE_SIZE = int(os.getenv("LLM_SEMANTIC_CACHE_SIZE", "256"))  # Entries per namespace
+# Price per 1M tokens, only used to report the estimated cost saved
+LLM_PRICE_INPUT_PER_1M = float(os.getenv("LLM_PRICE_INPUT_PER_1M", "0"))
+LLM_PRICE_OUTPUT_PER_1M = float(os.getenv("LLM_PRICE_OUTPUT_PER_1M", "0"))
+# Keep-alive connections per pool to Ollama (requests.Session per process, httpx per event loop)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+
+# Embedding batching (Ollama /api/embed)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))  # Texts per request
+EMBEDDING_MAX_WORKERS = int(os.getenv("EMBEDDING_MAX_WORKERS", "4"))  # Parallel requests
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "2"))
+# Binary format of cached embeddings: float32 (lossless), float16 (default, ~4.5x smaller
+# than pickled floats) or int8 (~9x smaller, quantized)
+EMBEDDING_CACHE_CODEC = os.getenv("EMBEDDING_CACHE_CODEC", "float16")
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "bge-m3")
+# In-process LRU in front of Redis (per worker), bounded by bytes
+EMBEDDING_LOCAL_CACHE_BYTES = int(os.getenv("EMBEDDING_LOCAL_CACHE_BYTES", str(32 * 1024 * 1024)))
+EMBEDDING_LOCAL_CACHE_TTL = int(os.getenv("EMBEDDING_LOCAL_CACHE_TTL", "3600"))  # Seconds
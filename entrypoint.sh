@@ -21,8 +21,11 @@ echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
 # Start server based on command passed or default to gunicorn
-# If no arguments passed, start Gunicorn
-if [ $# -eq 0 ]; then
+# If no arguments passed, start Gunicorn (SERVER_MODE=asgi: Uvicorn workers)
+if [ $# -eq 0 ] && [ "$SERVER_MODE" = "asgi" ]; then
+    echo "Starting Gunicorn (ASGI, Uvicorn workers)..."
+    exec gunicorn core.asgi:application -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:8000 --workers 3
+elif [ $# -eq 0 ]; then
     echo "Starting Gunicorn..."
     exec gunicorn core.wsgi:application --bind 0.0.0.0:8000 --workers 3
 else
@@ -37,41 +37,13 @@ document.addEventListener('DOMContentLoaded', () => {
         scrollToBottom();
         
         try {
-            // Call API
+            // Call API (streamed answer, falls back to /ask)
             const payload = { 
                 question: message,
                 session_id: currentSessionId 
             };
             
-            const response = await fetch('/api/v1/chat/ask', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify(payload)
-            });
-            
-            const data = await response.json();
-            
-            if (data.session_id && currentSessionId !== data.session_id) {
-                currentSessionId = data.session_id;
-                // Save to localStorage
-                localStorage.setItem('chat_session_id', currentSessionId);
-                // Refresh sessions list to show new title
-                loadSessions();
-            }
-            
-            // Hide Typing
-            showTyping(false);
-            
-            if (response.ok) {
-                // Add AI Response
-                // Format the answer (support basic markdown/formatting)
-                const answer = formatAIResponse(data.answer);
-                addMessage(answer, 'ai');
-            } else {
-                addMessage('Xin lỗi, đã có lỗi xảy ra khi kết nối với máy chủ.', 'ai');
-            }
+            await askStream(payload);
             
         } catch (error) {
             console.error(error);
@@ -83,6 +55,117 @@ document.addEventListener('DOMContentLoaded', () => {
     });
 });
 
+function setSession(sessionId) {
+    if (sessionId && currentSessionId !== sessionId) {
+        currentSessionId = sessionId;
+        // Save to localStorage
+        localStorage.setItem('chat_session_id', currentSessionId);
+        // Refresh sessions list to show new title
+        loadSessions();
+    }
+}
+
+// Stream the answer as server-sent events and render tokens as they arrive
+async function askStream(payload) {
+    const response = await fetch('/api/v1/chat/ask/stream', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify(payload)
+    });
+    
+    if (!response.ok || !response.body) {
+        return askOnce(payload);
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let answer = '';
+    let content = null;
+    let renderPending = false;
+    
+    const render = () => {
+        renderPending = false;
+        content.innerHTML = formatAIResponse(answer);
+        scrollToBottom();
+    };
+    
+    const handleEvent = (event, data) => {
+        if (event === 'session') {
+            setSession(data.session_id);
+        } else if (event === 'token') {
+            if (!content) {
+                // First token: replace the typing indicator with the message
+                showTyping(false);
+                content = addMessage('', 'ai').querySelector('.message-content');
+            }
+            answer += data.text;
+            // Re-render at most once per frame
+            if (!renderPending) {
+                renderPending = true;
+                requestAnimationFrame(render);
+            }
+        } else if (event === 'error') {
+            showTyping(false);
+            addMessage('Xin lỗi, tôi không thể trả lời câu hỏi này. Lỗi: ' + data.error, 'ai');
+        } else if (event === 'done') {
+            showTyping(false);
+            if (content) render();
+        }
+    };
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        // Events are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let event = 'message';
+            let data = '';
+            frame.split('\n').forEach(line => {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            });
+            if (data) handleEvent(event, JSON.parse(data));
+        }
+    }
+    
+    showTyping(false);
+    if (content) render();
+}
+
+// Non-streaming fallback
+async function askOnce(payload) {
+    const response = await fetch('/api/v1/chat/ask', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify(payload)
+    });
+    
+    const data = await response.json();
+    setSession(data.session_id);
+    
+    // Hide Typing
+    showTyping(false);
+    
+    if (response.ok) {
+        // Add AI Response
+        // Format the answer (support basic markdown/formatting)
+        const answer = formatAIResponse(data.answer);
+        addMessage(answer, 'ai');
+    } else {
+        addMessage('Xin lỗi, đã có lỗi xảy ra khi kết nối với máy chủ.', 'ai');
+    }
+}
+
 function addMessage(content, type) {
     const chatMessages = document.getElementById('chatMessages');
     
@@ -112,6 +195,7 @@ function addMessage(content, type) {
     
     messageDiv.innerHTML = html;
     chatMessages.appendChild(messageDiv);
+    return messageDiv;
 }
 
 function showTyping(show) {
@@ -3,6 +3,10 @@
 let editingTransactionId = null;
 let wallets = [];
 let categories = [];
+let currentFilterParams = '';
+let nextCursor = null;
+let loadingMoreTransactions = false;
+let transactionsObserver = null;
 
 document.addEventListener('DOMContentLoaded', () => {
     // Initialize Tabs
@@ -111,8 +115,8 @@ async function loadTransactions() {
         if (walletId) params.append('wallet_id', walletId);
         if (type) params.append('transaction_type', type);
         
-        const response = await fetch(`/api/v1/transactions?${params.toString()}`);
-        const transactions = await response.json();
+        currentFilterParams = params.toString();
+        const transactions = await fetchTransactionPage('');
         renderTransactions(transactions);
     } catch (error) {
         console.error('Error:', error);
@@ -120,6 +124,76 @@ async function loadTransactions() {
     }
 }
 
+// Cursor pagination: the server returns the next page's cursor in X-Next-Cursor
+async function fetchTransactionPage(cursor) {
+    const params = new URLSearchParams(currentFilterParams);
+    params.set('cursor', cursor);
+    
+    const response = await fetch(`/api/v1/transactions?${params.toString()}`);
+    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+    nextCursor = response.headers.get('X-Next-Cursor');
+    return response.json();
+}
+
+async function loadMoreTransactions() {
+    if (!nextCursor || loadingMoreTransactions) return;
+    loadingMoreTransactions = true;
+    
+    const button = document.getElementById('loadMoreTransactions');
+    if (button) button.disabled = true;
+    
+    try {
+        const transactions = await fetchTransactionPage(nextCursor);
+        const body = document.getElementById('transactionsBody');
+        if (body) body.insertAdjacentHTML('beforeend', transactions.map(transactionRowHtml).join(''));
+    } catch (error) {
+        console.error('Error:', error);
+    } finally {
+        loadingMoreTransactions = false;
+        updateLoadMore();
+    }
+}
+
+function updateLoadMore() {
+    const footer = document.getElementById('transactionsFooter');
+    if (!footer) return;
+    
+    if (nextCursor) {
+        footer.innerHTML = `
+            <button id="loadMoreTransactions" class="btn btn-outline-secondary btn-sm" onclick="loadMoreTransactions()">
+                Xem thêm
+            </button>
+        `;
+    } else {
+        footer.innerHTML = '';
+    }
+}
+
+function transactionRowHtml(tx) {
+    const amountClass = tx.transaction_type === 'income' ? 'text-success' : 'text-danger';
+    const sign = tx.transaction_type === 'income' ? '+' : '-';
+    const displayAmount = `${sign}${formatCurrency(tx.amount)}`;
+    const dateStr = new Date(tx.date).toLocaleDateString('vi-VN');
+    
+    return `
+        <tr>
+            <td>${dateStr}</td>
+            <td class="fw-bold">${tx.description || 'Không mô tả'}</td>
+            <td><span class="badge bg-secondary">${tx.category_name || 'Khác'}</span></td>
+            <td>${tx.wallet_name}</td>
+            <td class="text-end ${amountClass} fw-bold">${displayAmount}</td>
+            <td class="text-center">
+                <button class="btn btn-sm btn-outline-primary me-1" onclick="editTransaction(${tx.id})" title="Sửa">
+                    <i class="bi bi-pencil"></i>
+                </button>
+                <button class="btn btn-sm btn-outline-danger" onclick="deleteTransaction(${tx.id})" title="Xóa">
+                    <i class="bi bi-trash"></i>
+                </button>
+            </td>
+        </tr>
+    `;
+}
+
 function renderTransactions(transactions) {
     const container = document.getElementById('transactionsContainer');
     if (!transactions || transactions.length === 0) {
@@ -127,7 +201,7 @@ function renderTransactions(transactions) {
         return;
     }
     
-    let html = `
+    container.innerHTML = `
         <div class="table-responsive">
             <table class="table table-hover align-middle">
                 <thead class="table-light">
@@ -140,38 +214,21 @@ function renderTransactions(transactions) {
                         <th class="text-center" style="width: 120px;">Hành động</th>
                     </tr>
                 </thead>
-                <tbody>
+                <tbody id="transactionsBody">${transactions.map(transactionRowHtml).join('')}</tbody>
+            </table>
+        </div>
+        <div id="transactionsFooter" class="text-center py-2"></div>
     `;
+    updateLoadMore();
     
-    transactions.forEach(tx => {
-        const amountClass = tx.transaction_type === 'income' ? 'text-success' : 'text-danger';
-        const sign = tx.transaction_type === 'income' ? '+' : '-';
-        const displayAmount = `${sign}${formatCurrency(tx.amount)}`;
-        const dateStr = new Date(tx.date).toLocaleDateString('vi-VN');
-        
-        html += `
-            <tr>
-                <td>${dateStr}</td>
-                <td class="fw-bold">${tx.description || 'Không mô tả'}</td>
-                <td><span class="badge bg-secondary">${tx.category_name || 'Khác'}</span></td>
-                <td>${tx.wallet_name}</td>
-                <td class="text-end ${amountClass} fw-bold">${displayAmount}</td>
-                <td class="text-center">
-                    <button class="btn btn-sm btn-outline-primary me-1" onclick="editTransaction(${tx.id})" title="Sửa">
-                        <i class="bi bi-pencil"></i>
-                    </button>
-                    <button class="btn btn-sm btn-outline-danger" onclick="deleteTransaction(${tx.id})" title="Xóa">
-                        <i class="bi bi-trash"></i>
-                    </button>
-                </td>
-            </tr>
-        `;
-    });
-    
-    html += `</tbody></table></div>`;
-    container.innerHTML = html;
-    html += `</tbody></table></div>`;
-    container.innerHTML = html;
+    // Infinite scroll: load the next page when the footer comes into view
+    if ('IntersectionObserver' in window) {
+        if (transactionsObserver) transactionsObserver.disconnect();
+        transactionsObserver = new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) loadMoreTransactions();
+        });
+        transactionsObserver.observe(document.getElementById('transactionsFooter'));
+    }
 }
 
 function resetFilters() {
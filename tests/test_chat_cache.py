@@ -0,0 +1,91 @@
+"""
+Response-cache regression tests for chat answers
+"""
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+
+from app.models import Wallet
+from app.services.ai_service import ai_service
+from app.services.embedding_service import embedding_service
+from app.services.llm_cache import LLMCache
+from app.services.rag_service import rag_service
+from app.services.retrieval_service import retrieval_service
+import app.services.ai_service as ai_module
+
+QUESTIONS = [
+    "Tháng này tôi chi bao nhiêu?",
+    "Số dư hiện tại là bao nhiêu?",
+    "Tháng trước tôi thu nhập bao nhiêu?",
+    "Tôi tiêu nhiều nhất cho danh mục nào?",
+    "Tuần này tôi chi bao nhiêu?",
+    "Hôm nay tôi chi bao nhiêu?",
+    "Tôi còn nợ ai không?",
+    "Năm nay tôi tiết kiệm được bao nhiêu?",
+    "Tháng này tôi có vượt ngân sách không?",
+    "Khoản chi lớn nhất tháng này là gì?",
+    "Tháng 3 tôi chi bao nhiêu?",
+    "Tôi nên cắt giảm khoản nào?",
+]
+
+
+@pytest.fixture
+def model_calls(db, monkeypatch):
+    """Fresh response cache, offline retrieval and a stub model that counts its calls"""
+    cache.clear()
+    monkeypatch.setattr(ai_module, "llm_cache", LLMCache())
+    monkeypatch.setattr(retrieval_service, "_embedder", lambda text: [0.0] * 8)
+    monkeypatch.setattr(retrieval_service, "_searcher", lambda vector, limit, timestamp_range, match: [])
+    calls = []
+
+    def generate(prompt, system_prompt=None):
+        calls.append(prompt)
+        return f"Answer {len(calls)}"
+
+    monkeypatch.setattr(ai_service, "_generate", generate)
+    Wallet.objects.create(name="Tiền mặt", balance=Decimal("1000000"))
+    return calls
+
+
+@pytest.mark.django_db
+def test_each_question_of_a_long_session_reaches_the_model(model_calls):
+    session_id = None
+    answers = []
+    for question in QUESTIONS:
+        result = rag_service.query_financial_data(question, session_id)
+        session_id = result["session_id"]
+        answers.append(result["answer"])
+
+    # Past the 10-message history window every question must still miss
+    assert len(model_calls) == len(QUESTIONS)
+    assert len(set(answers)) == len(QUESTIONS)
+    assert f"Question: {QUESTIONS[-1]}" in model_calls[-1]
+
+
+@pytest.mark.django_db
+def test_first_question_of_a_new_session_is_served_from_cache(model_calls):
+    first = rag_service.query_financial_data(QUESTIONS[0])
+    again = rag_service.query_financial_data(QUESTIONS[0])
+
+    assert again["answer"] == first["answer"]
+    assert again["session_id"] != first["session_id"]
+    assert len(model_calls) == 1
+
+
+@pytest.mark.django_db
+def test_semantic_tier_never_mixes_periods(model_calls, monkeypatch):
+    semantic_cache = LLMCache()
+    semantic_cache.semantic_enabled = True
+    monkeypatch.setattr(ai_module, "llm_cache", semantic_cache)
+    # Worst case: every question embeds to the same vector
+    monkeypatch.setattr(embedding_service, "get_embedding", lambda text, as_array=False: [1.0, 0.0, 0.0])
+
+    for question in ["Tháng này tôi chi tiêu bao nhiêu?", "Tháng trước tôi chi tiêu bao nhiêu?",
+                     "Hôm qua tôi chi tiêu bao nhiêu?", "Tháng này tôi thu nhập bao nhiêu?"]:
+        rag_service.query_financial_data(question)
+    assert len(model_calls) == 4
+
+    rag_service.query_financial_data("Tháng này mình đã chi tiêu bao nhiêu?")
+    assert len(model_calls) == 4
+    assert semantic_cache.stats()["semantic_hits"] == 1
@@ -0,0 +1,65 @@
+"""
+Query-count regression tests for the dashboard summary
+"""
+from decimal import Decimal
+
+import pytest
+from django.test import RequestFactory
+
+from app.api.dashboard import get_summary as cached_get_summary
+from app.models import Category, Transaction, Wallet
+
+# Bypass the ledger-versioned response cache: these tests pin the queries
+# of the computation itself
+get_summary = cached_get_summary.__wrapped__
+
+
+@pytest.fixture
+def ledger_data(db):
+    """Two wallets (one excluded from total) with one transaction of each type"""
+    wallet = Wallet.objects.create(name="Tiền mặt", balance=Decimal("0"))
+    savings = Wallet.objects.create(name="Tiết kiệm", balance=Decimal("0"), exclude_from_total=True)
+    category = Category.objects.create(name="Ăn uống")
+
+    amounts = {
+        'income': Decimal("1000000.10"),
+        'expense': Decimal("250000.05"),
+        'debt_loan': Decimal("300000"),
+        'debt_borrow': Decimal("200000"),
+        'debt_collect': Decimal("100000"),
+        'debt_repay': Decimal("50000"),
+    }
+    for transaction_type, amount in amounts.items():
+        Transaction.objects.create(
+            wallet=wallet,
+            category=category if transaction_type == 'expense' else None,
+            amount=amount,
+            transaction_type=transaction_type,
+        )
+    Transaction.objects.create(wallet=savings, amount=Decimal("500000"), transaction_type='income')
+    return amounts
+
+
+@pytest.mark.django_db
+def test_summary_uses_two_queries(ledger_data, django_assert_num_queries):
+    request = RequestFactory().get("/api/v1/dashboard/summary")
+
+    with django_assert_num_queries(2):
+        result = get_summary(request)
+
+    assert result["transaction_count"] == 7
+    assert result["total_income"] == Decimal("1500000.10")
+    assert result["total_expense"] == Decimal("250000.05")
+    assert result["balance"] == Decimal("1250000.05")
+    assert result["outstanding_receivable"] == Decimal("200000")
+    assert result["outstanding_payable"] == Decimal("150000")
+
+
+@pytest.mark.django_db
+def test_summary_wallet_totals_are_exact(ledger_data):
+    result = get_summary(RequestFactory().get("/api/v1/dashboard/summary"))
+
+    # 1000000.10 - 250000.05 - 300000 + 200000 + 100000 - 50000
+    assert result["available_balance"] == Decimal("700000.05")
+    assert result["current_balance"] == Decimal("1200000.05")
+    assert isinstance(result["current_balance"], Decimal)
@@ -0,0 +1,105 @@
+"""
+Query-count regression tests for the chat (RAG) data context
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+
+from app.models import Budget, Category, Transaction, Wallet
+from app.services.category_matcher import category_matcher
+from app.services.rag_service import rag_service
+from app.services.retrieval_service import retrieval_service
+
+
+@pytest.fixture(autouse=True)
+def offline_vectors(monkeypatch):
+    """No embedding model or Qdrant here: the vector side finds nothing, the SQL side runs for real"""
+    monkeypatch.setattr(retrieval_service, "_embedder", lambda text: [0.0] * 8)
+    monkeypatch.setattr(retrieval_service, "_searcher", lambda vector, limit, timestamp_range, match: [])
+
+
+@pytest.fixture
+def ledger_data(db, django_capture_on_commit_callbacks):
+    """One wallet, two categories and transactions last month and this month"""
+    with django_capture_on_commit_callbacks(execute=True):
+        wallet = Wallet.objects.create(name="Tiền mặt", balance=Decimal("0"))
+        food = Category.objects.create(name="Ăn uống")
+        transport = Category.objects.create(name="Di chuyển")
+        Category.objects.create(name="Ăn")
+
+    this_month = timezone.localdate().replace(day=1)
+    last_month = (this_month - timedelta(days=1)).replace(day=1)
+
+    def at(day):
+        return timezone.make_aware(datetime.combine(day, datetime.min.time())) + timedelta(hours=12)
+
+    rows = [
+        (last_month, 'income', None, "10000000", "Lương"),
+        (last_month, 'expense', food, "300000", "Phở Thìn"),
+        (last_month, 'expense', food, "200000", "Cơm tấm"),
+        (last_month, 'expense', transport, "100000", "Grab"),
+        (this_month, 'expense', food, "50000", "Phở Thìn"),
+        (this_month, 'debt_loan', None, "1000000", ""),
+    ]
+    for day, transaction_type, category, amount, description in rows:
+        Transaction.objects.create(
+            wallet=wallet,
+            category=category,
+            amount=Decimal(amount),
+            description=description,
+            transaction_type=transaction_type,
+            date=at(day),
+        )
+    Budget.objects.create(
+        category=food,
+        amount=Decimal("1000000"),
+        start_date=last_month,
+        end_date=this_month - timedelta(days=1),
+    )
+    return wallet
+
+
+@pytest.mark.django_db
+def test_context_query_count_with_retrieval(ledger_data, django_assert_num_queries):
+    category_matcher.match("warm up")  # builds the automaton once
+
+    # Context: grouped totals, wallet balance, budget (3)
+    # Retrieval: candidate rows, type totals, keyword totals (3)
+    with django_assert_num_queries(6):
+        context = rag_service._extract_data_context("Tháng trước tôi chi tiêu bao nhiêu cho ăn uống ở Phở Thìn?")
+
+    assert context["totals"]["period_expense"] == 500000.0
+    assert context["totals"]["count"] == 2
+    assert context["budget"]["spent"] == 500000.0
+    assert context["categories"][0] == {"name": "Ăn uống", "amount": 500000.0}
+    assert context["keyword_totals"]["thìn"] == {"expense": {"total": 300000.0, "count": 1}}
+    assert [row["desc"] for row in context["transactions_list"]][:2] == ["Phở Thìn", "Cơm tấm"]
+
+
+@pytest.mark.django_db
+def test_context_totals_and_period_end_balance(ledger_data):
+    context = rag_service._extract_data_context("Tháng trước tôi chi tiêu thế nào?")
+
+    assert context["totals"]["period_income"] == 10000000.0
+    assert context["totals"]["period_expense"] == 600000.0
+    assert context["totals"]["count"] == 4
+    # 10,000,000 - 600,000 at the end of last month; this month's rows excluded
+    assert context["totals"]["balance_at_period_end"] == 9400000.0
+    assert context["totals"]["real_wallet_balance"] == 8350000.0
+    assert [c["name"] for c in context["categories"]] == ["Ăn uống", "Di chuyển"]
+
+
+@pytest.mark.django_db
+def test_category_matcher_prefers_longest_name_and_rebuilds(ledger_data, django_capture_on_commit_callbacks,
+                                                           django_assert_num_queries):
+    assert category_matcher.match("Chi cho ĂN UỐNG hôm qua") == "Ăn uống"
+    assert category_matcher.match("đi ăn") == "Ăn"
+
+    with django_assert_num_queries(0):
+        assert category_matcher.match("không có danh mục") is None
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Category.objects.create(name="Giải trí")
+    assert category_matcher.match("tiền giải trí") == "Giải trí"